@@ -0,0 +1,25 @@
+import dataclasses
+from collections import OrderedDict
+
+import pytest
+
+from core.config import settings
+from database import connection, profile_cache, word_catalog
+from handlers import daily
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """Points the connection layer at a throwaway SQLite file."""
+    test_settings = dataclasses.replace(
+        settings,
+        db_backend="sqlite",
+        db_path=str(tmp_path / "test.db"),
+    )
+    monkeypatch.setattr(connection, "settings", test_settings)
+    monkeypatch.setattr(word_catalog, "settings", test_settings)
+    monkeypatch.setattr(word_catalog, "_CATALOG", None)
+    monkeypatch.setattr(profile_cache, "_CACHE", profile_cache.ProfileCache(1000, 300))
+    monkeypatch.setattr(daily, "_RENDERED", OrderedDict())
+    yield test_settings
+    connection.close_sqlite_pool()
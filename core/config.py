@@ -33,6 +33,28 @@ class Config:
     db_pool_min_size: int = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
     db_pool_max_size: int = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
     db_path: str = _resolve_db_path(os.getenv("DB_PATH", "./germanic.db"))
+    sqlite_pool_min_size: int = int(os.getenv("SQLITE_POOL_MIN_SIZE", "1"))
+    sqlite_pool_max_size: int = int(os.getenv("SQLITE_POOL_MAX_SIZE", "8"))
+    sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    sqlite_synchronous: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").strip().upper()
+    sqlite_cache_size_kb: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", "16384"))
+    sqlite_mmap_size_mb: int = int(os.getenv("SQLITE_MMAP_SIZE_MB", "128"))
+    db_executor_max_workers: int = int(os.getenv("DB_EXECUTOR_MAX_WORKERS", "8"))
+    word_catalog_refresh_seconds: int = int(os.getenv("WORD_CATALOG_REFRESH_SECONDS", "60"))
+    telemetry_buffer_size: int = int(os.getenv("TELEMETRY_BUFFER_SIZE", "10000"))
+    telemetry_batch_size: int = int(os.getenv("TELEMETRY_BATCH_SIZE", "500"))
+    telemetry_flush_interval_ms: int = int(os.getenv("TELEMETRY_FLUSH_INTERVAL_MS", "500"))
+    fsm_cache_size: int = int(os.getenv("FSM_CACHE_SIZE", "10000"))
+    profile_cache_size: int = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+    profile_cache_ttl_seconds: int = int(os.getenv("PROFILE_CACHE_TTL_SECONDS", "300"))
+    ui_messages_cache_size: int = int(os.getenv("UI_MESSAGES_CACHE_SIZE", "50000"))
+    ui_messages_flush_interval_ms: int = int(os.getenv("UI_MESSAGES_FLUSH_INTERVAL_MS", "1000"))
+    quiz_review_flush_interval_ms: int = int(os.getenv("QUIZ_REVIEW_FLUSH_INTERVAL_MS", "2000"))
+    fsm_state_ttl_hours: int = int(os.getenv("FSM_STATE_TTL_HOURS", "168"))
+    fsm_sweep_interval_minutes: int = int(os.getenv("FSM_SWEEP_INTERVAL_MINUTES", "60"))
+    fsm_sweep_batch_size: int = int(os.getenv("FSM_SWEEP_BATCH_SIZE", "500"))
+    fsm_sweep_max_batches: int = int(os.getenv("FSM_SWEEP_MAX_BATCHES", "200"))
+    fsm_sweep_vacuum: bool = os.getenv("FSM_SWEEP_VACUUM", "False").lower() == "true"
     
     # Feature Flags
     daily_lesson_enabled: bool = os.getenv("DAILY_LESSON_ENABLED", "True").lower() == "true"
@@ -49,10 +71,21 @@ class Config:
     # Scheduler
     backup_time_utc: str = os.getenv("BACKUP_TIME_UTC", "03:00")
     broadcast_window_minutes: int = int(os.getenv("BROADCAST_WINDOW_MINUTES", "10"))
+    broadcast_enqueue_chunk_size: int = int(os.getenv("BROADCAST_ENQUEUE_CHUNK_SIZE", "2000"))
     broadcast_claim_batch_size: int = int(os.getenv("BROADCAST_CLAIM_BATCH_SIZE", "1000"))
+    broadcast_ack_batch_size: int = int(os.getenv("BROADCAST_ACK_BATCH_SIZE", "250"))
     broadcast_send_concurrency: int = int(os.getenv("BROADCAST_SEND_CONCURRENCY", "30"))
+    broadcast_rate_per_second: float = float(os.getenv("BROADCAST_RATE_PER_SECOND", "25"))
+    broadcast_per_chat_interval_ms: int = int(os.getenv("BROADCAST_PER_CHAT_INTERVAL_MS", "1000"))
+    broadcast_retry_after_max_wait_seconds: int = int(os.getenv("BROADCAST_RETRY_AFTER_MAX_WAIT_SECONDS", "30"))
     broadcast_max_attempts: int = int(os.getenv("BROADCAST_MAX_ATTEMPTS", "6"))
     broadcast_processing_stale_seconds: int = int(os.getenv("BROADCAST_PROCESSING_STALE_SECONDS", "900"))
+    broadcast_progress_interval_seconds: int = int(os.getenv("BROADCAST_PROGRESS_INTERVAL_SECONDS", "10"))
+    broadcast_worker_idle_seconds: int = int(os.getenv("BROADCAST_WORKER_IDLE_SECONDS", "30"))
+    broadcast_retention_days: int = int(os.getenv("BROADCAST_RETENTION_DAYS", "14"))
+    broadcast_archive_batch_size: int = int(os.getenv("BROADCAST_ARCHIVE_BATCH_SIZE", "1000"))
+    broadcast_archive_max_batches: int = int(os.getenv("BROADCAST_ARCHIVE_MAX_BATCHES", "500"))
+    broadcast_archive_vacuum: bool = os.getenv("BROADCAST_ARCHIVE_VACUUM", "False").lower() == "true"
     delivery_mode: str = os.getenv("DELIVERY_MODE", "polling").strip().lower()
     webhook_host: str = os.getenv("WEBHOOK_HOST", "0.0.0.0").strip()
     webhook_port: int = int(os.getenv("PORT", os.getenv("WEBHOOK_PORT", "8080")))
@@ -66,8 +99,6 @@ class Config:
     
     # UI Constants
     page_size: int = 20
-    main_menu_state_key: str = "main_menu_msg_id"
-    active_ui_state_key: str = "active_ui_msg_id"
 
 # Global Instance
 settings = Config()
@@ -0,0 +1,68 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from core.config import settings
+from database.connection import current_unit_of_work
+
+T = TypeVar("T")
+
+_DB_EXECUTOR: ThreadPoolExecutor | None = None
+_HOLDER_EXECUTOR: ThreadPoolExecutor | None = None
+_DB_EXECUTOR_LOCK = threading.Lock()
+
+
+def _get_db_executor() -> ThreadPoolExecutor:
+    global _DB_EXECUTOR
+    if _DB_EXECUTOR is not None:
+        return _DB_EXECUTOR
+    with _DB_EXECUTOR_LOCK:
+        if _DB_EXECUTOR is None:
+            _DB_EXECUTOR = ThreadPoolExecutor(
+                max_workers=max(1, settings.db_executor_max_workers),
+                thread_name_prefix="db",
+            )
+        return _DB_EXECUTOR
+
+
+def _get_holder_executor() -> ThreadPoolExecutor:
+    # Calls from a unit of work that already holds a connection never wait on
+    # the pools, so they get their own threads and cannot be starved by
+    # calls queued behind that same connection.
+    global _HOLDER_EXECUTOR
+    if _HOLDER_EXECUTOR is not None:
+        return _HOLDER_EXECUTOR
+    with _DB_EXECUTOR_LOCK:
+        if _HOLDER_EXECUTOR is None:
+            _HOLDER_EXECUTOR = ThreadPoolExecutor(
+                max_workers=max(1, settings.db_executor_max_workers),
+                thread_name_prefix="db-uow",
+            )
+        return _HOLDER_EXECUTOR
+
+
+async def run_db(fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """Run a sync repository/service call on the bounded DB executor."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    unit = current_unit_of_work()
+    if unit is not None and unit.holds_connection:
+        executor = _get_holder_executor()
+    else:
+        executor = _get_db_executor()
+    return await loop.run_in_executor(executor, call)
+
+
+def shutdown_db_executor(wait: bool = True):
+    global _DB_EXECUTOR
+    global _HOLDER_EXECUTOR
+    with _DB_EXECUTOR_LOCK:
+        for executor in (_DB_EXECUTOR, _HOLDER_EXECUTOR):
+            if executor is not None:
+                executor.shutdown(wait=wait)
+        _DB_EXECUTOR = None
+        _HOLDER_EXECUTOR = None
@@ -1,18 +1,49 @@
-import re
+import queue
 import sqlite3
 import atexit
+import functools
+import itertools
+import logging
+import threading
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 from core.config import settings
 
 _POSTGRES_POOL: Any = None
-_QMARK_RE = re.compile(r"\?")
 _POSTGRES_ATEXIT_REGISTERED = False
+_SQLITE_POOL: Any = None
+_SQLITE_POOL_LOCK = threading.Lock()
+_SQLITE_ATEXIT_REGISTERED = False
+_SQLITE_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+_QUERY_CACHE_SIZE = 512
 
 
+@functools.lru_cache(maxsize=_QUERY_CACHE_SIZE)
 def _to_postgres_placeholders(query: str) -> str:
-    return _QMARK_RE.sub("%s", query)
+    """
+    Rewrites qmark placeholders to psycopg's %s.
+    A ? inside a quoted literal or identifier is left alone. Results are
+    cached because the repositories reuse a small set of query strings.
+    """
+    if "?" not in query:
+        return query
+    out: list[str] = []
+    quote: str | None = None
+    for ch in query:
+        if quote is not None:
+            if ch == quote:
+                quote = None
+            out.append(ch)
+        elif ch in ("'", '"'):
+            quote = ch
+            out.append(ch)
+        elif ch == "?":
+            out.append("%s")
+        else:
+            out.append(ch)
+    return "".join(out)
 
 
 class CompatRow:
@@ -22,12 +53,15 @@ class CompatRow:
     - row[0], row["column"]
     - unpacking: a, b = row
     - dict(row)
+    All rows of one result set share the same column index map.
     """
 
-    def __init__(self, columns: list[str], values: tuple[Any, ...]):
+    __slots__ = ("_columns", "_values", "_idx")
+
+    def __init__(self, columns: list[str], values: tuple[Any, ...], index: dict[str, int] | None = None):
         self._columns = columns
         self._values = values
-        self._idx = {name: i for i, name in enumerate(columns)}
+        self._idx = index if index is not None else {name: i for i, name in enumerate(columns)}
 
     def __getitem__(self, key: int | str) -> Any:
         if isinstance(key, int):
@@ -47,9 +81,12 @@ class CompatRow:
 class CompatCursor:
     def __init__(self, raw_cursor):
         self._cursor = raw_cursor
+        self._columns: list[str] | None = None
+        self._index: dict[str, int] = {}
 
     def execute(self, query: str, params: Any = None):
         sql = _to_postgres_placeholders(query)
+        self._columns = None
         if params is None:
             self._cursor.execute(sql)
         else:
@@ -58,20 +95,33 @@ class CompatCursor:
 
     def executemany(self, query: str, params_seq: Any):
         sql = _to_postgres_placeholders(query)
+        self._columns = None
         self._cursor.executemany(sql, params_seq)
         return self
 
+    def _result_columns(self) -> tuple[list[str], dict[str, int]]:
+        # description is rebuilt by the driver on every access; read it once per result set.
+        if self._columns is None:
+            self._columns = [d.name for d in (self._cursor.description or [])]
+            self._index = {name: i for i, name in enumerate(self._columns)}
+        return self._columns, self._index
+
     def fetchone(self) -> Any:
         row = self._cursor.fetchone()
         if row is None:
             return None
-        cols = [d.name for d in (self._cursor.description or [])]
-        return CompatRow(cols, row)
+        cols, index = self._result_columns()
+        return CompatRow(cols, row, index)
+
+    def fetchmany(self, size: int | None = None) -> list[Any]:
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        cols, index = self._result_columns()
+        return [CompatRow(cols, r, index) for r in rows]
 
     def fetchall(self) -> list[Any]:
         rows = self._cursor.fetchall()
-        cols = [d.name for d in (self._cursor.description or [])]
-        return [CompatRow(cols, r) for r in rows]
+        cols, index = self._result_columns()
+        return [CompatRow(cols, r, index) for r in rows]
 
     def __getattr__(self, name: str) -> Any:
         return getattr(self._cursor, name)
@@ -131,12 +181,184 @@ def close_postgres_pool():
         _POSTGRES_POOL = None
 
 
-def _get_sqlite_connection() -> Any:
-    db_path = Path(settings.db_path)
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(settings.db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+class PooledSqliteConnection:
+    """
+    One checkout of a long-lived SQLite connection owned by the pool.
+    close() hands it back to the pool instead of closing the file handle;
+    any transaction left open by the caller is rolled back first. A checkout
+    dropped without close() (a caller that raised before reaching it) is
+    handed back when it is garbage-collected, so it cannot hold the writer
+    or a reader slot for good.
+    """
+
+    def __init__(self, raw_conn: sqlite3.Connection, pool: "_SqlitePool", readonly: bool):
+        self._conn = raw_conn
+        self._pool = pool
+        self.readonly = readonly
+        self._released = False
+
+    def cursor(self) -> Any:
+        return self._conn.cursor()
+
+    def commit(self) -> Any:
+        return self._conn.commit()
+
+    def rollback(self) -> Any:
+        return self._conn.rollback()
+
+    def close(self) -> Any:
+        if self._released:
+            return None
+        self._released = True
+        return self._pool.release(self)
+
+    def __enter__(self) -> "PooledSqliteConnection":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        if self.__dict__.get("_released", True):
+            return
+        try:
+            logging.warning("SQLite connection was not closed; returning it to the pool")
+            self.close()
+        except Exception:
+            pass
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+
+def _apply_sqlite_pragmas(raw_conn: sqlite3.Connection, readonly: bool):
+    synchronous = settings.sqlite_synchronous
+    if synchronous not in _SQLITE_SYNCHRONOUS_MODES:
+        synchronous = "NORMAL"
+    if not readonly:
+        # WAL is persistent in the file header; readers inherit it.
+        raw_conn.execute("PRAGMA journal_mode = WAL")
+    raw_conn.execute(f"PRAGMA synchronous = {synchronous}")
+    raw_conn.execute(f"PRAGMA busy_timeout = {max(0, int(settings.sqlite_busy_timeout_ms))}")
+    raw_conn.execute(f"PRAGMA cache_size = -{max(0, int(settings.sqlite_cache_size_kb))}")
+    raw_conn.execute(f"PRAGMA mmap_size = {max(0, int(settings.sqlite_mmap_size_mb)) * 1024 * 1024}")
+    raw_conn.execute("PRAGMA temp_store = MEMORY")
+    if readonly:
+        raw_conn.execute("PRAGMA query_only = ON")
+
+
+class _SqlitePool:
+    """
+    A small LIFO pool of read-only connections plus one writer connection.
+    In WAL mode readers never block behind the writer; writes are serialized
+    in-process so they do not spin on SQLITE_BUSY against each other.
+    """
+
+    def __init__(self, path: str, min_size: int, max_size: int):
+        self.path = path
+        self.max_size = max(1, max_size)
+        self._timeout = max(0.1, settings.sqlite_busy_timeout_ms / 1000.0)
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._writer_lock = threading.Lock()
+        self._closed = False
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Writer first: it switches the file to WAL before readers attach.
+        self._writer = self._open(readonly=False)
+        for _ in range(min(max(0, min_size), self.max_size)):
+            self._idle.put(self._open(readonly=True))
+
+    def _open(self, readonly: bool) -> sqlite3.Connection:
+        raw_conn = sqlite3.connect(self.path, timeout=self._timeout, check_same_thread=False)
+        raw_conn.row_factory = sqlite3.Row
+        _apply_sqlite_pragmas(raw_conn, readonly=readonly)
+        return raw_conn
+
+    def acquire_reader(self) -> PooledSqliteConnection:
+        if not self._slots.acquire(timeout=self._timeout):
+            raise sqlite3.OperationalError("sqlite reader pool exhausted")
+        try:
+            raw_conn = self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                raw_conn = self._open(readonly=True)
+            except Exception:
+                self._slots.release()
+                raise
+        return PooledSqliteConnection(raw_conn, self, readonly=True)
+
+    def acquire_writer(self) -> PooledSqliteConnection:
+        if not self._writer_lock.acquire(timeout=self._timeout):
+            raise sqlite3.OperationalError("database is locked (writer busy)")
+        return PooledSqliteConnection(self._writer, self, readonly=False)
+
+    def release(self, conn: PooledSqliteConnection):
+        try:
+            if conn._conn.in_transaction:
+                conn._conn.rollback()
+        except Exception:
+            pass
+        if conn.readonly:
+            if self._closed:
+                conn._conn.close()
+            else:
+                self._idle.put(conn._conn)
+            self._slots.release()
+            return
+        self._writer_lock.release()
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.close()
+            except Exception:
+                pass
+        try:
+            self._writer.close()
+        except Exception:
+            pass
+
+
+def _get_or_create_sqlite_pool() -> _SqlitePool:
+    global _SQLITE_POOL
+    global _SQLITE_ATEXIT_REGISTERED
+    pool = _SQLITE_POOL
+    if pool is not None and pool.path == settings.db_path:
+        return pool
+    with _SQLITE_POOL_LOCK:
+        if _SQLITE_POOL is not None and _SQLITE_POOL.path != settings.db_path:
+            _SQLITE_POOL.close()
+            _SQLITE_POOL = None
+        if _SQLITE_POOL is None:
+            _SQLITE_POOL = _SqlitePool(
+                settings.db_path,
+                min_size=settings.sqlite_pool_min_size,
+                max_size=max(max(1, settings.sqlite_pool_min_size), settings.sqlite_pool_max_size),
+            )
+        if not _SQLITE_ATEXIT_REGISTERED:
+            atexit.register(close_sqlite_pool)
+            _SQLITE_ATEXIT_REGISTERED = True
+        return _SQLITE_POOL
+
+
+def close_sqlite_pool():
+    global _SQLITE_POOL
+    with _SQLITE_POOL_LOCK:
+        if _SQLITE_POOL is not None:
+            _SQLITE_POOL.close()
+            _SQLITE_POOL = None
+
+
+def _get_sqlite_connection(readonly: bool = False) -> Any:
+    pool = _get_or_create_sqlite_pool()
+    if readonly:
+        return pool.acquire_reader()
+    return pool.acquire_writer()
 
 
 def _get_postgres_connection() -> Any:
@@ -150,11 +372,201 @@ def is_postgres_backend() -> bool:
     return settings.db_backend == "postgres"
 
 
-def get_connection() -> Any:
+def _get_backend_connection(readonly: bool = False) -> Any:
+    if settings.db_backend == "postgres":
+        return _get_postgres_connection()
+    return _get_sqlite_connection(readonly=readonly)
+
+
+class ScopedConnection:
+    """
+    Per-call view of the connection bound to a UnitOfWork.
+    Each repository call runs inside its own savepoint: commit() releases it
+    into the outer transaction and close() without commit rolls it back, so a
+    failed call neither leaks partial writes nor aborts the whole update.
+    """
+
+    def __init__(self, raw_conn: Any, name: str):
+        self._conn = raw_conn
+        self._name = name
+        self._savepoint_open = False
+        self._closed = False
+
+    def _execute(self, sql: str):
+        self._conn.cursor().execute(sql)
+
+    def cursor(self) -> Any:
+        if not self._savepoint_open:
+            self._execute(f"SAVEPOINT {self._name}")
+            self._savepoint_open = True
+        return self._conn.cursor()
+
+    def commit(self):
+        if self._savepoint_open:
+            self._savepoint_open = False
+            self._execute(f"RELEASE SAVEPOINT {self._name}")
+
+    def rollback(self):
+        if self._savepoint_open:
+            self._savepoint_open = False
+            self._execute(f"ROLLBACK TO SAVEPOINT {self._name}")
+            self._execute(f"RELEASE SAVEPOINT {self._name}")
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.rollback()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+
+class UnitOfWork:
+    """
+    One connection and one transaction shared by every get_connection() call
+    made while the unit is current. Reads are served by the regular pool until
+    the first write binds a connection; after that reads go through the bound
+    connection so they see this unit's uncommitted writes.
+    """
+
+    def __init__(self):
+        self._conn: Any = None
+        self._lock = threading.Lock()
+        self._savepoint_ids = itertools.count(1)
+        self._commit_hooks: list[Callable[[], None]] = []
+        self._rollback_hooks: list[Callable[[], None]] = []
+
+    @property
+    def holds_connection(self) -> bool:
+        return self._conn is not None
+
+    def connection(self, readonly: bool = False) -> ScopedConnection | None:
+        with self._lock:
+            if self._conn is None:
+                if readonly:
+                    return None
+                conn = _get_backend_connection(readonly=False)
+                if not is_postgres_backend():
+                    try:
+                        conn.execute("BEGIN IMMEDIATE")
+                    except Exception:
+                        conn.close()
+                        raise
+                self._conn = conn
+            return ScopedConnection(self._conn, f"uow_{next(self._savepoint_ids)}")
+
+    def on_rollback(self, hook: Callable[[], None]):
+        """
+        Registers hook to run if the pending writes are discarded, e.g. to drop
+        cache entries that were updated ahead of the commit.
+        """
+        with self._lock:
+            self._rollback_hooks.append(hook)
+
+    def on_commit(self, hook: Callable[[], None]):
+        """Registers hook to run once the pending writes are committed."""
+        with self._lock:
+            self._commit_hooks.append(hook)
+
+    def _take_hooks(self) -> tuple[list[Callable[[], None]], list[Callable[[], None]]]:
+        with self._lock:
+            commit_hooks, self._commit_hooks = self._commit_hooks, []
+            rollback_hooks, self._rollback_hooks = self._rollback_hooks, []
+        return commit_hooks, rollback_hooks
+
+    @staticmethod
+    def _run_hooks(hooks: list[Callable[[], None]]):
+        for hook in hooks:
+            try:
+                hook()
+            except Exception as exc:
+                logging.error("Unit of work hook failed: %s", exc)
+
+    def commit(self):
+        """Commits pending writes and hands the connection back to the pool."""
+        with self._lock:
+            conn, self._conn = self._conn, None
+        commit_hooks, rollback_hooks = self._take_hooks()
+        if conn is None:
+            self._run_hooks(commit_hooks)
+            return
+        try:
+            conn.commit()
+        except Exception:
+            self._run_hooks(rollback_hooks)
+            raise
+        finally:
+            conn.close()
+        self._run_hooks(commit_hooks)
+
+    def rollback(self):
+        with self._lock:
+            conn, self._conn = self._conn, None
+        _, rollback_hooks = self._take_hooks()
+        if conn is None:
+            self._run_hooks(rollback_hooks)
+            return
+        try:
+            conn.rollback()
+        finally:
+            conn.close()
+            self._run_hooks(rollback_hooks)
+
+
+_CURRENT_UNIT_OF_WORK: ContextVar[UnitOfWork | None] = ContextVar("db_unit_of_work", default=None)
+
+
+def current_unit_of_work() -> UnitOfWork | None:
+    return _CURRENT_UNIT_OF_WORK.get()
+
+
+def begin_unit_of_work():
+    """Makes a fresh UnitOfWork current; returns (unit, token) for end_unit_of_work()."""
+    unit = UnitOfWork()
+    return unit, _CURRENT_UNIT_OF_WORK.set(unit)
+
+
+def end_unit_of_work(token):
+    _CURRENT_UNIT_OF_WORK.reset(token)
+
+
+def get_connection(readonly: bool = False) -> Any:
     """
     Returns a DB connection based on selected backend.
     Default backend is sqlite for safe rollout.
+    readonly=True lets SQLite serve the call from the reader pool instead of
+    waiting for the single writer; Postgres ignores the hint.
+    Inside a UnitOfWork the call joins the unit's transaction instead.
     """
-    if settings.db_backend == "postgres":
-        return _get_postgres_connection()
-    return _get_sqlite_connection()
+    unit = _CURRENT_UNIT_OF_WORK.get()
+    if unit is not None:
+        scoped = unit.connection(readonly=readonly)
+        if scoped is not None:
+            return scoped
+    return _get_backend_connection(readonly=readonly)
+
+
+def compact_table(table: str):
+    """
+    Returns space freed by bulk deletes to the OS: VACUUM on Postgres (that
+    table only), incremental_vacuum or a full VACUUM on SQLite.
+    """
+    if is_postgres_backend():
+        import psycopg  # type: ignore[reportMissingImports]
+
+        with psycopg.connect(settings.database_url, autocommit=True) as conn:
+            conn.execute(f"VACUUM (ANALYZE) {table}")
+        return
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("PRAGMA auto_vacuum")
+        row = cur.fetchone()
+        if row and int(row[0]) == 2:
+            cur.execute("PRAGMA incremental_vacuum")
+            cur.fetchall()
+        else:
+            cur.execute("VACUUM")
+    finally:
+        conn.close()
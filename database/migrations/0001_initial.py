@@ -0,0 +1,192 @@
+"""Baseline schema as it existed before versioned migrations."""
+from database.migrations import add_column_if_missing
+
+
+def upgrade(cursor, backend: str):
+    is_pg = backend == "postgres"
+    big_int = "BIGINT" if is_pg else "INTEGER"
+    serial_pk = "BIGSERIAL PRIMARY KEY" if is_pg else "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    statements = [
+        f"""
+        CREATE TABLE IF NOT EXISTS user_profile (
+            user_id {big_int} PRIMARY KEY,
+            current_level TEXT DEFAULT 'A1',
+            goal TEXT DEFAULT 'general',
+            daily_time_minutes INTEGER DEFAULT 15,
+            notification_time TEXT DEFAULT '09:00',
+            onboarding_completed INTEGER DEFAULT 0,
+            xp INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS words (
+            id {serial_pk},
+            de TEXT,
+            uz TEXT,
+            level TEXT,
+            pos TEXT,
+            example_de TEXT,
+            example_uz TEXT,
+            category TEXT,
+            plural TEXT
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS user_streak (
+            user_id {big_int} PRIMARY KEY,
+            current_streak INTEGER DEFAULT 0,
+            last_activity DATE,
+            highest_streak INTEGER DEFAULT 0
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS user_mastery (
+            user_id {big_int},
+            item_id {big_int},
+            box INTEGER DEFAULT 0,
+            next_review TIMESTAMP,
+            last_reviewed TIMESTAMP,
+            PRIMARY KEY (user_id, item_id)
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS daily_plans (
+            id {serial_pk},
+            user_id {big_int},
+            plan_data TEXT,
+            created_at DATE DEFAULT CURRENT_DATE
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS daily_lesson_sessions (
+            user_id {big_int} PRIMARY KEY,
+            session_data TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS ui_state (
+            user_id {big_int},
+            key TEXT,
+            val TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, key)
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS navigation_logs (
+            id {serial_pk},
+            user_id {big_int},
+            section_name TEXT,
+            level TEXT,
+            entry_type TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS user_progress (
+            user_id {big_int},
+            module_name TEXT,
+            level TEXT,
+            completion_status INTEGER DEFAULT 0,
+            last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, module_name, level)
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS user_mistakes (
+            user_id {big_int},
+            item_id TEXT,
+            module TEXT,
+            mistake_type TEXT,
+            mistake_count INTEGER DEFAULT 0,
+            last_mistake_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            mastered INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, item_id, module)
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS quiz_results (
+            id {serial_pk},
+            user_id {big_int},
+            level TEXT,
+            score INTEGER,
+            total INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS grammar_progress (
+            user_id {big_int},
+            topic_id TEXT,
+            level TEXT,
+            seen_count INTEGER DEFAULT 0,
+            last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, topic_id)
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS event_logs (
+            id {serial_pk},
+            user_id {big_int},
+            event_type TEXT,
+            section_name TEXT,
+            level TEXT,
+            metadata TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS user_submissions (
+            id {serial_pk},
+            user_id {big_int},
+            module TEXT,
+            content TEXT,
+            level TEXT,
+            metadata TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS broadcast_jobs (
+            id {serial_pk},
+            user_id {big_int} NOT NULL,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            available_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            locked_at TIMESTAMP,
+            last_error TEXT,
+            last_error_at TIMESTAMP,
+            dedupe_key TEXT UNIQUE,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS fsm_state (
+            bot_id {big_int} NOT NULL,
+            chat_id {big_int} NOT NULL,
+            user_id {big_int} NOT NULL,
+            thread_id {big_int} NOT NULL DEFAULT 0,
+            business_connection_id TEXT NOT NULL DEFAULT '',
+            destiny TEXT NOT NULL DEFAULT 'default',
+            state TEXT,
+            data TEXT NOT NULL DEFAULT '{{}}',
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (bot_id, chat_id, user_id, thread_id, business_connection_id, destiny)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_broadcast_jobs_pending ON broadcast_jobs(status, available_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_broadcast_jobs_user ON broadcast_jobs(user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_fsm_state_updated_at ON fsm_state(updated_at)",
+    ]
+    for stmt in statements:
+        cursor.execute(stmt)
+
+    # Databases created before notification_time existed.
+    add_column_if_missing(cursor, backend, "user_profile", "notification_time", "TEXT DEFAULT '09:00'")
@@ -0,0 +1,29 @@
+"""Same index set on SQLite and Postgres, plus indexes for the hot read paths."""
+
+INDEXES = [
+    # Previously created on Postgres only.
+    "CREATE INDEX IF NOT EXISTS idx_user_profile_notification_time ON user_profile(notification_time)",
+    "CREATE INDEX IF NOT EXISTS idx_navigation_logs_created_at ON navigation_logs(created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_navigation_logs_user_created ON navigation_logs(user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_event_logs_created_type ON event_logs(created_at, event_type)",
+    "CREATE INDEX IF NOT EXISTS idx_user_progress_daily ON user_progress(module_name, completion_status, last_active)",
+    "CREATE INDEX IF NOT EXISTS idx_user_mastery_due ON user_mastery(user_id, next_review)",
+    "CREATE INDEX IF NOT EXISTS idx_user_mistakes_active ON user_mistakes(user_id, module, mastered, mistake_count)",
+    # Dictionary pages and level counts.
+    "CREATE INDEX IF NOT EXISTS idx_words_level_de ON words(level, de)",
+    # Latest plan per user (ORDER BY id DESC LIMIT 1).
+    "CREATE INDEX IF NOT EXISTS idx_daily_plans_user_id ON daily_plans(user_id, id)",
+    # Per-user results snapshot.
+    "CREATE INDEX IF NOT EXISTS idx_event_logs_user_type ON event_logs(user_id, event_type, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_quiz_results_user_created ON quiz_results(user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_user_submissions_user_created ON user_submissions(user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_grammar_progress_user_level ON grammar_progress(user_id, level)",
+    "CREATE INDEX IF NOT EXISTS idx_user_profile_created_at ON user_profile(created_at)",
+]
+
+
+def upgrade(cursor, backend: str):
+    for stmt in INDEXES:
+        cursor.execute(stmt)
+    if backend == "sqlite":
+        cursor.execute("ANALYZE")
@@ -0,0 +1,16 @@
+"""Integer word_id for vocabulary mistakes so joins with words can use the primary key."""
+from database.migrations import add_column_if_missing
+
+
+def upgrade(cursor, backend: str):
+    add_column_if_missing(cursor, backend, "user_mistakes", "word_id", "BIGINT" if backend == "postgres" else "INTEGER")
+    if backend == "postgres":
+        numeric_item = "item_id ~ '^[0-9]+$'"
+        cast = "CAST(item_id AS BIGINT)"
+    else:
+        numeric_item = "item_id <> '' AND item_id NOT GLOB '*[^0-9]*'"
+        cast = "CAST(item_id AS INTEGER)"
+    cursor.execute(
+        f"UPDATE user_mistakes SET word_id = {cast} "
+        f"WHERE module = 'vocab' AND word_id IS NULL AND {numeric_item}"
+    )
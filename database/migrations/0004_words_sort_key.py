@@ -0,0 +1,24 @@
+"""Normalized dictionary sort key on words (article stripped, umlauts folded)."""
+from database.migrations import add_column_if_missing
+from utils.text_folding import word_sort_key
+
+_BACKFILL_BATCH = 1000
+
+
+def upgrade(cursor, backend: str):
+    add_column_if_missing(cursor, backend, "words", "sort_key", "TEXT")
+    last_id = 0
+    while True:
+        cursor.execute(
+            "SELECT id, de FROM words WHERE id > ? AND sort_key IS NULL ORDER BY id LIMIT ?",
+            (last_id, _BACKFILL_BATCH),
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        cursor.executemany(
+            "UPDATE words SET sort_key = ? WHERE id = ?",
+            [(word_sort_key(row[1]), row[0]) for row in rows],
+        )
+        last_id = rows[-1][0]
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_words_level_sort_key ON words(level, sort_key, id)")
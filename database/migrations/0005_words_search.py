@@ -0,0 +1,68 @@
+"""
+Folded search columns on words plus a full-text index over them:
+an external-content FTS5 table kept in sync by triggers on SQLite,
+trigram GIN indexes on Postgres.
+"""
+from database.migrations import add_column_if_missing
+from utils.text_folding import search_text, word_search_key
+
+_BACKFILL_BATCH = 1000
+
+_SQLITE_FTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS words_fts USING fts5(
+        search_de, search_uz,
+        content='words', content_rowid='id',
+        tokenize="unicode61 remove_diacritics 2"
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS words_fts_ai AFTER INSERT ON words BEGIN
+        INSERT INTO words_fts(rowid, search_de, search_uz) VALUES (new.id, new.search_de, new.search_uz);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS words_fts_ad AFTER DELETE ON words BEGIN
+        INSERT INTO words_fts(words_fts, rowid, search_de, search_uz) VALUES ('delete', old.id, old.search_de, old.search_uz);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS words_fts_au AFTER UPDATE OF search_de, search_uz ON words BEGIN
+        INSERT INTO words_fts(words_fts, rowid, search_de, search_uz) VALUES ('delete', old.id, old.search_de, old.search_uz);
+        INSERT INTO words_fts(rowid, search_de, search_uz) VALUES (new.id, new.search_de, new.search_uz);
+    END
+    """,
+]
+
+_POSTGRES_TRGM = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_words_search_de_trgm ON words USING gin (search_de gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_words_search_uz_trgm ON words USING gin (search_uz gin_trgm_ops)",
+]
+
+
+def upgrade(cursor, backend: str):
+    add_column_if_missing(cursor, backend, "words", "search_de", "TEXT")
+    add_column_if_missing(cursor, backend, "words", "search_uz", "TEXT")
+    last_id = 0
+    while True:
+        cursor.execute(
+            "SELECT id, de, uz FROM words WHERE id > ? AND search_de IS NULL ORDER BY id LIMIT ?",
+            (last_id, _BACKFILL_BATCH),
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        cursor.executemany(
+            "UPDATE words SET search_de = ?, search_uz = ? WHERE id = ?",
+            [(word_search_key(row[1]), search_text(row[2]), row[0]) for row in rows],
+        )
+        last_id = rows[-1][0]
+
+    if backend == "postgres":
+        for statement in _POSTGRES_TRGM:
+            cursor.execute(statement)
+        return
+    for statement in _SQLITE_FTS:
+        cursor.execute(statement)
+    cursor.execute("INSERT INTO words_fts(words_fts) VALUES ('rebuild')")
@@ -0,0 +1,101 @@
+"""
+Incrementally maintained aggregates for /admin_stats: per-day activity,
+the (day, user) set behind the active-user count, weak-item scores and
+named counters. Backfilled once from the raw tables.
+"""
+
+
+def upgrade(cursor, backend: str):
+    is_pg = backend == "postgres"
+    big_int = "BIGINT" if is_pg else "INTEGER"
+    # Days are UTC dates as 'YYYY-MM-DD', like the stored CURRENT_TIMESTAMP values.
+    day_of = (lambda col: f"to_char({col}, 'YYYY-MM-DD')") if is_pg else (lambda col: f"date({col})")
+
+    statements = [
+        """
+        CREATE TABLE IF NOT EXISTS daily_activity (
+            day TEXT PRIMARY KEY,
+            active_users INTEGER NOT NULL DEFAULT 0,
+            new_users INTEGER NOT NULL DEFAULT 0,
+            completions INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS daily_active_users (
+            day TEXT NOT NULL,
+            user_id {big_int} NOT NULL,
+            PRIMARY KEY (day, user_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS weak_item_counts (
+            item_id TEXT PRIMARY KEY,
+            score INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_weak_item_counts_score ON weak_item_counts(score)",
+        f"""
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            name TEXT PRIMARY KEY,
+            value {big_int} NOT NULL DEFAULT 0
+        )
+        """,
+    ]
+    for statement in statements:
+        cursor.execute(statement)
+
+    # WHERE clauses keep SQLite from parsing ON CONFLICT as part of the SELECT.
+    cursor.execute(
+        f"""
+        INSERT INTO daily_active_users (day, user_id)
+        SELECT DISTINCT {day_of('created_at')}, user_id FROM navigation_logs
+        WHERE created_at IS NOT NULL AND user_id <> 0
+        ON CONFLICT DO NOTHING
+        """
+    )
+    cursor.execute(
+        """
+        INSERT INTO daily_activity (day, active_users)
+        SELECT day, COUNT(*) FROM daily_active_users WHERE day IS NOT NULL GROUP BY day
+        ON CONFLICT(day) DO UPDATE SET active_users = excluded.active_users
+        """
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO daily_activity (day, new_users)
+        SELECT {day_of('created_at')}, COUNT(*) FROM user_profile
+        WHERE created_at IS NOT NULL GROUP BY {day_of('created_at')}
+        ON CONFLICT(day) DO UPDATE SET new_users = excluded.new_users
+        """
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO daily_activity (day, completions)
+        SELECT {day_of('created_at')}, COUNT(*) FROM event_logs
+        WHERE event_type = 'daily_lesson_completed' AND created_at IS NOT NULL
+        GROUP BY {day_of('created_at')}
+        ON CONFLICT(day) DO UPDATE SET completions = excluded.completions
+        """
+    )
+    cursor.execute(
+        """
+        INSERT INTO weak_item_counts (item_id, score)
+        SELECT item_id, SUM(mistake_count) FROM user_mistakes
+        WHERE item_id IS NOT NULL GROUP BY item_id
+        ON CONFLICT(item_id) DO UPDATE SET score = excluded.score
+        """
+    )
+    cursor.execute(
+        """
+        INSERT INTO stats_counters (name, value)
+        SELECT 'user_mistakes', COUNT(*) FROM user_mistakes WHERE 1 = 1
+        ON CONFLICT(name) DO UPDATE SET value = excluded.value
+        """
+    )
+    cursor.execute(
+        """
+        INSERT INTO stats_counters (name, value)
+        SELECT 'user_profile', COUNT(*) FROM user_profile WHERE 1 = 1
+        ON CONFLICT(name) DO UPDATE SET value = excluded.value
+        """
+    )
@@ -0,0 +1,85 @@
+"""
+Per-user results summary behind the Natijalar screen: counters, running
+percentage sums, best score and last timestamps, one row per user.
+Backfilled once from quiz_results, event_logs and user_submissions.
+"""
+
+SUMMARY_SOURCES = """
+    SELECT user_id FROM quiz_results WHERE user_id IS NOT NULL
+    UNION
+    SELECT user_id FROM event_logs
+    WHERE user_id IS NOT NULL AND (
+        event_type = 'daily_lesson_completed'
+        OR substr(LOWER(event_type), 1, 23) = 'writing_task_completed_'
+        OR substr(LOWER(event_type), 1, 24) = 'speaking_task_completed_'
+    )
+    UNION
+    SELECT user_id FROM user_submissions
+    WHERE user_id IS NOT NULL AND LOWER(module) IN ('writing', 'schreiben', 'speaking', 'sprechen')
+"""
+
+
+def upgrade(cursor, backend: str):
+    big_int = "BIGINT" if backend == "postgres" else "INTEGER"
+
+    cursor.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS user_stats_summary (
+            user_id {big_int} PRIMARY KEY,
+            daily_completed INTEGER NOT NULL DEFAULT 0,
+            daily_last_at TIMESTAMP,
+            quiz_attempts INTEGER NOT NULL DEFAULT 0,
+            quiz_pct_sum REAL NOT NULL DEFAULT 0,
+            quiz_pct_count INTEGER NOT NULL DEFAULT 0,
+            quiz_best_pct REAL NOT NULL DEFAULT 0,
+            quiz_latest_score INTEGER,
+            quiz_latest_total INTEGER,
+            quiz_latest_at TIMESTAMP,
+            writing_submissions INTEGER NOT NULL DEFAULT 0,
+            writing_submission_last_at TIMESTAMP,
+            writing_events INTEGER NOT NULL DEFAULT 0,
+            writing_event_last_at TIMESTAMP,
+            speaking_submissions INTEGER NOT NULL DEFAULT 0,
+            speaking_submission_last_at TIMESTAMP,
+            speaking_events INTEGER NOT NULL DEFAULT 0,
+            speaking_event_last_at TIMESTAMP
+        )
+        """
+    )
+
+    cursor.execute(
+        f"INSERT INTO user_stats_summary (user_id) SELECT user_id FROM ({SUMMARY_SOURCES}) src "
+        "WHERE 1 = 1 ON CONFLICT(user_id) DO NOTHING"
+    )
+
+    events = "FROM event_logs e WHERE e.user_id = user_stats_summary.user_id"
+    quizzes = "FROM quiz_results q WHERE q.user_id = user_stats_summary.user_id"
+    submissions = "FROM user_submissions s WHERE s.user_id = user_stats_summary.user_id"
+    daily_match = "e.event_type = 'daily_lesson_completed'"
+    writing_event_match = "substr(LOWER(e.event_type), 1, 23) = 'writing_task_completed_'"
+    speaking_event_match = "substr(LOWER(e.event_type), 1, 24) = 'speaking_task_completed_'"
+    writing_submission_match = "LOWER(s.module) IN ('writing', 'schreiben')"
+    speaking_submission_match = "LOWER(s.module) IN ('speaking', 'sprechen')"
+    latest_quiz = f"{quizzes} ORDER BY q.created_at DESC, q.id DESC LIMIT 1"
+    cursor.execute(
+        f"""
+        UPDATE user_stats_summary SET
+            daily_completed = (SELECT COUNT(*) {events} AND {daily_match}),
+            daily_last_at = (SELECT MAX(e.created_at) {events} AND {daily_match}),
+            quiz_attempts = (SELECT COUNT(*) {quizzes}),
+            quiz_pct_sum = COALESCE((SELECT SUM(q.score * 100.0 / q.total) {quizzes} AND q.total > 0), 0),
+            quiz_pct_count = (SELECT COUNT(*) {quizzes} AND q.total > 0),
+            quiz_best_pct = COALESCE((SELECT MAX(q.score * 100.0 / q.total) {quizzes} AND q.total > 0), 0),
+            quiz_latest_score = (SELECT COALESCE(q.score, 0) {latest_quiz}),
+            quiz_latest_total = (SELECT COALESCE(q.total, 0) {latest_quiz}),
+            quiz_latest_at = (SELECT q.created_at {latest_quiz}),
+            writing_submissions = (SELECT COUNT(*) {submissions} AND {writing_submission_match}),
+            writing_submission_last_at = (SELECT MAX(s.created_at) {submissions} AND {writing_submission_match}),
+            writing_events = (SELECT COUNT(*) {events} AND {writing_event_match}),
+            writing_event_last_at = (SELECT MAX(e.created_at) {events} AND {writing_event_match}),
+            speaking_submissions = (SELECT COUNT(*) {submissions} AND {speaking_submission_match}),
+            speaking_submission_last_at = (SELECT MAX(s.created_at) {submissions} AND {speaking_submission_match}),
+            speaking_events = (SELECT COUNT(*) {events} AND {speaking_event_match}),
+            speaking_event_last_at = (SELECT MAX(e.created_at) {events} AND {speaking_event_match})
+        """
+    )
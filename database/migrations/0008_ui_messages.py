@@ -0,0 +1,31 @@
+"""
+One row per user for the two tracked UI messages (main menu and the active
+screen), replacing the two ui_state key/value rows read and written on every
+screen change. Backfilled from ui_state.
+"""
+
+
+def upgrade(cursor, backend: str):
+    big_int = "BIGINT" if backend == "postgres" else "INTEGER"
+    cursor.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS ui_messages (
+            user_id {big_int} PRIMARY KEY,
+            main_menu_msg_id {big_int},
+            active_msg_id {big_int},
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO ui_messages (user_id, main_menu_msg_id, active_msg_id)
+        SELECT user_id,
+               CAST(MAX(CASE WHEN key = 'main_menu_msg_id' THEN val END) AS {big_int}),
+               CAST(MAX(CASE WHEN key = 'active_ui_msg_id' THEN val END) AS {big_int})
+        FROM ui_state
+        WHERE user_id IS NOT NULL
+        GROUP BY user_id
+        ON CONFLICT(user_id) DO NOTHING
+        """
+    )
@@ -0,0 +1,11 @@
+"""
+(notification_time, user_id) index so the daily enqueue can walk one time
+slot in user_id order, chunk by chunk, without sorting.
+"""
+
+
+def upgrade(cursor, backend: str):
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_user_profile_notification_slot "
+        "ON user_profile(notification_time, user_id)"
+    )
@@ -0,0 +1,10 @@
+"""
+broadcast_unsubscribed_at on user_profile: set when Telegram reports the
+chat as blocked or gone, so scheduled broadcasts skip the user until they
+come back with /start.
+"""
+from database.migrations import add_column_if_missing
+
+
+def upgrade(cursor, backend: str):
+    add_column_if_missing(cursor, backend, "user_profile", "broadcast_unsubscribed_at", "TIMESTAMP")
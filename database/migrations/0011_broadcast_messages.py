@@ -0,0 +1,24 @@
+"""
+Broadcast content stored once per slot in broadcast_messages, referenced by
+broadcast_jobs.message_id, instead of a payload copy in every job row. Jobs
+enqueued before this keep their inline payload and are still sent from it.
+"""
+from database.migrations import add_column_if_missing
+
+
+def upgrade(cursor, backend: str):
+    is_pg = backend == "postgres"
+    big_int = "BIGINT" if is_pg else "INTEGER"
+    serial_pk = "BIGSERIAL PRIMARY KEY" if is_pg else "INTEGER PRIMARY KEY AUTOINCREMENT"
+    cursor.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS broadcast_messages (
+            id {serial_pk},
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            content_key TEXT UNIQUE,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    add_column_if_missing(cursor, backend, "broadcast_jobs", "message_id", big_int)
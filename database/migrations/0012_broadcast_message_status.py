@@ -0,0 +1,12 @@
+"""
+Cancellable broadcasts: a status on broadcast_messages, and a
+(message_id, status) index for per-broadcast progress and bulk cancel/resume.
+"""
+from database.migrations import add_column_if_missing
+
+
+def upgrade(cursor, backend: str):
+    add_column_if_missing(cursor, backend, "broadcast_messages", "status", "TEXT NOT NULL DEFAULT 'active'")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_broadcast_jobs_message ON broadcast_jobs(message_id, status)"
+    )
@@ -0,0 +1,138 @@
+"""
+Versioned schema migrations.
+
+Each module in this package named ``NNNN_<name>.py`` defines
+``upgrade(cursor, backend)`` and is applied exactly once, inside its own
+transaction, in version order. Applied versions are recorded in
+``schema_migrations``.
+"""
+import importlib
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from database.connection import get_connection, is_postgres_backend
+
+_MIGRATION_FILE_RE = re.compile(r"^(\d{4})_(\w+)\.py$")
+# Arbitrary constant shared by all replicas applying migrations on Postgres.
+_PG_MIGRATION_LOCK_ID = 48151623
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[Any, str], None]
+
+
+def discover_migrations() -> list[Migration]:
+    migrations = []
+    for path in sorted(Path(__file__).parent.glob("*.py")):
+        match = _MIGRATION_FILE_RE.match(path.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{__name__}.{path.stem}")
+        migrations.append(Migration(int(match.group(1)), match.group(2), module.upgrade))
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return migrations
+
+
+def column_exists(cursor, backend: str, table: str, column: str) -> bool:
+    if backend == "postgres":
+        cursor.execute(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = ? AND column_name = ?",
+            (table, column),
+        )
+        return cursor.fetchone() is not None
+    cursor.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cursor.fetchall())
+
+
+def add_column_if_missing(cursor, backend: str, table: str, column: str, definition: str):
+    if not column_exists(cursor, backend, table, column):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _ensure_migrations_table(cursor):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def get_schema_version() -> int:
+    """Highest applied version, or 0 when the database has never been migrated."""
+    conn = get_connection(readonly=True)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT MAX(version) FROM schema_migrations")
+        row = cursor.fetchone()
+        return int((row[0] if row else 0) or 0)
+    except Exception:
+        return 0
+    finally:
+        conn.close()
+
+
+def _applied_versions(cursor) -> set[int]:
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {int(row[0]) for row in cursor.fetchall()}
+
+
+def _apply_one(migration: Migration, backend: str) -> bool:
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        if backend == "postgres":
+            cursor.execute("SELECT pg_advisory_xact_lock(?)", (_PG_MIGRATION_LOCK_ID,))
+        else:
+            # sqlite3 only opens implicit transactions before DML; DDL needs an explicit one.
+            cursor.execute("BEGIN IMMEDIATE")
+        _ensure_migrations_table(cursor)
+        if migration.version in _applied_versions(cursor):
+            conn.rollback()
+            return False
+        migration.upgrade(cursor, backend)
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, name) VALUES (?, ?)",
+            (migration.version, migration.name),
+        )
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def apply_migrations() -> int:
+    """Applies pending migrations; returns how many were applied."""
+    migrations = discover_migrations()
+    if not migrations:
+        return 0
+    latest = migrations[-1].version
+    if get_schema_version() >= latest:
+        return 0
+
+    backend = "postgres" if is_postgres_backend() else "sqlite"
+    applied = 0
+    for migration in migrations:
+        try:
+            if _apply_one(migration, backend):
+                applied += 1
+                logging.info("Applied migration %04d_%s", migration.version, migration.name)
+        except Exception as exc:
+            logging.exception("Migration %04d_%s failed: %s", migration.version, migration.name, exc)
+            raise
+    return applied
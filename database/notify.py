@@ -0,0 +1,119 @@
+"""
+Cross-instance notifications over Postgres LISTEN/NOTIFY.
+
+notify() queues a message inside the caller's transaction, so other
+instances only hear about writes that were committed. One listener thread
+per process holds a dedicated autocommit connection and dispatches payloads
+to the callbacks registered per channel. After a (re)connect, messages sent
+while it was away are lost, so the reset callbacks run and caches drop
+everything. On SQLite all of this is a no-op.
+"""
+import logging
+import threading
+import uuid
+from typing import Callable
+
+from core.config import settings
+from database.connection import is_postgres_backend
+
+# Lets an instance recognise (and skip) its own notifications.
+INSTANCE_ID = uuid.uuid4().hex[:12]
+
+_RECONNECT_DELAY_SECONDS = 5.0
+_POLL_TIMEOUT_SECONDS = 1.0
+
+
+def notify(cursor, channel: str, payload: str):
+    if is_postgres_backend():
+        cursor.execute("SELECT pg_notify(?, ?)", (channel, f"{INSTANCE_ID}|{payload}"))
+
+
+def split_payload(raw: str) -> tuple[str, str]:
+    """Returns (sender instance id, payload)."""
+    sender, _, payload = raw.partition("|")
+    return sender, payload
+
+
+class NotificationListener:
+    def __init__(self):
+        self._handlers: dict[str, list[Callable[[str], None]]] = {}
+        self._reset_handlers: list[Callable[[], None]] = []
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self.connected = False
+        self.received = 0
+        self.reconnects = 0
+
+    def subscribe(self, channel: str, handler: Callable[[str], None], on_reset: Callable[[], None] | None = None):
+        """handler gets payloads sent by other instances; on_reset runs after every (re)connect."""
+        self._handlers.setdefault(channel, []).append(handler)
+        if on_reset is not None:
+            self._reset_handlers.append(on_reset)
+
+    def start(self):
+        if not is_postgres_backend() or not self._handlers:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="pg-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        import psycopg  # type: ignore[reportMissingImports]
+
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(settings.database_url, autocommit=True) as conn:
+                    for channel in self._handlers:
+                        conn.execute(f'LISTEN "{channel}"')
+                    self.connected = True
+                    self._reset()
+                    while not self._stop.is_set():
+                        for note in conn.notifies(timeout=_POLL_TIMEOUT_SECONDS):
+                            self._dispatch(note.channel, note.payload)
+            except Exception as exc:
+                logging.error("Notification listener disconnected: %s", exc)
+            self.connected = False
+            if not self._stop.is_set():
+                self.reconnects += 1
+                self._stop.wait(_RECONNECT_DELAY_SECONDS)
+
+    def _reset(self):
+        for handler in self._reset_handlers:
+            try:
+                handler()
+            except Exception as exc:
+                logging.error("Notification reset handler failed: %s", exc)
+
+    def _dispatch(self, channel: str, raw: str):
+        sender, payload = split_payload(raw)
+        if sender == INSTANCE_ID:
+            return
+        self.received += 1
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(payload)
+            except Exception as exc:
+                logging.error("Notification handler for %s failed: %s", channel, exc)
+
+
+_LISTENER = NotificationListener()
+
+
+def subscribe(channel: str, handler: Callable[[str], None], on_reset: Callable[[], None] | None = None):
+    _LISTENER.subscribe(channel, handler, on_reset)
+
+
+def start_listener():
+    _LISTENER.start()
+
+
+def stop_listener():
+    _LISTENER.stop()
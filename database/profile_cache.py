@@ -0,0 +1,124 @@
+"""
+Bounded, TTL'd in-process cache of user_profile rows keyed by user_id.
+
+Profile writes in user_repository invalidate the entry, again when their
+unit of work commits or rolls back (a concurrent read may have cached the old
+row in between, or this update may have cached rows that never commit), and
+on Postgres on the other instances via NOTIFY. The TTL bounds anything those
+miss, such as manual SQL edits.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from core.config import settings
+from database.connection import current_unit_of_work
+from database.notify import subscribe
+
+PROFILE_INVALIDATE_CHANNEL = "user_profile_invalidate"
+
+
+class ProfileCache:
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max(0, max_size)
+        self.ttl = max(0.0, ttl_seconds)
+        self._entries: OrderedDict[int, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a slow read cannot cache a stale row
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, user_id: int) -> dict[str, Any] | None:
+        """A copy of the cached profile, or None when missing or expired."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, user_id: int, profile: dict[str, Any], generation: int):
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[user_id] = (time.monotonic() + self.ttl, dict(profile))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self.generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "capacity": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0.0,
+        }
+
+
+_CACHE = ProfileCache(settings.profile_cache_size, settings.profile_cache_ttl_seconds)
+
+
+def _on_remote_write(payload: str):
+    try:
+        _CACHE.invalidate(int(payload))
+    except ValueError:
+        _CACHE.clear()
+
+
+subscribe(PROFILE_INVALIDATE_CHANNEL, _on_remote_write, on_reset=lambda: _CACHE.clear())
+
+
+def get_cached_profile(user_id: int) -> dict[str, Any] | None:
+    return _CACHE.get(user_id)
+
+
+def profile_cache_generation() -> int:
+    return _CACHE.generation
+
+
+def cache_profile(user_id: int, profile: dict[str, Any], generation: int):
+    _CACHE.put(user_id, profile, generation)
+
+
+def forget_profile_on_rollback(user_id: int):
+    """Drops the cached profile if the current unit of work rolls back."""
+    unit = current_unit_of_work()
+    if unit is not None:
+        unit.on_rollback(lambda: _CACHE.invalidate(user_id))
+
+
+def invalidate_profile(user_id: int):
+    _CACHE.invalidate(user_id)
+    unit = current_unit_of_work()
+    if unit is not None:
+        unit.on_commit(lambda: _CACHE.invalidate(user_id))
+        unit.on_rollback(lambda: _CACHE.invalidate(user_id))
+
+
+def get_profile_cache_stats() -> dict[str, Any]:
+    return _CACHE.stats()
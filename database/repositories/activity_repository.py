@@ -0,0 +1,174 @@
+"""
+Daily rollups (daily_activity, daily_active_users), weak-item scores,
+named counters and the per-user user_stats_summary. The apply/bump helpers
+take the caller's cursor so the aggregates change in the same transaction
+as the rows they summarize.
+"""
+from database.connection import get_connection
+import datetime
+import logging
+
+DAILY_LESSON_COMPLETED_EVENT = "daily_lesson_completed"
+USER_MISTAKES_COUNTER = "user_mistakes"
+USER_PROFILE_COUNTER = "user_profile"
+WRITING_TASK_EVENT_PREFIX = "writing_task_completed_"
+SPEAKING_TASK_EVENT_PREFIX = "speaking_task_completed_"
+WRITING_MODULES = ("writing", "schreiben")
+SPEAKING_MODULES = ("speaking", "sprechen")
+
+# Counter column -> timestamp column it stamps with CURRENT_TIMESTAMP
+_SUMMARY_EVENT_COLUMNS = {
+    "daily_completed": "daily_last_at",
+    "writing_events": "writing_event_last_at",
+    "speaking_events": "speaking_event_last_at",
+    "writing_submissions": "writing_submission_last_at",
+    "speaking_submissions": "speaking_submission_last_at",
+}
+
+
+def utc_day(offset_days: int = 0) -> str:
+    day = datetime.datetime.now(datetime.timezone.utc).date() + datetime.timedelta(days=offset_days)
+    return day.isoformat()
+
+
+def _bump_daily_activity(cursor, day: str, active_users: int = 0, new_users: int = 0, completions: int = 0):
+    cursor.execute("""
+        INSERT INTO daily_activity (day, active_users, new_users, completions)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(day) DO UPDATE SET
+            active_users = daily_activity.active_users + excluded.active_users,
+            new_users = daily_activity.new_users + excluded.new_users,
+            completions = daily_activity.completions + excluded.completions
+    """, (day, active_users, new_users, completions))
+
+
+def apply_activity_rollups(cursor, navigation_rows=(), event_rows=()):
+    """
+    Folds telemetry rows (as written to navigation_logs / event_logs) into
+    today's daily_activity row. A user counts as active once per day.
+    """
+    day = utc_day()
+    newly_active = 0
+    for user_id in {row[0] for row in navigation_rows if row[0]}:
+        cursor.execute(
+            "INSERT INTO daily_active_users (day, user_id) VALUES (?, ?) ON CONFLICT DO NOTHING",
+            (day, user_id),
+        )
+        newly_active += max(cursor.rowcount, 0)
+    completions = sum(1 for row in event_rows if row[1] == DAILY_LESSON_COMPLETED_EVENT)
+    if newly_active or completions:
+        _bump_daily_activity(cursor, day, active_users=newly_active, completions=completions)
+
+    per_user: dict[int, dict[str, int]] = {}
+    for row in event_rows:
+        column = _summary_event_column(row[1])
+        if column and row[0]:
+            counts = per_user.setdefault(row[0], {})
+            counts[column] = counts.get(column, 0) + 1
+    for user_id, counts in per_user.items():
+        _bump_stats_summary(cursor, user_id, counts)
+
+
+def _summary_event_column(event_type) -> str | None:
+    if event_type == DAILY_LESSON_COMPLETED_EVENT:
+        return "daily_completed"
+    lowered = str(event_type or "").lower()
+    if lowered.startswith(WRITING_TASK_EVENT_PREFIX):
+        return "writing_events"
+    if lowered.startswith(SPEAKING_TASK_EVENT_PREFIX):
+        return "speaking_events"
+    return None
+
+
+def is_summary_event(event_type) -> bool:
+    """True for events counted in user_stats_summary; these are never buffered."""
+    return _summary_event_column(event_type) is not None
+
+
+def _bump_stats_summary(cursor, user_id: int, counts: dict[str, int]):
+    """Adds counts to user_stats_summary counters and stamps their *_last_at columns."""
+    columns = [column for column in _SUMMARY_EVENT_COLUMNS if counts.get(column)]
+    if not columns:
+        return
+    stamps = [_SUMMARY_EVENT_COLUMNS[column] for column in columns]
+    updates = [f"{c} = user_stats_summary.{c} + excluded.{c}" for c in columns]
+    updates += [f"{c} = excluded.{c}" for c in stamps]
+    cursor.execute(f"""
+        INSERT INTO user_stats_summary (user_id, {', '.join(columns + stamps)})
+        VALUES (?, {', '.join(['?'] * len(columns) + ['CURRENT_TIMESTAMP'] * len(stamps))})
+        ON CONFLICT(user_id) DO UPDATE SET {', '.join(updates)}
+    """, (user_id, *(counts[column] for column in columns)))
+
+
+def record_submission_summary(cursor, user_id: int, module: str | None):
+    lowered = str(module or "").lower()
+    if lowered in WRITING_MODULES:
+        _bump_stats_summary(cursor, user_id, {"writing_submissions": 1})
+    elif lowered in SPEAKING_MODULES:
+        _bump_stats_summary(cursor, user_id, {"speaking_submissions": 1})
+
+
+def record_quiz_summary(cursor, user_id: int, score: int, total: int):
+    """One more attempt: running percentage sum/count, best and latest result."""
+    score, total = int(score or 0), int(total or 0)
+    pct = (score / total) * 100.0 if total > 0 else 0.0
+    counted = 1 if total > 0 else 0
+    cursor.execute("""
+        INSERT INTO user_stats_summary (
+            user_id, quiz_attempts, quiz_pct_sum, quiz_pct_count, quiz_best_pct,
+            quiz_latest_score, quiz_latest_total, quiz_latest_at
+        )
+        VALUES (?, 1, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(user_id) DO UPDATE SET
+            quiz_attempts = user_stats_summary.quiz_attempts + 1,
+            quiz_pct_sum = user_stats_summary.quiz_pct_sum + excluded.quiz_pct_sum,
+            quiz_pct_count = user_stats_summary.quiz_pct_count + excluded.quiz_pct_count,
+            quiz_best_pct = CASE
+                WHEN excluded.quiz_best_pct > user_stats_summary.quiz_best_pct THEN excluded.quiz_best_pct
+                ELSE user_stats_summary.quiz_best_pct
+            END,
+            quiz_latest_score = excluded.quiz_latest_score,
+            quiz_latest_total = excluded.quiz_latest_total,
+            quiz_latest_at = excluded.quiz_latest_at
+    """, (user_id, pct * counted, counted, pct * counted, score, total))
+
+
+def record_new_user(cursor):
+    _bump_daily_activity(cursor, utc_day(), new_users=1)
+    bump_counter(cursor, USER_PROFILE_COUNTER)
+
+
+def bump_weak_item(cursor, item_id: str, amount: int = 1):
+    cursor.execute("""
+        INSERT INTO weak_item_counts (item_id, score) VALUES (?, ?)
+        ON CONFLICT(item_id) DO UPDATE SET score = weak_item_counts.score + excluded.score
+    """, (item_id, amount))
+
+
+def bump_counter(cursor, name: str, delta: int = 1):
+    cursor.execute("""
+        INSERT INTO stats_counters (name, value) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET value = stats_counters.value + excluded.value
+    """, (name, delta))
+
+
+def get_counter(cursor, name: str) -> int:
+    cursor.execute("SELECT value FROM stats_counters WHERE name = ?", (name,))
+    row = cursor.fetchone()
+    return int(row[0]) if row else 0
+
+
+def prune_daily_active_users(keep_days: int = 8) -> int:
+    """Drops per-user activity older than keep_days; the daily totals stay."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM daily_active_users WHERE day < ?", (utc_day(-keep_days),))
+        deleted = max(cursor.rowcount, 0)
+        conn.commit()
+        return deleted
+    except Exception as e:
+        logging.error(f"Error pruning daily_active_users: {e}")
+        return 0
+    finally:
+        conn.close()
@@ -1,62 +1,38 @@
 from database.connection import get_connection
+from database.repositories.activity_repository import (
+    USER_MISTAKES_COUNTER,
+    USER_PROFILE_COUNTER,
+    get_counter,
+    utc_day,
+)
 import logging
-import datetime
-from database.connection import is_postgres_backend
 
 def get_admin_stats_snapshot():
-    conn = get_connection()
+    """
+    Reads the maintained rollups only: the last 8 days of daily_activity (by
+    primary-key range), the top weak_item_counts rows and stats_counters.
+    """
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
     stats = {}
     try:
-        cursor.execute("SELECT COUNT(*) FROM user_profile")
-        stats['total_users'] = cursor.fetchone()[0]
-        if is_postgres_backend():
-            cursor.execute(
-                "SELECT COUNT(*) FROM user_profile WHERE DATE(created_at) = CURRENT_DATE"
-            )
-            stats['new_users_today'] = cursor.fetchone()[0]
-
-            cursor.execute(
-                "SELECT COUNT(DISTINCT user_id) FROM navigation_logs WHERE DATE(created_at) = CURRENT_DATE"
-            )
-            stats['active_users_today'] = cursor.fetchone()[0]
+        stats['total_users'] = get_counter(cursor, USER_PROFILE_COUNTER)
 
-            cursor.execute(
-                "SELECT COUNT(*) FROM user_progress WHERE module_name = 'daily_lesson' "
-                "AND completion_status = 1 AND DATE(last_active) = CURRENT_DATE"
-            )
-            stats['daily_completions_today'] = cursor.fetchone()[0]
-
-            cursor.execute(
-                "SELECT COUNT(*) FROM user_progress WHERE module_name = 'daily_lesson' "
-                "AND completion_status = 1 AND DATE(last_active) >= (CURRENT_DATE - INTERVAL '7 days')"
-            )
-            stats['daily_completions_last_7_days'] = cursor.fetchone()[0]
-        else:
-            cursor.execute("SELECT COUNT(*) FROM user_profile WHERE date(created_at) = date('now', 'localtime')")
-            stats['new_users_today'] = cursor.fetchone()[0]
-
-            today = datetime.date.today().isoformat()
-            cursor.execute("SELECT COUNT(DISTINCT user_id) FROM navigation_logs WHERE date(created_at) = ?", (today,))
-            stats['active_users_today'] = cursor.fetchone()[0]
+        today = utc_day()
+        cursor.execute(
+            "SELECT day, active_users, new_users, completions FROM daily_activity WHERE day >= ? AND day <= ?",
+            (utc_day(-7), today),
+        )
+        days = {row[0]: row for row in cursor.fetchall()}
+        today_row = days.get(today)
+        stats['new_users_today'] = today_row[2] if today_row else 0
+        stats['active_users_today'] = today_row[1] if today_row else 0
+        stats['daily_completions_today'] = today_row[3] if today_row else 0
+        stats['daily_completions_last_7_days'] = sum(row[3] for row in days.values())
 
-            cursor.execute("SELECT COUNT(*) FROM user_progress WHERE module_name = 'daily_lesson' AND completion_status = 1 AND date(last_active) = ?", (today,))
-            stats['daily_completions_today'] = cursor.fetchone()[0]
+        stats['total_mistakes_logged'] = get_counter(cursor, USER_MISTAKES_COUNTER)
 
-            last_7_days = (datetime.date.today() - datetime.timedelta(days=7)).isoformat()
-            cursor.execute("SELECT COUNT(*) FROM user_progress WHERE module_name = 'daily_lesson' AND completion_status = 1 AND date(last_active) >= ?", (last_7_days,))
-            stats['daily_completions_last_7_days'] = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM user_mistakes")
-        stats['total_mistakes_logged'] = cursor.fetchone()[0]
-        
-        cursor.execute("""
-            SELECT item_id, SUM(mistake_count) as score 
-            FROM user_mistakes 
-            GROUP BY item_id 
-            ORDER BY score DESC 
-            LIMIT 5
-        """)
+        cursor.execute("SELECT item_id, score FROM weak_item_counts ORDER BY score DESC LIMIT 5")
         stats['top_weak_topics'] = [{"topic_id": row[0], "score": row[1]} for row in cursor.fetchall()]
         
     except Exception as e:
@@ -66,7 +42,7 @@ def get_admin_stats_snapshot():
     return stats
 
 def get_users_count() -> int:
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
     try:
         cursor.execute("SELECT COUNT(*) FROM user_profile")
@@ -79,18 +55,20 @@ def get_users_count() -> int:
         conn.close()
 
 def get_last_event_timestamp(user_id: int | None = None):
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
-    if user_id:
-        cursor.execute("SELECT created_at FROM event_logs WHERE user_id = ? ORDER BY created_at DESC LIMIT 1", (user_id,))
-    else:
-        cursor.execute("SELECT created_at FROM event_logs ORDER BY created_at DESC LIMIT 1")
-    row = cursor.fetchone()
-    conn.close()
+    try:
+        if user_id:
+            cursor.execute("SELECT created_at FROM event_logs WHERE user_id = ? ORDER BY created_at DESC LIMIT 1", (user_id,))
+        else:
+            cursor.execute("SELECT created_at FROM event_logs ORDER BY created_at DESC LIMIT 1")
+        row = cursor.fetchone()
+    finally:
+        conn.close()
     return row[0] if row else None
 
 def get_recent_ops_errors(limit: int = 10):
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
     try:
         cursor.execute(
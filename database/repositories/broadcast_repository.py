@@ -1,15 +1,96 @@
 import datetime
 import json
 import logging
-from typing import Any
+from typing import Any, Callable
 
-from database.connection import get_connection, is_postgres_backend
+from database.connection import current_unit_of_work, get_connection, is_postgres_backend
+from database.notify import notify
+from database.profile_cache import PROFILE_INVALIDATE_CHANNEL, invalidate_profile
+from database.repositories.activity_repository import bump_counter
+
+BROADCAST_QUEUE_CHANNEL = "broadcast_jobs_enqueued"
+BROADCAST_JOB_STATUSES = ("pending", "processing", "sent", "failed", "cancelled")
+# stats_counters name per job status, kept current by every status change here
+BROADCAST_STATUS_COUNTER = "broadcast_jobs:{}"
+
+# Ids per "WHERE id IN (...)" statement, under SQLite's variable limit
+_ACK_CHUNK = 500
+_ENQUEUE_LISTENERS: list[Callable[[], None]] = []
+
+
+def on_jobs_enqueued(callback: Callable[[], None]):
+    """
+    Registers callback to run after jobs are committed to the queue, from
+    whichever thread enqueued them. Other instances hear about it through
+    BROADCAST_QUEUE_CHANNEL.
+    """
+    _ENQUEUE_LISTENERS.append(callback)
+
+
+def _run_enqueue_listeners():
+    for callback in list(_ENQUEUE_LISTENERS):
+        try:
+            callback()
+        except Exception as exc:
+            logging.error("Broadcast enqueue listener failed: %s", exc)
+
+
+def _after_enqueue_commit():
+    unit = current_unit_of_work()
+    if unit is not None:
+        unit.on_commit(_run_enqueue_listeners)
+    else:
+        _run_enqueue_listeners()
+
+
+def _count_status(cursor, status: str, delta: int):
+    if delta:
+        bump_counter(cursor, BROADCAST_STATUS_COUNTER.format(status), delta)
+
+
+def _count_moves(cursor, prior: dict[str, int], to_status: str) -> int:
+    """Moves the counters of jobs that were in the prior statuses to to_status."""
+    moved = 0
+    for status, count in prior.items():
+        if status != to_status:
+            _count_status(cursor, status, -count)
+            moved += count
+    _count_status(cursor, to_status, moved)
+    return moved
+
+
+def _prior_statuses(cursor, job_ids: list[int]) -> dict[str, int]:
+    prior: dict[str, int] = {}
+    for start in range(0, len(job_ids), _ACK_CHUNK):
+        chunk = job_ids[start:start + _ACK_CHUNK]
+        cursor.execute(
+            f"SELECT status, COUNT(*) FROM broadcast_jobs WHERE id IN ({', '.join('?' for _ in chunk)}) GROUP BY status",
+            chunk,
+        )
+        for row in cursor.fetchall():
+            prior[str(row[0])] = prior.get(str(row[0]), 0) + int(row[1])
+    return prior
 
 
 def _utc_now_iso() -> str:
     return datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
 
 
+def _ensure_broadcast_message(cursor, kind: str, payload_json: str, slot_key: str) -> int:
+    """Id of the broadcast_messages row for (kind, slot_key), created on first use."""
+    content_key = f"{kind}:{slot_key}"
+    cursor.execute(
+        """
+        INSERT INTO broadcast_messages (kind, payload, content_key)
+        VALUES (?, ?, ?)
+        ON CONFLICT(content_key) DO NOTHING
+        """,
+        (kind, payload_json, content_key),
+    )
+    cursor.execute("SELECT id FROM broadcast_messages WHERE content_key = ?", (content_key,))
+    return int(cursor.fetchone()[0])
+
+
 def enqueue_broadcast_jobs(
     user_ids: list[int],
     kind: str,
@@ -24,28 +105,257 @@ def enqueue_broadcast_jobs(
     payload_json = json.dumps(payload, ensure_ascii=False)
     inserted = 0
     try:
+        message_id = _ensure_broadcast_message(cursor, kind, payload_json, slot_key)
         for user_id in user_ids:
             dedupe_key = f"{kind}:{slot_key}:{user_id}"
             cursor.execute(
                 """
                 INSERT INTO broadcast_jobs (
-                    user_id, kind, payload, status, attempts, available_at, dedupe_key
+                    user_id, kind, payload, message_id, status, attempts, available_at, dedupe_key
                 )
-                VALUES (?, ?, ?, 'pending', 0, CURRENT_TIMESTAMP, ?)
+                VALUES (?, ?, '', ?, 'pending', 0, CURRENT_TIMESTAMP, ?)
                 ON CONFLICT(dedupe_key) DO NOTHING
                 """,
-                (user_id, kind, payload_json, dedupe_key),
+                (user_id, kind, message_id, dedupe_key),
             )
             if int(getattr(cursor, "rowcount", 0) or 0) > 0:
                 inserted += 1
+        if inserted:
+            _count_status(cursor, "pending", inserted)
+            notify(cursor, BROADCAST_QUEUE_CHANNEL, "")
         conn.commit()
     except Exception as exc:
         logging.error("enqueue_broadcast_jobs failed: %s", exc)
+        return 0
     finally:
         conn.close()
+    if inserted:
+        _after_enqueue_commit()
     return inserted
 
 
+def _enqueue_audience_chunk(
+    cursor,
+    message_id: int,
+    kind: str,
+    content_key: str,
+    audience_sql: str,
+    audience_params: tuple,
+    after_user_id: int | None,
+    limit: int,
+) -> tuple[int, int | None]:
+    """
+    One INSERT ... SELECT of jobs for the next limit subscribed users with
+    user_id after after_user_id that match audience_sql; dedupe keys are
+    built in SQL. Returns (inserted, last user_id in the chunk or None).
+    """
+    lower = after_user_id if after_user_id is not None else -(2 ** 63)
+    cursor.execute(
+        f"""
+        SELECT MAX(user_id) FROM (
+            SELECT user_id FROM user_profile
+            WHERE {audience_sql} AND user_id > ? AND broadcast_unsubscribed_at IS NULL
+            ORDER BY user_id
+            LIMIT ?
+        ) chunk
+        """,
+        (*audience_params, lower, max(1, limit)),
+    )
+    row = cursor.fetchone()
+    upper = row[0] if row else None
+    if upper is None:
+        return 0, None
+    cursor.execute(
+        f"""
+        INSERT INTO broadcast_jobs (
+            user_id, kind, payload, message_id, status, attempts, available_at, dedupe_key
+        )
+        SELECT user_id, ?, '', ?, 'pending', 0, CURRENT_TIMESTAMP,
+               CAST(? AS TEXT) || CAST(user_id AS TEXT)
+        FROM user_profile
+        WHERE {audience_sql} AND user_id > ? AND user_id <= ?
+          AND broadcast_unsubscribed_at IS NULL
+        ON CONFLICT(dedupe_key) DO NOTHING
+        """,
+        (kind, message_id, f"{content_key}:", *audience_params, lower, upper),
+    )
+    inserted = max(int(getattr(cursor, "rowcount", 0) or 0), 0)
+    if inserted:
+        _count_status(cursor, "pending", inserted)
+        notify(cursor, BROADCAST_QUEUE_CHANNEL, "")
+    return inserted, upper
+
+
+def enqueue_time_slot_chunk(
+    notification_time: str,
+    kind: str,
+    payload: dict[str, Any],
+    slot_key: str,
+    after_user_id: int | None = None,
+    limit: int = 2000,
+) -> tuple[int, int | None]:
+    """
+    Enqueues one job per subscriber of notification_time with user_id after
+    after_user_id, at most limit users, in a single INSERT ... SELECT that
+    builds dedupe keys in SQL. The jobs reference the slot's broadcast_messages
+    row instead of carrying the payload. Returns (inserted, last user_id in
+    the chunk); the last id is None once the slot is exhausted. Raises on
+    failure, so an error is never mistaken for the end of the slot.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    payload_json = json.dumps(payload, ensure_ascii=False)
+    try:
+        message_id = _ensure_broadcast_message(cursor, kind, payload_json, slot_key)
+        inserted, upper = _enqueue_audience_chunk(
+            cursor,
+            message_id,
+            kind,
+            f"{kind}:{slot_key}",
+            "notification_time = ?",
+            (notification_time,),
+            after_user_id,
+            limit,
+        )
+        conn.commit()
+    except Exception as exc:
+        logging.error("enqueue_time_slot_chunk failed: %s", exc)
+        raise
+    finally:
+        conn.close()
+    if inserted:
+        _after_enqueue_commit()
+    return inserted, upper
+
+
+def create_broadcast_message(kind: str, payload: dict[str, Any], slot_key: str) -> int | None:
+    """Creates (or finds) the broadcast_messages row for kind and slot_key."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        message_id = _ensure_broadcast_message(cursor, kind, json.dumps(payload, ensure_ascii=False), slot_key)
+        conn.commit()
+    except Exception as exc:
+        logging.error("create_broadcast_message failed: %s", exc)
+        return None
+    finally:
+        conn.close()
+    return message_id
+
+
+def enqueue_broadcast_message_chunk(
+    message_id: int,
+    after_user_id: int | None = None,
+    limit: int = 2000,
+) -> tuple[int, int | None]:
+    """
+    Like enqueue_time_slot_chunk, for every subscribed user and an existing
+    broadcast message. Nothing is enqueued once the message is cancelled, so
+    a running enqueue stops at the next chunk. Raises on failure.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT kind, content_key, status FROM broadcast_messages WHERE id = ?", (message_id,))
+        row = cursor.fetchone()
+        if not row or row["status"] != "active":
+            return 0, None
+        inserted, upper = _enqueue_audience_chunk(
+            cursor,
+            message_id,
+            str(row["kind"]),
+            str(row["content_key"]),
+            "1 = 1",
+            (),
+            after_user_id,
+            limit,
+        )
+        conn.commit()
+    except Exception as exc:
+        logging.error("enqueue_broadcast_message_chunk failed: %s", exc)
+        raise
+    finally:
+        conn.close()
+    if inserted:
+        _after_enqueue_commit()
+    return inserted, upper
+
+
+def get_broadcast_message_progress(message_id: int) -> dict[str, Any] | None:
+    """The message's status and its job counts per status; None if it does not exist."""
+    conn = get_connection(readonly=True)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT id, kind, status, created_at FROM broadcast_messages WHERE id = ?", (message_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        progress = {
+            "id": int(row["id"]),
+            "kind": str(row["kind"]),
+            "status": str(row["status"]),
+            "created_at": str(row["created_at"]),
+            "jobs": {"pending": 0, "processing": 0, "sent": 0, "failed": 0, "cancelled": 0},
+        }
+        cursor.execute(
+            "SELECT status, COUNT(*) AS cnt FROM broadcast_jobs WHERE message_id = ? GROUP BY status",
+            (message_id,),
+        )
+        for job_row in cursor.fetchall():
+            progress["jobs"][str(job_row["status"])] = int(job_row["cnt"])
+    finally:
+        conn.close()
+    return progress
+
+
+def get_latest_broadcast_message_id(kind: str) -> int | None:
+    conn = get_connection(readonly=True)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT MAX(id) FROM broadcast_messages WHERE kind = ?", (kind,))
+        row = cursor.fetchone()
+    finally:
+        conn.close()
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def set_broadcast_message_status(message_id: int, status: str) -> int:
+    """
+    'cancelled' stops a broadcast: its pending jobs become cancelled (jobs
+    being sent finish). 'active' resumes it: cancelled jobs are due again.
+    Returns the number of jobs moved.
+    """
+    if status not in ("active", "cancelled"):
+        raise ValueError(f"unsupported broadcast message status: {status}")
+    from_status, to_status = ("pending", "cancelled") if status == "cancelled" else ("cancelled", "pending")
+    conn = get_connection()
+    cursor = conn.cursor()
+    moved = 0
+    try:
+        cursor.execute("UPDATE broadcast_messages SET status = ? WHERE id = ?", (status, message_id))
+        cursor.execute(
+            """
+            UPDATE broadcast_jobs
+            SET status = ?, available_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+            WHERE message_id = ? AND status = ?
+            """,
+            (to_status, message_id, from_status),
+        )
+        moved = max(int(getattr(cursor, "rowcount", 0) or 0), 0)
+        _count_moves(cursor, {from_status: moved}, to_status)
+        if moved and to_status == "pending":
+            notify(cursor, BROADCAST_QUEUE_CHANNEL, "")
+        conn.commit()
+    except Exception as exc:
+        logging.error("set_broadcast_message_status failed: %s", exc)
+        return 0
+    finally:
+        conn.close()
+    if moved and to_status == "pending":
+        _after_enqueue_commit()
+    return moved
+
+
 def claim_pending_jobs(limit: int = 1000) -> list[dict[str, Any]]:
     conn = get_connection()
     cursor = conn.cursor()
@@ -67,7 +377,7 @@ def claim_pending_jobs(limit: int = 1000) -> list[dict[str, Any]]:
                 SET status = 'processing', locked_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
                 FROM to_claim tc
                 WHERE bj.id = tc.id
-                RETURNING bj.id, bj.user_id, bj.kind, bj.payload, bj.attempts
+                RETURNING bj.id, bj.user_id, bj.kind, bj.payload, bj.message_id, bj.attempts
                 """,
                 (batch_limit,),
             )
@@ -78,41 +388,41 @@ def claim_pending_jobs(limit: int = 1000) -> list[dict[str, Any]]:
                         "user_id": int(row["user_id"]),
                         "kind": str(row["kind"]),
                         "payload": str(row["payload"]),
+                        "message_id": int(row["message_id"]) if row["message_id"] is not None else None,
                         "attempts": int(row["attempts"] or 0),
                     }
                 )
         else:
+            # One statement: SQLite's single writer makes the claim atomic
             cursor.execute(
                 """
-                SELECT id, user_id, kind, payload, attempts
-                FROM broadcast_jobs
-                WHERE status = 'pending' AND available_at <= CURRENT_TIMESTAMP
-                ORDER BY id ASC
-                LIMIT ?
+                UPDATE broadcast_jobs
+                SET status = 'processing', locked_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE id IN (
+                    SELECT id
+                    FROM broadcast_jobs
+                    WHERE status = 'pending' AND available_at <= CURRENT_TIMESTAMP
+                    ORDER BY id ASC
+                    LIMIT ?
+                )
+                RETURNING id, user_id, kind, payload, message_id, attempts
                 """,
                 (batch_limit,),
             )
-            rows = cursor.fetchall()
-            for row in rows:
-                job_id = int(row["id"])
-                cursor.execute(
-                    """
-                    UPDATE broadcast_jobs
-                    SET status = 'processing', locked_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ? AND status = 'pending'
-                    """,
-                    (job_id,),
+            for row in cursor.fetchall():
+                claimed.append(
+                    {
+                        "id": int(row["id"]),
+                        "user_id": int(row["user_id"]),
+                        "kind": str(row["kind"]),
+                        "payload": str(row["payload"]),
+                        "message_id": int(row["message_id"]) if row["message_id"] is not None else None,
+                        "attempts": int(row["attempts"] or 0),
+                    }
                 )
-                if int(getattr(cursor, "rowcount", 0) or 0) > 0:
-                    claimed.append(
-                        {
-                            "id": job_id,
-                            "user_id": int(row["user_id"]),
-                            "kind": str(row["kind"]),
-                            "payload": str(row["payload"]),
-                            "attempts": int(row["attempts"] or 0),
-                        }
-                    )
+            # RETURNING order is unspecified on SQLite
+            claimed.sort(key=lambda job: job["id"])
+        _count_moves(cursor, {"pending": len(claimed)}, "processing")
         conn.commit()
     except Exception as exc:
         logging.error("claim_pending_jobs failed: %s", exc)
@@ -156,6 +466,7 @@ def recover_stale_processing_jobs(stale_seconds: int = 900) -> int:
                 (f"-{safe_stale_seconds} seconds",),
             )
         recovered = int(getattr(cursor, "rowcount", 0) or 0)
+        _count_moves(cursor, {"processing": recovered}, "pending")
         conn.commit()
     except Exception as exc:
         logging.error("recover_stale_processing_jobs failed: %s", exc)
@@ -168,6 +479,7 @@ def mark_job_sent(job_id: int):
     conn = get_connection()
     cursor = conn.cursor()
     try:
+        prior = _prior_statuses(cursor, [job_id])
         cursor.execute(
             """
             UPDATE broadcast_jobs
@@ -176,6 +488,7 @@ def mark_job_sent(job_id: int):
             """,
             (job_id,),
         )
+        _count_moves(cursor, prior, "sent")
         conn.commit()
     except Exception as exc:
         logging.error("mark_job_sent failed: %s", exc)
@@ -191,6 +504,7 @@ def reschedule_job(job_id: int, attempts_done: int, error_msg: str, delay_second
     conn = get_connection()
     cursor = conn.cursor()
     try:
+        prior = _prior_statuses(cursor, [job_id])
         cursor.execute(
             """
             UPDATE broadcast_jobs
@@ -200,6 +514,7 @@ def reschedule_job(job_id: int, attempts_done: int, error_msg: str, delay_second
             """,
             (status, next_attempts, error_msg[:500], next_at, job_id),
         )
+        _count_moves(cursor, prior, status)
         conn.commit()
     except Exception as exc:
         logging.error("reschedule_job failed: %s", exc)
@@ -207,22 +522,255 @@ def reschedule_job(job_id: int, attempts_done: int, error_msg: str, delay_second
         conn.close()
 
 
-def get_broadcast_queue_counts() -> dict[str, int]:
+def _in_chunks(cursor, sql: str, ids: list[int], params: tuple = ()) -> int:
+    """Runs sql once per _ACK_CHUNK ids; sql has one {ids} placeholder list. Returns the rows changed."""
+    changed = 0
+    for start in range(0, len(ids), _ACK_CHUNK):
+        chunk = ids[start:start + _ACK_CHUNK]
+        cursor.execute(sql.format(ids=", ".join("?" for _ in chunk)), (*params, *chunk))
+        changed += max(int(getattr(cursor, "rowcount", 0) or 0), 0)
+    return changed
+
+
+def ack_broadcast_jobs(
+    sent_ids: list[int],
+    failures: list[tuple[int, int, str, int]],
+    max_attempts: int,
+    dropped: list[tuple[int, str]] | None = None,
+    unsubscribe_user_ids: list[int] | None = None,
+):
+    """
+    Applies a batch of completions in one transaction: one UPDATE per chunk
+    of sent ids and one executemany for failures given as
+    (job_id, attempts_done, error_msg, delay_seconds), same rules as
+    reschedule_job. dropped (job_id, error_msg) jobs fail without retry;
+    unsubscribe_user_ids stop receiving broadcasts and lose their pending
+    jobs.
+    """
+    dropped = dropped or []
+    unsubscribe_user_ids = sorted(set(unsubscribe_user_ids or []))
+    if not (sent_ids or failures or dropped or unsubscribe_user_ids):
+        return
+    now = datetime.datetime.utcnow()
+    failure_rows = []
+    for job_id, attempts_done, error_msg, delay_seconds in failures:
+        next_attempts = attempts_done + 1
+        failure_rows.append(
+            (
+                "failed" if next_attempts >= max_attempts else "pending",
+                next_attempts,
+                str(error_msg)[:500],
+                (now + datetime.timedelta(seconds=max(1, delay_seconds))).strftime("%Y-%m-%d %H:%M:%S"),
+                job_id,
+            )
+        )
     conn = get_connection()
     cursor = conn.cursor()
-    result = {"pending": 0, "processing": 0, "sent": 0, "failed": 0}
     try:
-        cursor.execute(
+        prior = _prior_statuses(cursor, sent_ids)
+        _in_chunks(
+            cursor,
+            """
+            UPDATE broadcast_jobs
+            SET status = 'sent', updated_at = CURRENT_TIMESTAMP
+            WHERE id IN ({ids})
+            """,
+            sent_ids,
+        )
+        _count_moves(cursor, prior, "sent")
+        for status in ("pending", "failed"):
+            ids = [row[4] for row in failure_rows if row[0] == status]
+            if ids:
+                _count_moves(cursor, _prior_statuses(cursor, ids), status)
+        if failure_rows:
+            cursor.executemany(
+                """
+                UPDATE broadcast_jobs
+                SET status = ?, attempts = ?, last_error = ?, last_error_at = CURRENT_TIMESTAMP,
+                    available_at = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+                """,
+                failure_rows,
+            )
+        if dropped:
+            _count_moves(cursor, _prior_statuses(cursor, [job_id for job_id, _ in dropped]), "failed")
+            cursor.executemany(
+                """
+                UPDATE broadcast_jobs
+                SET status = 'failed', attempts = attempts + 1, last_error = ?,
+                    last_error_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+                """,
+                [(str(error_msg)[:500], job_id) for job_id, error_msg in dropped],
+            )
+        _in_chunks(
+            cursor,
             """
-            SELECT status, COUNT(*) AS cnt
-            FROM broadcast_jobs
-            GROUP BY status
+            UPDATE user_profile
+            SET broadcast_unsubscribed_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+            WHERE broadcast_unsubscribed_at IS NULL AND user_id IN ({ids})
+            """,
+            unsubscribe_user_ids,
+        )
+        dropped_pending = _in_chunks(
+            cursor,
             """
+            UPDATE broadcast_jobs
+            SET status = 'failed', last_error = 'unsubscribed', updated_at = CURRENT_TIMESTAMP
+            WHERE status = 'pending' AND user_id IN ({ids})
+            """,
+            unsubscribe_user_ids,
+        )
+        _count_moves(cursor, {"pending": dropped_pending}, "failed")
+        for user_id in unsubscribe_user_ids:
+            notify(cursor, PROFILE_INVALIDATE_CHANNEL, str(user_id))
+        conn.commit()
+    except Exception as exc:
+        logging.error("ack_broadcast_jobs failed: %s", exc)
+    finally:
+        conn.close()
+    for user_id in unsubscribe_user_ids:
+        invalidate_profile(user_id)
+
+
+def get_broadcast_messages(message_ids: list[int]) -> dict[int, tuple[str, str]]:
+    """{message_id: (kind, payload JSON)} for the given ids."""
+    ids = sorted(set(message_ids))
+    result: dict[int, tuple[str, str]] = {}
+    if not ids:
+        return result
+    conn = get_connection(readonly=True)
+    cursor = conn.cursor()
+    try:
+        for start in range(0, len(ids), _ACK_CHUNK):
+            chunk = ids[start:start + _ACK_CHUNK]
+            cursor.execute(
+                f"SELECT id, kind, payload FROM broadcast_messages WHERE id IN ({', '.join('?' for _ in chunk)})",
+                chunk,
+            )
+            for row in cursor.fetchall():
+                result[int(row["id"])] = (str(row["kind"]), str(row["payload"]))
+    finally:
+        conn.close()
+    return result
+
+
+def get_next_pending_at() -> datetime.datetime | None:
+    """available_at (UTC) of the earliest pending job, or None when nothing is pending."""
+    conn = get_connection(readonly=True)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT MIN(available_at) FROM broadcast_jobs WHERE status = 'pending'")
+        row = cursor.fetchone()
+    except Exception as exc:
+        logging.error("get_next_pending_at failed: %s", exc)
+        return None
+    finally:
+        conn.close()
+    raw = row[0] if row else None
+    if raw is None:
+        return None
+    if isinstance(raw, datetime.datetime):
+        return raw.replace(tzinfo=None)
+    try:
+        return datetime.datetime.fromisoformat(str(raw))
+    except ValueError:
+        return None
+
+
+def get_broadcast_queue_counts() -> dict[str, int]:
+    """Jobs per status from the status counters: a primary-key read, not a table scan."""
+    conn = get_connection(readonly=True)
+    cursor = conn.cursor()
+    result = {status: 0 for status in BROADCAST_JOB_STATUSES}
+    try:
+        names = [BROADCAST_STATUS_COUNTER.format(status) for status in BROADCAST_JOB_STATUSES]
+        cursor.execute(
+            f"SELECT name, value FROM stats_counters WHERE name IN ({', '.join('?' for _ in names)})",
+            names,
         )
         for row in cursor.fetchall():
-            result[str(row["status"])] = int(row["cnt"])
+            result[str(row["name"]).split(":", 1)[1]] = int(row["value"])
     except Exception:
         pass
     finally:
         conn.close()
     return result
+
+
+def _summary_day(value) -> str:
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat()
+    return str(value)[:10]
+
+
+def archive_broadcast_jobs(cutoff: str, limit: int) -> int:
+    """
+    Folds up to limit sent or failed jobs last updated before cutoff
+    ('YYYY-MM-DD HH:MM:SS' UTC) into broadcast_daily_summary (one row per
+    day and kind) and deletes them, in one short transaction. Returns the
+    number of jobs archived.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            """
+            DELETE FROM broadcast_jobs
+            WHERE id IN (
+                SELECT id FROM broadcast_jobs
+                WHERE status IN ('sent', 'failed') AND updated_at < ?
+                LIMIT ?
+            )
+            RETURNING kind, status, updated_at
+            """,
+            (cutoff, max(1, limit)),
+        )
+        rows = cursor.fetchall()
+        totals: dict[tuple[str, str], list[int]] = {}
+        for kind, status, updated_at in ((row[0], row[1], row[2]) for row in rows):
+            counts = totals.setdefault((_summary_day(updated_at), str(kind)), [0, 0])
+            counts[0 if status == "sent" else 1] += 1
+        if totals:
+            cursor.executemany(
+                """
+                INSERT INTO broadcast_daily_summary (day, kind, sent, failed)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(day, kind) DO UPDATE SET
+                    sent = broadcast_daily_summary.sent + excluded.sent,
+                    failed = broadcast_daily_summary.failed + excluded.failed
+                """,
+                [(day, kind, sent, failed) for (day, kind), (sent, failed) in totals.items()],
+            )
+            _count_status(cursor, "sent", -sum(sent for sent, _ in totals.values()))
+            _count_status(cursor, "failed", -sum(failed for _, failed in totals.values()))
+        conn.commit()
+    except Exception as exc:
+        logging.error("archive_broadcast_jobs failed: %s", exc)
+        return 0
+    finally:
+        conn.close()
+    return len(rows)
+
+
+def delete_unused_broadcast_messages(cutoff: str) -> int:
+    """Deletes broadcast messages created before cutoff that no job references any more."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            """
+            DELETE FROM broadcast_messages
+            WHERE created_at < ?
+              AND NOT EXISTS (SELECT 1 FROM broadcast_jobs WHERE broadcast_jobs.message_id = broadcast_messages.id)
+            """,
+            (cutoff,),
+        )
+        deleted = max(int(getattr(cursor, "rowcount", 0) or 0), 0)
+        conn.commit()
+    except Exception as exc:
+        logging.error("delete_unused_broadcast_messages failed: %s", exc)
+        return 0
+    finally:
+        conn.close()
+    return deleted
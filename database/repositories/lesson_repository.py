@@ -3,14 +3,16 @@ import json
 import logging
 
 def get_last_daily_plan(user_id: int):
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
-    cursor.execute(
-        "SELECT plan_data FROM daily_plans WHERE user_id = ? ORDER BY id DESC LIMIT 1",
-        (user_id,),
-    )
-    row = cursor.fetchone()
-    conn.close()
+    try:
+        cursor.execute(
+            "SELECT plan_data FROM daily_plans WHERE user_id = ? ORDER BY id DESC LIMIT 1",
+            (user_id,),
+        )
+        row = cursor.fetchone()
+    finally:
+        conn.close()
     return json.loads(row[0]) if row else None
 
 def save_daily_plan(user_id: int, plan_data: dict):
@@ -26,11 +28,13 @@ def save_daily_plan(user_id: int, plan_data: dict):
         conn.close()
 
 def get_grammar_coverage_map(user_id: int, level: str):
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
-    cursor.execute("SELECT topic_id, seen_count FROM grammar_progress WHERE user_id = ? AND level = ?", (user_id, level))
-    rows = cursor.fetchall()
-    conn.close()
+    try:
+        cursor.execute("SELECT topic_id, seen_count FROM grammar_progress WHERE user_id = ? AND level = ?", (user_id, level))
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
     return {row[0]: row[1] for row in rows}
 
 def mark_grammar_topic_seen(user_id: int, topic_id: str, level: str):
@@ -1,5 +1,4 @@
-from database.connection import get_connection
-import datetime
+from database.connection import get_connection, is_postgres_backend
 import logging
 
 
@@ -14,105 +13,180 @@ def _coerce_int_list(rows):
 
 
 def get_due_reviews(user_id: int, level: str | None = None, limit: int = 20):
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
-    if level:
-        cursor.execute("""
-            SELECT m.item_id FROM user_mastery m
-            JOIN words w ON CAST(w.id AS TEXT) = CAST(m.item_id AS TEXT)
-            WHERE m.user_id = ? AND w.level = ? AND m.next_review <= CURRENT_TIMESTAMP
-            ORDER BY m.next_review ASC
-            LIMIT ?
-        """, (user_id, level, limit))
-    else:
-        cursor.execute("""
-            SELECT item_id FROM user_mastery 
-            WHERE user_id = ? AND next_review <= CURRENT_TIMESTAMP
-            ORDER BY next_review ASC
-            LIMIT ?
-        """, (user_id, limit))
-    rows = cursor.fetchall()
-    conn.close()
+    try:
+        if level:
+            cursor.execute("""
+                SELECT m.item_id FROM user_mastery m
+                JOIN words w ON w.id = m.item_id
+                WHERE m.user_id = ? AND w.level = ? AND m.next_review <= CURRENT_TIMESTAMP
+                ORDER BY m.next_review ASC
+                LIMIT ?
+            """, (user_id, level, limit))
+        else:
+            cursor.execute("""
+                SELECT item_id FROM user_mastery 
+                WHERE user_id = ? AND next_review <= CURRENT_TIMESTAMP
+                ORDER BY next_review ASC
+                LIMIT ?
+            """, (user_id, limit))
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
     return [row[0] for row in rows]
 
+# Simple SRS: 1, 3, 7, 14, 30 days
+SRS_INTERVAL_DAYS = [0, 1, 3, 7, 14, 30, 90]
+_MAX_BOX = len(SRS_INTERVAL_DAYS) - 1
+
+
+def _review_at_sql(days_sql: str) -> str:
+    if is_postgres_backend():
+        return f"CURRENT_TIMESTAMP + ({days_sql}) * INTERVAL '1 day'"
+    return f"datetime('now', '+' || ({days_sql}) || ' days')"
+
+
+def _mastery_upsert_sql() -> str:
+    """
+    One statement for the whole box transition: the new box and its review
+    date are computed from the stored box inside ON CONFLICT. Parameters:
+    user_id, item_id, first box, first interval (days), delta (+1 / -1).
+    """
+    old_box = "COALESCE(user_mastery.box, 0)"
+    new_box = (
+        f"CASE WHEN {old_box} + ? < 0 THEN 0 "
+        f"WHEN {old_box} + ? > {_MAX_BOX} THEN {_MAX_BOX} "
+        f"ELSE {old_box} + ? END"
+    )
+    days = f"CASE {new_box} " + " ".join(
+        f"WHEN {box} THEN {interval}" for box, interval in enumerate(SRS_INTERVAL_DAYS)
+    ) + " END"
+    return f"""
+        INSERT INTO user_mastery (user_id, item_id, box, next_review)
+        VALUES (?, ?, ?, {_review_at_sql("?")})
+        ON CONFLICT(user_id, item_id) DO UPDATE SET
+            box = {new_box},
+            next_review = {_review_at_sql(days)},
+            last_reviewed = CURRENT_TIMESTAMP
+        RETURNING box
+    """
+
+
+def _mastery_params(user_id: int, item_id: int, is_correct: bool) -> tuple:
+    first_box = 1 if is_correct else 0
+    delta = 1 if is_correct else -1
+    return (user_id, item_id, first_box, SRS_INTERVAL_DAYS[first_box], delta, delta, delta, delta, delta, delta)
+
+
 def update_mastery(user_id: int, item_id: int, is_correct: bool):
+    """Applies one review; returns the new box, or None on failure."""
     conn = get_connection()
     cursor = conn.cursor()
-    
-    # Simple SRS: 1, 3, 7, 14, 30 days
-    intervals = [0, 1, 3, 7, 14, 30, 90]
-    
-    cursor.execute("SELECT box FROM user_mastery WHERE user_id = ? AND item_id = ?", (user_id, item_id))
-    row = cursor.fetchone()
-    
-    current_box = row[0] if row else 0
-    if is_correct:
-        new_box = min(current_box + 1, len(intervals) - 1)
-    else:
-        new_box = max(current_box - 1, 0)
-        
-    days = intervals[new_box]
-    next_review = (datetime.datetime.now() + datetime.timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
-    
     try:
-        cursor.execute("""
-            INSERT INTO user_mastery (user_id, item_id, box, next_review)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(user_id, item_id) DO UPDATE SET
-                box = excluded.box,
-                next_review = excluded.next_review,
-                last_reviewed = CURRENT_TIMESTAMP
-        """, (user_id, item_id, new_box, next_review))
+        cursor.execute(_mastery_upsert_sql(), _mastery_params(user_id, item_id, is_correct))
+        row = cursor.fetchone()
         conn.commit()
+        return int(row[0]) if row else None
     except Exception as e:
         logging.error(f"Error updating mastery for {user_id}/{item_id}: {e}")
+        return None
     finally:
         conn.close()
 
+def record_reviews_bulk(user_id: int, reviews) -> dict[int, int]:
+    """
+    Applies [(item_id, is_correct), ...] in order in one transaction, so a
+    word answered twice moves two boxes. Returns {item_id: final box}.
+    """
+    sql = _mastery_upsert_sql()
+    boxes: dict[int, int] = {}
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        for item_id, is_correct in reviews:
+            if item_id is None:
+                continue
+            cursor.execute(sql, _mastery_params(user_id, int(item_id), bool(is_correct)))
+            row = cursor.fetchone()
+            if row:
+                boxes[int(item_id)] = int(row[0])
+        conn.commit()
+    except Exception as e:
+        logging.error(f"Error recording {len(reviews)} reviews for {user_id}: {e}")
+        return {}
+    finally:
+        conn.close()
+    return boxes
+
 def get_level_progress_stats(user_id: int, level: str):
     """Calculates mastered words vs total words for a level."""
     from database.repositories.word_repository import get_total_words_count
     total = get_total_words_count(level)
     
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
-    # Mastery defined as box >= 4 (arbitrary senior standard)
-    cursor.execute("""
-        SELECT COUNT(*) FROM user_mastery m
-        JOIN words w ON CAST(w.id AS TEXT) = CAST(m.item_id AS TEXT)
-        WHERE m.user_id = ? AND w.level = ? AND m.box >= 4
-    """, (user_id, level))
-    mastered = cursor.fetchone()[0]
-    conn.close()
+    try:
+        # Mastery defined as box >= 4 (arbitrary senior standard)
+        cursor.execute("""
+            SELECT COUNT(*) FROM user_mastery m
+            JOIN words w ON w.id = m.item_id
+            WHERE m.user_id = ? AND w.level = ? AND m.box >= 4
+        """, (user_id, level))
+        mastered = cursor.fetchone()[0]
+    finally:
+        conn.close()
     
     return mastered, total
 
 def get_weighted_mistake_word_ids(user_id: int, level: str | None = None, limit: int = 20):
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
-    if level:
-        cursor.execute("""
-            SELECT m.item_id FROM user_mistakes m
-            JOIN words w ON CAST(w.id AS TEXT) = m.item_id
-            WHERE m.user_id = ? AND w.level = ? AND m.module = 'vocab' AND m.mastered = 0
-            ORDER BY m.mistake_count DESC, m.last_mistake_at DESC
-            LIMIT ?
-        """, (user_id, level, limit))
-    else:
-        cursor.execute("""
-            SELECT item_id FROM user_mistakes 
-            WHERE user_id = ? AND module = 'vocab' AND mastered = 0
-            ORDER BY mistake_count DESC, last_mistake_at DESC
-            LIMIT ?
-        """, (user_id, limit))
-    rows = cursor.fetchall()
-    conn.close()
+    try:
+        if level:
+            cursor.execute("""
+                SELECT m.word_id FROM user_mistakes m
+                JOIN words w ON w.id = m.word_id
+                WHERE m.user_id = ? AND w.level = ? AND m.module = 'vocab' AND m.mastered = 0
+                ORDER BY m.mistake_count DESC, m.last_mistake_at DESC
+                LIMIT ?
+            """, (user_id, level, limit))
+        else:
+            cursor.execute("""
+                SELECT word_id FROM user_mistakes
+                WHERE user_id = ? AND module = 'vocab' AND mastered = 0 AND word_id IS NOT NULL
+                ORDER BY mistake_count DESC, last_mistake_at DESC
+                LIMIT ?
+            """, (user_id, limit))
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
     return _coerce_int_list(rows)
 
 def get_mastered_mistake_word_ids(user_id: int):
-    conn = get_connection()
+    conn = get_connection(readonly=True)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT word_id FROM user_mistakes WHERE user_id = ? AND mastered = 1 AND word_id IS NOT NULL",
+            (user_id,),
+        )
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+    return _coerce_int_list(rows)
+
+def get_mastered_word_ids(user_id: int, level: str):
+    """Words of a level the user has already mastered (box >= 4)."""
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
-    cursor.execute("SELECT item_id FROM user_mistakes WHERE user_id = ? AND mastered = 1", (user_id,))
-    rows = cursor.fetchall()
-    conn.close()
+    try:
+        cursor.execute("""
+            SELECT m.item_id FROM user_mastery m
+            JOIN words w ON w.id = m.item_id
+            WHERE m.user_id = ? AND w.level = ? AND m.box >= 4
+        """, (user_id, level))
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
     return _coerce_int_list(rows)
@@ -1,7 +1,19 @@
 from database.connection import get_connection
+from database.repositories.activity_repository import (
+    USER_MISTAKES_COUNTER,
+    apply_activity_rollups,
+    bump_counter,
+    bump_weak_item,
+    is_summary_event,
+    record_quiz_summary,
+)
+from database.telemetry import TELEMETRY_COLUMNS, submit_telemetry
 import logging
 import json
 
+# Rows per INSERT statement; keeps the bound parameters far below SQLite's limit.
+_TELEMETRY_INSERT_CHUNK = 200
+
 def update_module_progress(user_id: int, module_name: str, level: str, completed: bool = False):
     conn = get_connection()
     cursor = conn.cursor()
@@ -33,31 +45,49 @@ def record_navigation_event(
     level: str | None = None,
     entry_type: str = "callback",
 ):
+    row = (user_id, section_name, level, entry_type)
+    if submit_telemetry("navigation_logs", row):
+        return
     conn = get_connection()
     cursor = conn.cursor()
     try:
         cursor.execute("""
             INSERT INTO navigation_logs (user_id, section_name, level, entry_type)
             VALUES (?, ?, ?, ?)
-        """, (user_id, section_name, level, entry_type))
+        """, row)
+        apply_activity_rollups(cursor, navigation_rows=[row])
         conn.commit()
     except Exception as e:
         logging.error(f"Error logging navigation: {e}")
     finally:
         conn.close()
 
+def _vocab_word_id(item_id, module: str) -> int | None:
+    if module != "vocab":
+        return None
+    raw = str(item_id)
+    return int(raw) if raw.isascii() and raw.isdigit() else None
+
 def log_mistake(user_id: int, item_id: str, module: str, mistake_type: str = "vocab", **kwargs):
     conn = get_connection()
     cursor = conn.cursor()
     try:
         cursor.execute("""
-            INSERT INTO user_mistakes (user_id, item_id, module, mistake_type, mistake_count)
-            VALUES (?, ?, ?, ?, 1)
-            ON CONFLICT(user_id, item_id, module) DO UPDATE SET
-                mistake_count = mistake_count + 1,
-                last_mistake_at = CURRENT_TIMESTAMP,
-                mastered = 0
-        """, (user_id, str(item_id), module, mistake_type))
+            INSERT INTO user_mistakes (user_id, item_id, module, mistake_type, mistake_count, word_id)
+            VALUES (?, ?, ?, ?, 1, ?)
+            ON CONFLICT(user_id, item_id, module) DO NOTHING
+        """, (user_id, str(item_id), module, mistake_type, _vocab_word_id(item_id, module)))
+        if cursor.rowcount == 1:
+            bump_counter(cursor, USER_MISTAKES_COUNTER)
+        else:
+            cursor.execute("""
+                UPDATE user_mistakes SET
+                    mistake_count = mistake_count + 1,
+                    last_mistake_at = CURRENT_TIMESTAMP,
+                    mastered = 0
+                WHERE user_id = ? AND item_id = ? AND module = ?
+            """, (user_id, str(item_id), module))
+        bump_weak_item(cursor, str(item_id))
         conn.commit()
     except Exception as e:
         logging.error(f"Error logging mistake: {e}")
@@ -71,20 +101,52 @@ def log_event(
     level: str | None = None,
     metadata: dict | None = None,
 ):
+    meta_json = json.dumps(metadata) if metadata else None
+    row = (user_id, event_type, section_name, level, meta_json)
+    # Completions feed user_stats_summary and daily_activity, so they are
+    # written now rather than through the lossy telemetry buffer
+    if not is_summary_event(event_type) and submit_telemetry("event_logs", row):
+        return
     conn = get_connection()
     cursor = conn.cursor()
-    meta_json = json.dumps(metadata) if metadata else None
     try:
         cursor.execute("""
             INSERT INTO event_logs (user_id, event_type, section_name, level, metadata)
             VALUES (?, ?, ?, ?, ?)
-        """, (user_id, event_type, section_name, level, meta_json))
+        """, row)
+        apply_activity_rollups(cursor, event_rows=[row])
         conn.commit()
     except Exception as e:
         logging.error(f"Error logging event: {e}")
     finally:
         conn.close()
 
+def insert_telemetry_rows(rows_by_table: dict[str, list[tuple]]):
+    """
+    Writes buffered telemetry with multi-row INSERTs and folds it into the
+    daily rollups, all in one transaction; raises on failure.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        for table, rows in rows_by_table.items():
+            columns = TELEMETRY_COLUMNS[table]
+            row_sql = "(" + ", ".join("?" for _ in columns) + ")"
+            for start in range(0, len(rows), _TELEMETRY_INSERT_CHUNK):
+                chunk = rows[start:start + _TELEMETRY_INSERT_CHUNK]
+                cursor.execute(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([row_sql] * len(chunk))}",
+                    [value for row in chunk for value in row],
+                )
+        apply_activity_rollups(
+            cursor,
+            navigation_rows=rows_by_table.get("navigation_logs", ()),
+            event_rows=rows_by_table.get("event_logs", ()),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
 def add_quiz_result(user_id: int, level: str, score: int, total: int):
     conn = get_connection()
     cursor = conn.cursor()
@@ -93,6 +155,7 @@ def add_quiz_result(user_id: int, level: str, score: int, total: int):
             INSERT INTO quiz_results (user_id, level, score, total)
             VALUES (?, ?, ?, ?)
         """, (user_id, level, score, total))
+        record_quiz_summary(cursor, user_id, score, total)
         conn.commit()
     except Exception as e:
         logging.error(f"Error adding quiz result: {e}")
@@ -103,18 +166,20 @@ def mark_grammar_topic_seen(user_id: int, topic_id: str):
     update_module_progress(user_id, "grammar", topic_id, completed=False)
 
 def get_recent_topic_mistake_scores(user_id: int, module: str = 'grammar', days: int = 14, limit: int = 10):
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
-    # Simple date filter if possible, otherwise just limit
-    import datetime
-    cutoff = (datetime.datetime.now() - datetime.timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        # Simple date filter if possible, otherwise just limit
+        import datetime
+        cutoff = (datetime.datetime.now() - datetime.timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
     
-    cursor.execute("""
-        SELECT item_id, mistake_count FROM user_mistakes 
-        WHERE user_id = ? AND module = ? AND last_mistake_at >= ?
-        ORDER BY last_mistake_at DESC
-        LIMIT ?
-    """, (user_id, module, cutoff, limit))
-    rows = cursor.fetchall()
-    conn.close()
+        cursor.execute("""
+            SELECT item_id, mistake_count FROM user_mistakes 
+            WHERE user_id = ? AND module = ? AND last_mistake_at >= ?
+            ORDER BY last_mistake_at DESC
+            LIMIT ?
+        """, (user_id, module, cutoff, limit))
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
     return [(row[0], row[1]) for row in rows]
@@ -1,5 +1,5 @@
 from database.connection import get_connection
-from database.connection import is_postgres_backend
+from database.repositories.activity_repository import record_submission_summary
 import json
 import logging
 
@@ -22,19 +22,23 @@ def save_daily_lesson_state(user_id: int, state_data: dict):
         conn.close()
 
 def get_daily_lesson_state(user_id: int):
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
-    cursor.execute("SELECT session_data FROM daily_lesson_sessions WHERE user_id = ?", (user_id,))
-    row = cursor.fetchone()
-    conn.close()
+    try:
+        cursor.execute("SELECT session_data FROM daily_lesson_sessions WHERE user_id = ?", (user_id,))
+        row = cursor.fetchone()
+    finally:
+        conn.close()
     return json.loads(row[0]) if row else None
 
 def delete_daily_lesson_state(user_id: int):
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("DELETE FROM daily_lesson_sessions WHERE user_id = ?", (user_id,))
-    conn.commit()
-    conn.close()
+    try:
+        cursor.execute("DELETE FROM daily_lesson_sessions WHERE user_id = ?", (user_id,))
+        conn.commit()
+    finally:
+        conn.close()
 
 def save_user_submission(
     user_id: int,
@@ -47,25 +51,11 @@ def save_user_submission(
     cursor = conn.cursor()
     meta_json = json.dumps(metadata) if metadata else None
     try:
-        # Check if table exists, if not create it (safe fallback for legacy schema)
-        if is_postgres_backend():
-            cursor.execute(
-                "CREATE TABLE IF NOT EXISTS user_submissions ("
-                "id BIGSERIAL PRIMARY KEY, "
-                "user_id BIGINT, module TEXT, content TEXT, level TEXT, "
-                "metadata TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
-            )
-        else:
-            cursor.execute(
-                "CREATE TABLE IF NOT EXISTS user_submissions ("
-                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
-                "user_id INTEGER, module TEXT, content TEXT, level TEXT, "
-                "metadata TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
-            )
         cursor.execute("""
             INSERT INTO user_submissions (user_id, module, content, level, metadata)
             VALUES (?, ?, ?, ?, ?)
         """, (user_id, module, content, level, meta_json))
+        record_submission_summary(cursor, user_id, module)
         conn.commit()
     except Exception as e:
         logging.error(f"Error saving user submission: {e}")
@@ -73,7 +63,7 @@ def save_user_submission(
         conn.close()
 
 def get_recent_submissions(user_id: int, limit: int = 5):
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
     try:
         cursor.execute("SELECT * FROM user_submissions WHERE user_id = ? ORDER BY created_at DESC LIMIT ?", (user_id, limit))
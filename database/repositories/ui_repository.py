@@ -1,27 +1,39 @@
 from database.connection import get_connection
-import logging
+from database.notify import notify
 
-def get_ui_state(user_id: int, key: str):
-    conn = get_connection()
+UI_MESSAGES_INVALIDATE_CHANNEL = "ui_messages_invalidate"
+
+def get_ui_messages(user_id: int) -> tuple[int | None, int | None]:
+    """(main menu message id, active message id) for the user."""
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
-    cursor.execute("SELECT val FROM ui_state WHERE user_id = ? AND key = ?", (user_id, key))
-    row = cursor.fetchone()
-    conn.close()
-    return row[0] if row else None
+    try:
+        cursor.execute("SELECT main_menu_msg_id, active_msg_id FROM ui_messages WHERE user_id = ?", (user_id,))
+        row = cursor.fetchone()
+    finally:
+        conn.close()
+    return (row[0], row[1]) if row else (None, None)
 
-def set_ui_state(user_id: int, key: str, value: str):
+def save_ui_messages(rows: list[tuple[int, int | None, int | None]]):
+    """
+    Upserts (user_id, main_menu_msg_id, active_msg_id) rows in one
+    transaction; raises on failure so the caller can retry.
+    """
+    if not rows:
+        return
     conn = get_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("""
-            INSERT INTO ui_state (user_id, key, val)
+        cursor.executemany("""
+            INSERT INTO ui_messages (user_id, main_menu_msg_id, active_msg_id)
             VALUES (?, ?, ?)
-            ON CONFLICT(user_id, key) DO UPDATE SET
-                val = excluded.val,
+            ON CONFLICT(user_id) DO UPDATE SET
+                main_menu_msg_id = excluded.main_menu_msg_id,
+                active_msg_id = excluded.active_msg_id,
                 updated_at = CURRENT_TIMESTAMP
-        """, (user_id, key, str(value)))
+        """, rows)
+        for user_id, _, _ in rows:
+            notify(cursor, UI_MESSAGES_INVALIDATE_CHANNEL, str(user_id))
         conn.commit()
-    except Exception as e:
-        logging.error(f"Error setting UI state for {user_id}/{key}: {e}")
     finally:
         conn.close()
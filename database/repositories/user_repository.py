@@ -1,5 +1,15 @@
 from database.connection import get_connection
 from database.connection import is_postgres_backend
+from database.notify import notify
+from database.profile_cache import (
+    PROFILE_INVALIDATE_CHANNEL,
+    cache_profile,
+    forget_profile_on_rollback,
+    get_cached_profile,
+    invalidate_profile,
+    profile_cache_generation,
+)
+from database.repositories.activity_repository import record_new_user
 import datetime
 import logging
 
@@ -21,49 +31,61 @@ def _normalize_date(value) -> datetime.date | None:
 
 
 def add_user(user_id: int, full_name: str, username: str | None = None):
-    conn = get_connection()
+    # Optional: update name if needed, but keeping it simple as per original logic
+    ensure_user_profile(user_id)
+
+def get_user_profile(user_id: int):
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
     try:
-        cursor.execute("""
-            INSERT INTO user_profile (user_id)
-            VALUES (?)
-            ON CONFLICT(user_id) DO NOTHING
-        """, (user_id,))
-        # Optional: update name if needed, but keeping it simple as per original logic
-        conn.commit()
-    except Exception as e:
-        logging.error(f"Error adding user {user_id}: {e}")
+        cursor.execute("SELECT * FROM user_profile WHERE user_id = ?", (user_id,))
+        row = cursor.fetchone()
     finally:
         conn.close()
-
-def get_user_profile(user_id: int):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM user_profile WHERE user_id = ?", (user_id,))
-    row = cursor.fetchone()
-    conn.close()
     return dict(row) if row else None
 
-def get_or_create_user_profile(user_id: int):
+def ensure_user_profile(user_id: int) -> tuple[dict | None, bool]:
+    """
+    Returns (profile, created). Served from the profile cache when possible;
+    otherwise one read, plus a single INSERT ... RETURNING * for a new user.
+    """
+    cached = get_cached_profile(user_id)
+    if cached is not None:
+        return cached, False
+    generation = profile_cache_generation()
     profile = get_user_profile(user_id)
+    created = False
+    if not profile:
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "INSERT INTO user_profile (user_id) VALUES (?) "
+                "ON CONFLICT(user_id) DO NOTHING RETURNING *",
+                (user_id,),
+            )
+            row = cursor.fetchone()
+            if row:
+                profile = dict(row)
+                created = True
+                record_new_user(cursor)
+            conn.commit()
+        except Exception as e:
+            logging.error(f"Error creating user profile: {e}")
+        finally:
+            conn.close()
+        if profile is None:
+            # Created concurrently by another update
+            profile = get_user_profile(user_id)
     if profile:
-        return profile
-    
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute(
-            "INSERT INTO user_profile (user_id) VALUES (?) "
-            "ON CONFLICT(user_id) DO NOTHING",
-            (user_id,),
-        )
-        conn.commit()
-    except Exception as e:
-        logging.error(f"Error creating user profile: {e}")
-    finally:
-        conn.close()
-    
-    return get_user_profile(user_id)
+        cache_profile(user_id, profile, generation)
+        if created:
+            # Not in the database until the update's unit of work commits
+            forget_profile_on_rollback(user_id)
+    return profile, created
+
+def get_or_create_user_profile(user_id: int):
+    return ensure_user_profile(user_id)[0]
 
 def update_user_profile(user_id: int, **kwargs):
     if not kwargs:
@@ -78,18 +100,22 @@ def update_user_profile(user_id: int, **kwargs):
     
     try:
         cursor.execute(f"UPDATE user_profile SET {fields}, updated_at = CURRENT_TIMESTAMP WHERE user_id = ?", values)
+        notify(cursor, PROFILE_INVALIDATE_CHANNEL, str(user_id))
         conn.commit()
+        invalidate_profile(user_id)
     except Exception as e:
         logging.error(f"Error updating user profile {user_id}: {e}")
     finally:
         conn.close()
 
 def get_days_since_first_use(user_id: int):
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
-    cursor.execute("SELECT created_at FROM user_profile WHERE user_id = ?", (user_id,))
-    row = cursor.fetchone()
-    conn.close()
+    try:
+        cursor.execute("SELECT created_at FROM user_profile WHERE user_id = ?", (user_id,))
+        row = cursor.fetchone()
+    finally:
+        conn.close()
     
     if not row:
         return 0
@@ -112,19 +138,26 @@ def get_days_since_first_use(user_id: int):
         return 0
 
 def get_subscribed_users():
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
-    cursor.execute("SELECT user_id FROM user_profile")
-    rows = cursor.fetchall()
-    conn.close()
+    try:
+        cursor.execute("SELECT user_id FROM user_profile WHERE broadcast_unsubscribed_at IS NULL")
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
     return [row[0] for row in rows]
 
 def get_subscribed_users_for_time(time_str: str):
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
-    cursor.execute("SELECT user_id FROM user_profile WHERE notification_time = ?", (time_str,))
-    rows = cursor.fetchall()
-    conn.close()
+    try:
+        cursor.execute(
+            "SELECT user_id FROM user_profile WHERE notification_time = ? AND broadcast_unsubscribed_at IS NULL",
+            (time_str,),
+        )
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
     return [row[0] for row in rows]
 
 def update_streak(user_id: int):
@@ -170,7 +203,9 @@ def update_xp(user_id: int, amount: int):
     cursor = conn.cursor()
     try:
         cursor.execute("UPDATE user_profile SET xp = xp + ? WHERE user_id = ?", (amount, user_id))
+        notify(cursor, PROFILE_INVALIDATE_CHANNEL, str(user_id))
         conn.commit()
+        invalidate_profile(user_id)
     except Exception as e:
         logging.error(f"Error updating XP: {e}")
     finally:
@@ -1,125 +1,112 @@
-from database.connection import get_connection
-from database.connection import is_postgres_backend
+from database.connection import get_connection, is_postgres_backend
+from database.word_catalog import get_word_catalog, invalidate_word_catalog
+from utils.text_folding import search_text, word_search_key, word_sort_key
 import logging
+import random
+import re
+from typing import Collection
+
+_SEARCH_TOKEN_RE = re.compile(r"[^\W_]+")
+# Exact match on either language first, then entries starting with the whole query.
+_SEARCH_RANK = """
+    CASE WHEN w.search_de = ? OR w.search_uz = ? THEN 0
+         WHEN substr(w.search_de, 1, ?) = ? OR substr(w.search_uz, 1, ?) = ? THEN 1
+         ELSE 2 END
+"""
 
 def get_words_by_level(level: str, limit: int = 20, offset: int = 0):
-    conn = get_connection()
-    cursor = conn.cursor()
-    if is_postgres_backend():
-        cursor.execute(
-            """
-            SELECT * FROM words
-            WHERE level = ?
-            ORDER BY LOWER(de), de
-            LIMIT ? OFFSET ?
-            """,
-            (level, limit, offset),
-        )
-    else:
-        cursor.execute("""
-            SELECT * FROM words 
-            WHERE level = ? 
-            ORDER BY de COLLATE NOCASE
-            LIMIT ? OFFSET ?
-        """, (level, limit, offset))
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    catalog = get_word_catalog()
+    return [record.as_dict() for record in catalog.page(level, offset=offset, limit=limit)]
 
 def get_words_by_level_and_letter(level: str, letter: str, limit: int = 20, offset: int = 0):
-    conn = get_connection()
-    cursor = conn.cursor()
-    pattern = f"{letter.lower()}%"
-    p_der = f"der {letter.lower()}%"
-    p_die = f"die {letter.lower()}%"
-    p_das = f"das {letter.lower()}%"
-    if is_postgres_backend():
-        cursor.execute(
-            """
-            SELECT * FROM words
-            WHERE level = ? AND (
-                LOWER(de) LIKE ? OR
-                LOWER(de) LIKE ? OR
-                LOWER(de) LIKE ? OR
-                LOWER(de) LIKE ?
-            )
-            ORDER BY LOWER(de), de
-            LIMIT ? OFFSET ?
-            """,
-            (level, pattern, p_der, p_die, p_das, limit, offset),
-        )
-    else:
-        cursor.execute("""
-            SELECT * FROM words 
-            WHERE level = ? AND (
-                LOWER(de) LIKE ? OR 
-                LOWER(de) LIKE ? OR 
-                LOWER(de) LIKE ? OR 
-                LOWER(de) LIKE ?
-            )
-            ORDER BY de COLLATE NOCASE
-            LIMIT ? OFFSET ?
-        """, (level, pattern, p_der, p_die, p_das, limit, offset))
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    catalog = get_word_catalog()
+    return [record.as_dict() for record in catalog.page(level, offset=offset, limit=limit, letter=letter)]
 
 def get_total_words_count(level: str) -> int:
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM words WHERE level = ?", (level,))
-    count = cursor.fetchone()[0]
-    conn.close()
-    return count
+    return get_word_catalog().count(level)
 
 def get_total_words_count_by_letter(level: str, letter: str) -> int:
-    conn = get_connection()
-    cursor = conn.cursor()
-    pattern = f"{letter.lower()}%"
-    p_der = f"der {letter.lower()}%"
-    p_die = f"die {letter.lower()}%"
-    p_das = f"das {letter.lower()}%"
-    cursor.execute("""
-        SELECT COUNT(*) FROM words 
-        WHERE level = ? AND (
-            LOWER(de) LIKE ? OR 
-            LOWER(de) LIKE ? OR 
-            LOWER(de) LIKE ? OR 
-            LOWER(de) LIKE ?
-        )
-    """, (level, pattern, p_der, p_die, p_das))
-    count = cursor.fetchone()[0]
-    conn.close()
-    return count
+    return get_word_catalog().count_by_letter(level, letter)
 
-def get_random_words(level: str, limit: int = 10):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM words WHERE level = ? ORDER BY RANDOM() LIMIT ?", (level, limit))
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+def get_random_words(
+    level: str,
+    limit: int = 10,
+    exclude_ids: Collection[int] | None = None,
+    rng: random.Random | None = None,
+):
+    catalog = get_word_catalog()
+    picked = catalog.sample_ids(level, limit, exclude=_as_id_set(exclude_ids), rng=rng)
+    return [catalog.get(word_id).as_dict() for word_id in picked]
+
+def _as_id_set(word_ids) -> set[int] | None:
+    if not word_ids:
+        return None
+    ids = set()
+    for word_id in word_ids:
+        try:
+            ids.add(int(word_id))
+        except (TypeError, ValueError):
+            continue
+    return ids
 
 def get_words_by_ids(word_ids: list):
     if not word_ids:
         return []
-    conn = get_connection()
+    return [record.as_dict() for record in get_word_catalog().get_many(word_ids)]
+
+def search_word_ids(query: str, level: str | None = None, limit: int = 10) -> list[int]:
+    """
+    Ids of words whose German or Uzbek search form matches query, best first.
+    Every query token matches as a prefix (FTS5 on SQLite, trigram GIN on
+    Postgres); exact and whole-query prefix hits outrank the text score.
+    """
+    tokens = _SEARCH_TOKEN_RE.findall(word_search_key(query))
+    if not tokens or limit <= 0:
+        return []
+    needle = " ".join(tokens)
+    rank_params = (needle, needle, len(needle), needle, len(needle), needle)
+    level_sql = " AND w.level = ?" if level else ""
+    level_params = (level,) if level else ()
+
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
-    placeholders = ",".join(["?"] * len(word_ids))
-    cursor.execute(f"SELECT * FROM words WHERE id IN ({placeholders})", word_ids)
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    try:
+        if is_postgres_backend():
+            prefix = needle + "%"
+            cursor.execute(f"""
+                SELECT w.id FROM words w
+                WHERE (w.search_de LIKE ? OR w.search_uz LIKE ? OR w.search_de %% ? OR w.search_uz %% ?){level_sql}
+                ORDER BY {_SEARCH_RANK},
+                    GREATEST(similarity(w.search_de, ?), similarity(w.search_uz, ?)) DESC,
+                    length(w.search_de), w.id
+                LIMIT ?
+            """, (prefix, prefix, needle, needle, *level_params, *rank_params, needle, needle, limit))
+        else:
+            match = " ".join(f'"{token}"*' for token in tokens)
+            cursor.execute(f"""
+                SELECT w.id FROM words_fts
+                JOIN words w ON w.id = words_fts.rowid
+                WHERE words_fts MATCH ?{level_sql}
+                ORDER BY {_SEARCH_RANK}, bm25(words_fts), length(w.search_de), w.id
+                LIMIT ?
+            """, (match, *level_params, *rank_params, limit))
+        return [int(row[0]) for row in cursor.fetchall()]
+    finally:
+        conn.close()
 
 def add_word(level, de, uz, pos, plural="", example_de="", example_uz="", category=""):
     conn = get_connection()
     cursor = conn.cursor()
     try:
         cursor.execute("""
-            INSERT INTO words (level, de, uz, pos, plural, example_de, example_uz, category)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (level, de, uz, pos, plural, example_de, example_uz, category))
+            INSERT INTO words (level, de, uz, pos, plural, example_de, example_uz, category, sort_key, search_de, search_uz)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            level, de, uz, pos, plural, example_de, example_uz, category,
+            word_sort_key(de), word_search_key(de), search_text(uz),
+        ))
         conn.commit()
+        invalidate_word_catalog()
     except Exception as e:
         logging.error(f"Error adding word {de}: {e}")
     finally:
@@ -0,0 +1,133 @@
+"""
+Write-behind buffer for quiz answers.
+
+Answers are queued per user in process memory, not in the FSM data, so a
+state.clear() anywhere in the bot (/start, another module, a new quiz)
+cannot drop them. A background task writes everything queued every
+QUIZ_REVIEW_FLUSH_INTERVAL_MS, one record_reviews_bulk transaction per user;
+finishing a quiz writes that user's answers at once. Without a running
+flusher (scripts, tests, jobs outside the bot) answers are written
+immediately.
+"""
+import asyncio
+import logging
+import threading
+from typing import Any
+
+from core.config import settings
+from database.aio import run_db
+from database.repositories.mastery_repository import record_reviews_bulk
+
+Review = tuple[int, bool]
+
+
+class ReviewBuffer:
+    def __init__(self, flush_interval_ms: int):
+        self.flush_interval = max(0, flush_interval_ms) / 1000
+        self._pending: dict[int, list[Review]] = {}
+        self._lock = threading.Lock()
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self.flushed_reviews = 0
+        self.failed_flushes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._wake = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="review-flusher")
+
+    async def stop(self, timeout: float = 10.0):
+        """Writes all queued answers, then stops the flusher."""
+        task = self._task
+        if task is None:
+            return
+        self._closing = True
+        if not task.done():
+            self._wake.set()
+            try:
+                await asyncio.wait_for(task, timeout)
+            except asyncio.TimeoutError:
+                logging.error("Review flush on shutdown timed out; users=%s", len(self._pending))
+        self._task = None
+        self._wake = None
+
+    async def add(self, user_id: int, item_id: int, correct: bool):
+        if self.running and not self._closing:
+            with self._lock:
+                self._pending.setdefault(user_id, []).append((item_id, bool(correct)))
+            return
+        await run_db(record_reviews_bulk, user_id, [(item_id, bool(correct))])
+
+    async def flush_user(self, user_id: int):
+        with self._lock:
+            reviews = self._pending.pop(user_id, None)
+        if reviews:
+            await self._write({user_id: reviews})
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval or None)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self._flush()
+        await self._flush()
+
+    async def _flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if batch:
+            await self._write(batch)
+
+    async def _write(self, batch: dict[int, list[Review]]):
+        for user_id, reviews in batch.items():
+            try:
+                await run_db(record_reviews_bulk, user_id, reviews)
+                self.flushed_reviews += len(reviews)
+            except Exception as exc:
+                self.failed_flushes += 1
+                logging.error("Review flush of %s answers for %s failed: %s", len(reviews), user_id, exc)
+                with self._lock:
+                    # Ahead of anything queued since, so answers stay in order
+                    self._pending[user_id] = reviews + self._pending.get(user_id, [])
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            pending = sum(len(reviews) for reviews in self._pending.values())
+        return {
+            "running": self.running,
+            "pending": pending,
+            "flushed_reviews": self.flushed_reviews,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+_BUFFER = ReviewBuffer(settings.quiz_review_flush_interval_ms)
+
+
+async def record_quiz_answer(user_id: int, item_id: int, correct: bool):
+    await _BUFFER.add(user_id, item_id, correct)
+
+
+async def flush_quiz_answers(user_id: int):
+    await _BUFFER.flush_user(user_id)
+
+
+async def start_review_buffer():
+    _BUFFER.start()
+
+
+async def stop_review_buffer():
+    await _BUFFER.stop()
+
+
+def get_review_buffer_stats() -> dict[str, Any]:
+    return _BUFFER.stats()
@@ -0,0 +1,201 @@
+"""
+Write-behind buffer for telemetry rows (navigation_logs, event_logs).
+
+Repository calls hand rows to the buffer instead of inserting them on the
+user's path; a background task drains it every TELEMETRY_FLUSH_INTERVAL_MS
+or TELEMETRY_BATCH_SIZE rows and writes each table with multi-row INSERTs in
+one transaction. When TELEMETRY_BUFFER_SIZE rows are waiting, new rows are
+dropped and counted rather than slowing updates down. Without a running
+buffer (scripts, tests, jobs outside the bot) callers write directly.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any
+
+from core.config import settings
+from database.aio import run_db
+
+TELEMETRY_COLUMNS = {
+    "navigation_logs": ("user_id", "section_name", "level", "entry_type"),
+    "event_logs": ("user_id", "event_type", "section_name", "level", "metadata"),
+}
+_STOP = object()
+
+
+class TelemetryBuffer:
+    def __init__(self, max_size: int, batch_size: int, flush_interval_ms: int):
+        self.max_size = max(1, max_size)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0, flush_interval_ms) / 1000
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._queue: asyncio.Queue | None = None
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self._lock = threading.Lock()
+        # Rows accepted but not yet written, including the batch in flight.
+        self._depth = 0
+        self.enqueued = 0
+        self.dropped = 0
+        self.flushed_rows = 0
+        self.failed_rows = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._queue = asyncio.Queue()
+        self._wake = asyncio.Event()
+        self._closing = False
+        self._task = self._loop.create_task(self._run(), name="telemetry-flusher")
+
+    def submit(self, table: str, row: tuple) -> bool:
+        """
+        Queues one row from any thread. Returns False when the buffer is not
+        running and the caller should write the row itself; True means the
+        buffer took it (or dropped it under overload).
+        """
+        loop, queue = self._loop, self._queue
+        if loop is None or queue is None or self._closing or not self.running:
+            return False
+        with self._lock:
+            if self._depth >= self.max_size:
+                self.dropped += 1
+                return True
+            self._depth += 1
+            self.enqueued += 1
+        item = (table, row)
+        try:
+            if threading.get_ident() == self._loop_thread_id:
+                self._put(item)
+            else:
+                loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:
+            # Loop already closed during shutdown
+            with self._lock:
+                self._depth -= 1
+                self.enqueued -= 1
+            return False
+        return True
+
+    def _put(self, item):
+        self._queue.put_nowait(item)
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+
+    async def stop(self, timeout: float = 10.0):
+        """Writes everything still queued, then stops the flusher."""
+        task, queue = self._task, self._queue
+        if task is None or queue is None:
+            return
+        # Rows submitted from now on are written directly by their callers
+        self._closing = True
+        if not task.done():
+            queue.put_nowait(_STOP)
+            self._wake.set()
+            try:
+                await asyncio.wait_for(task, timeout)
+            except asyncio.TimeoutError:
+                logging.error("Telemetry flush on shutdown timed out; depth=%s", self._depth)
+        self._task = None
+        self._loop = None
+        self._queue = None
+        self._wake = None
+
+    async def _run(self):
+        queue = self._queue
+        stopping = False
+        while not stopping:
+            item = await queue.get()
+            if item is not _STOP and self.flush_interval and queue.qsize() < self.batch_size - 1:
+                # Wait for more rows unless a full batch or stop() wakes us first
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wake.clear()
+            batch = []
+            while item is not None:
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+                if len(batch) >= self.batch_size and not stopping:
+                    break
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    item = None
+            for start in range(0, len(batch), self.batch_size):
+                await self._flush(batch[start:start + self.batch_size])
+
+    async def _flush(self, batch: list[tuple[str, tuple]]):
+        from database.repositories.progress_repository import insert_telemetry_rows
+
+        rows_by_table: dict[str, list[tuple]] = {}
+        for table, row in batch:
+            rows_by_table.setdefault(table, []).append(row)
+        started = time.perf_counter()
+        try:
+            await run_db(insert_telemetry_rows, rows_by_table)
+            self.flushed_rows += len(batch)
+        except Exception as exc:
+            self.failed_rows += len(batch)
+            logging.error("Telemetry flush of %s rows failed: %s", len(batch), exc)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._depth -= len(batch)
+        self.flushes += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "depth": self._depth,
+            "capacity": self.max_size,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "flushed_rows": self.flushed_rows,
+            "failed_rows": self.failed_rows,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
+
+_BUFFER = TelemetryBuffer(
+    settings.telemetry_buffer_size,
+    settings.telemetry_batch_size,
+    settings.telemetry_flush_interval_ms,
+)
+
+
+def submit_telemetry(table: str, row: tuple) -> bool:
+    return _BUFFER.submit(table, row)
+
+
+async def start_telemetry():
+    _BUFFER.start()
+
+
+async def stop_telemetry():
+    await _BUFFER.stop()
+
+
+def get_telemetry_stats() -> dict[str, Any]:
+    return _BUFFER.stats()
@@ -0,0 +1,192 @@
+"""
+Write-back cache for the two tracked UI messages per user (main menu and the
+active screen), stored in one ui_messages row.
+
+Reads are served from an in-process LRU, so a screen change reads nothing
+from the database once the user is cached. Changes are queued per user and
+written by a background task every UI_MESSAGES_FLUSH_INTERVAL_MS; several
+changes in one interval coalesce into one upsert. Without a running flusher
+(scripts, tests, jobs outside the bot) changes are written immediately.
+On Postgres, other instances drop their copy when a row is written.
+"""
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from core.config import settings
+from database.aio import run_db
+from database.notify import subscribe
+from database.repositories.ui_repository import (
+    UI_MESSAGES_INVALIDATE_CHANNEL,
+    get_ui_messages,
+    save_ui_messages,
+)
+
+UiMessages = tuple[int | None, int | None]
+_UNSET: Any = object()
+
+
+class UiMessageTracker:
+    def __init__(self, cache_size: int, flush_interval_ms: int):
+        self.cache_size = max(1, cache_size)
+        self.flush_interval = max(0, flush_interval_ms) / 1000
+        self._cache: OrderedDict[int, UiMessages] = OrderedDict()
+        # Changes not written yet; authoritative over _cache and never evicted
+        self._pending: dict[int, UiMessages] = {}
+        self._lock = threading.Lock()
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self.hits = 0
+        self.misses = 0
+        self.flushed_rows = 0
+        self.failed_flushes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._wake = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="ui-messages-flusher")
+
+    async def stop(self, timeout: float = 10.0):
+        """Writes all pending changes, then stops the flusher."""
+        task = self._task
+        if task is None:
+            return
+        self._closing = True
+        if not task.done():
+            self._wake.set()
+            try:
+                await asyncio.wait_for(task, timeout)
+            except asyncio.TimeoutError:
+                logging.error("UI message flush on shutdown timed out; pending=%s", len(self._pending))
+        self._task = None
+        self._wake = None
+
+    async def get(self, user_id: int) -> UiMessages:
+        cached = self._lookup(user_id)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        row = await run_db(get_ui_messages, user_id)
+        self._remember(user_id, row, fill=True)
+        return self._lookup(user_id) or row
+
+    async def update(self, user_id: int, main_menu_id: Any = _UNSET, active_id: Any = _UNSET):
+        current = await self.get(user_id)
+        new = (
+            current[0] if main_menu_id is _UNSET else main_menu_id,
+            current[1] if active_id is _UNSET else active_id,
+        )
+        if new == current:
+            return
+        self._remember(user_id, new)
+        if self.running and not self._closing:
+            with self._lock:
+                self._pending[user_id] = new
+            return
+        await run_db(save_ui_messages, [(user_id, *new)])
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            if user_id not in self._pending:
+                self._cache.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _on_remote_write(self, payload: str):
+        try:
+            self.invalidate(int(payload))
+        except ValueError:
+            self.clear()
+
+    def _lookup(self, user_id: int) -> UiMessages | None:
+        with self._lock:
+            pending = self._pending.get(user_id)
+            if pending is not None:
+                return pending
+            cached = self._cache.get(user_id)
+            if cached is not None:
+                self._cache.move_to_end(user_id)
+            return cached
+
+    def _remember(self, user_id: int, value: UiMessages, fill: bool = False):
+        with self._lock:
+            # A read that raced a newer update must not overwrite it
+            if fill and (user_id in self._cache or user_id in self._pending):
+                return
+            self._cache[user_id] = value
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval or None)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self._flush()
+        await self._flush()
+
+    async def _flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        try:
+            await run_db(save_ui_messages, [(user_id, *value) for user_id, value in batch.items()])
+            self.flushed_rows += len(batch)
+        except Exception as exc:
+            self.failed_flushes += 1
+            logging.error("UI message flush of %s rows failed: %s", len(batch), exc)
+            with self._lock:
+                for user_id, value in batch.items():
+                    self._pending.setdefault(user_id, value)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "running": self.running,
+            "size": len(self._cache),
+            "capacity": self.cache_size,
+            "pending": len(self._pending),
+            "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0.0,
+            "flushed_rows": self.flushed_rows,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+_TRACKER = UiMessageTracker(settings.ui_messages_cache_size, settings.ui_messages_flush_interval_ms)
+subscribe(UI_MESSAGES_INVALIDATE_CHANNEL, _TRACKER._on_remote_write, on_reset=_TRACKER.clear)
+
+
+async def get_tracked_ui_messages(user_id: int) -> UiMessages:
+    return await _TRACKER.get(user_id)
+
+
+async def track_ui_messages(user_id: int, main_menu_id: Any = _UNSET, active_id: Any = _UNSET):
+    await _TRACKER.update(user_id, main_menu_id=main_menu_id, active_id=active_id)
+
+
+async def start_ui_message_tracker():
+    _TRACKER.start()
+
+
+async def stop_ui_message_tracker():
+    await _TRACKER.stop()
+
+
+def get_ui_message_tracker_stats() -> dict[str, Any]:
+    return _TRACKER.stats()
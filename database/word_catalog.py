@@ -0,0 +1,194 @@
+import random
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from typing import Any, Collection, Iterable
+
+from core.config import settings
+from database.connection import get_connection
+from utils.sampling import sample_distinct
+from utils.text_folding import fold_text, word_sort_key
+
+WORD_FIELDS = ("id", "de", "uz", "level", "pos", "example_de", "example_uz", "category", "plural")
+
+
+class WordRecord:
+    """
+    One row of words. An optional trailing sort_key column is taken from the
+    row; rows written before it existed get it computed from de.
+    """
+    __slots__ = WORD_FIELDS + ("sort_key",)
+
+    def __init__(self, row: Any):
+        for i, field in enumerate(WORD_FIELDS):
+            setattr(self, field, row[i])
+        stored_key = row[len(WORD_FIELDS)] if len(row) > len(WORD_FIELDS) else None
+        self.sort_key = stored_key or word_sort_key(self.de)
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in WORD_FIELDS}
+
+
+def _dictionary_order(record: WordRecord):
+    return (record.sort_key, int(record.id))
+
+
+def _letter_of(record: WordRecord) -> str:
+    return record.sort_key[:1]
+
+
+class WordCatalog:
+    """
+    Immutable in-memory snapshot of the words table.
+    Per-level and per-(level, letter) ids are kept in (sort_key, id) order in
+    compact arrays built once at load, so counts are O(1) and keyset pages
+    are a bisect plus a slice. Records are shared, so callers get fresh dicts
+    from as_dict() and cannot mutate it.
+    """
+
+    def __init__(self, records: Iterable[WordRecord], fingerprint: tuple[int, int] = (0, 0)):
+        self.fingerprint = fingerprint
+        self._by_id: dict[int, WordRecord] = {}
+        by_level: dict[str, list[WordRecord]] = {}
+        for record in records:
+            self._by_id[int(record.id)] = record
+            by_level.setdefault(record.level, []).append(record)
+        self._level_ids: dict[str, array] = {}
+        self._letter_ids: dict[tuple[str, str], array] = {}
+        for level, level_records in by_level.items():
+            level_records.sort(key=_dictionary_order)
+            self._level_ids[level] = array("q", (int(r.id) for r in level_records))
+            for record in level_records:
+                key = (level, _letter_of(record))
+                bucket = self._letter_ids.get(key)
+                if bucket is None:
+                    bucket = self._letter_ids[key] = array("q")
+                bucket.append(int(record.id))
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, word_id: int) -> WordRecord | None:
+        try:
+            return self._by_id.get(int(word_id))
+        except (TypeError, ValueError):
+            return None
+
+    def get_many(self, word_ids: Iterable[Any]) -> list[WordRecord]:
+        """Records for the given ids in request order; unknown and repeated ids are skipped."""
+        seen = set()
+        records = []
+        for word_id in word_ids:
+            record = self.get(word_id)
+            if record is None or record.id in seen:
+                continue
+            seen.add(record.id)
+            records.append(record)
+        return records
+
+    def level_ids(self, level: str) -> array:
+        return self._level_ids.get(level, array("q"))
+
+    def count(self, level: str) -> int:
+        return len(self.level_ids(level))
+
+    def letter_ids(self, level: str, letter: str) -> array:
+        return self._letter_ids.get((level, fold_text(letter)[:1]), array("q"))
+
+    def count_by_letter(self, level: str, letter: str) -> int:
+        return len(self.letter_ids(level, letter))
+
+    def _ids_for(self, level: str, letter: str | None) -> array:
+        return self.letter_ids(level, letter) if letter else self.level_ids(level)
+
+    def page(self, level: str, offset: int = 0, limit: int = 20, letter: str | None = None) -> list[WordRecord]:
+        ids = self._ids_for(level, letter)
+        start = max(0, offset)
+        return [self._by_id[wid] for wid in ids[start:start + max(0, limit)]]
+
+    def position_after(self, level: str, after_id: int, letter: str | None = None) -> int:
+        """
+        Index of the first entry that sorts after word after_id, i.e. the
+        start of the keyset page following it. Unknown ids restart at 0.
+        """
+        record = self.get(after_id)
+        if record is None:
+            return 0
+        by_id = self._by_id
+        return bisect_right(
+            self._ids_for(level, letter),
+            _dictionary_order(record),
+            key=lambda wid: _dictionary_order(by_id[wid]),
+        )
+
+    def sample_ids(
+        self,
+        level: str,
+        k: int,
+        exclude: Collection[int] | None = None,
+        rng: random.Random | None = None,
+    ) -> list[int]:
+        """Up to k distinct random ids of a level, drawn in O(k) and skipping exclude."""
+        return sample_distinct(self.level_ids(level), k, exclude=exclude, rng=rng)
+
+
+_CATALOG: WordCatalog | None = None
+_CATALOG_CHECKED_AT = 0.0
+_CATALOG_LOCK = threading.Lock()
+
+
+def _read_fingerprint(cursor) -> tuple[int, int]:
+    cursor.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM words")
+    row = cursor.fetchone()
+    return int(row[0] or 0), int(row[1] or 0)
+
+
+def load_word_catalog() -> WordCatalog:
+    """Reads the whole words table and makes it the process-wide catalog."""
+    global _CATALOG, _CATALOG_CHECKED_AT
+    conn = get_connection(readonly=True)
+    try:
+        cursor = conn.cursor()
+        fingerprint = _read_fingerprint(cursor)
+        cursor.execute(f"SELECT {', '.join(WORD_FIELDS)}, sort_key FROM words")
+        catalog = WordCatalog((WordRecord(row) for row in cursor.fetchall()), fingerprint)
+    finally:
+        conn.close()
+    with _CATALOG_LOCK:
+        _CATALOG = catalog
+        _CATALOG_CHECKED_AT = time.monotonic()
+    return catalog
+
+
+def invalidate_word_catalog():
+    """Forces the next get_word_catalog() call to re-check the words table."""
+    global _CATALOG_CHECKED_AT
+    _CATALOG_CHECKED_AT = 0.0
+
+
+def get_word_catalog() -> WordCatalog:
+    """
+    Returns the current catalog, loading it on first use.
+    Every WORD_CATALOG_REFRESH_SECONDS the (count, max id) fingerprint of the
+    words table is compared and the catalog is rebuilt when it changed, which
+    picks up imports done by other processes.
+    """
+    global _CATALOG_CHECKED_AT
+    catalog = _CATALOG
+    if catalog is None:
+        return load_word_catalog()
+    if time.monotonic() - _CATALOG_CHECKED_AT < max(0, settings.word_catalog_refresh_seconds):
+        return catalog
+    with _CATALOG_LOCK:
+        if _CATALOG is not catalog or time.monotonic() - _CATALOG_CHECKED_AT < max(0, settings.word_catalog_refresh_seconds):
+            return _CATALOG or catalog
+        _CATALOG_CHECKED_AT = time.monotonic()
+    conn = get_connection(readonly=True)
+    try:
+        fingerprint = _read_fingerprint(conn.cursor())
+    finally:
+        conn.close()
+    if fingerprint == catalog.fingerprint:
+        return catalog
+    return load_word_catalog()
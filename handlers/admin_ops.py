@@ -1,9 +1,9 @@
 import os
 import datetime
-import asyncio
 import json
 from aiogram import Router, F
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, FSInputFile
 
 from core.config import settings
@@ -13,9 +13,18 @@ from database.repositories.admin_repository import (
     get_recent_ops_errors,
     get_users_count,
 )
-from database.repositories.user_repository import add_user, get_or_create_user_profile, get_subscribed_users
+from database.repositories.user_repository import add_user, get_or_create_user_profile
 from database.repositories.broadcast_repository import get_broadcast_queue_counts
+from database.aio import run_db
 from database.connection import get_connection, is_postgres_backend
+from database.profile_cache import get_profile_cache_stats
+from database.telemetry import get_telemetry_stats
+from database.review_buffer import get_review_buffer_stats
+from database.ui_messages import get_ui_message_tracker_stats
+from utils.broadcast_campaigns import cancel_announcement, resume_announcement, start_announcement
+from utils.broadcast_sender import get_broadcast_sender_stats
+from utils.broadcast_worker import get_broadcast_queue_lag_seconds, get_broadcast_worker_stats
+from utils.db_fsm_storage import DBFSMStorage
 from utils.ui_utils import send_single_ui_message
 from utils.backup_manager import (
     run_backup_async,
@@ -42,15 +51,20 @@ def _is_admin_message(message: Message) -> bool:
     return bool(message.from_user and _is_admin(message.from_user.id))
 
 
+def _touch_admin_user(user_id: int, full_name: str, username: str | None):
+    add_user(user_id, full_name, username)
+    get_or_create_user_profile(user_id)
+
+
 async def _ensure_admin(message: Message) -> bool:
     if _is_admin_message(message):
         if message.from_user:
-            add_user(
+            await run_db(
+                _touch_admin_user,
                 message.from_user.id,
                 message.from_user.full_name,
                 message.from_user.username,
             )
-            get_or_create_user_profile(message.from_user.id)
         return True
     await send_single_ui_message(
         message,
@@ -67,24 +81,42 @@ def _format_dt_local(epoch_ts: float | None) -> str:
     except Exception:
         return "-"
 
+def _read_db_source() -> str:
+    conn = None
+    try:
+        conn = get_connection(readonly=True)
+        cur = conn.cursor()
+        if is_postgres_backend():
+            cur.execute("SELECT current_database(), current_user")
+            src = cur.fetchone()
+            return f"db={src[0]}, user={src[1]}"
+        return f"file={settings.db_path}"
+    except Exception as exc:
+        return f"error={exc}"
+    finally:
+        try:
+            if conn:
+                conn.close()
+        except Exception:
+            pass
+
+
 @router.message(Command("health"))
-async def health_cmd(message: Message):
+async def health_cmd(message: Message, fsm_storage: BaseStorage | None = None):
     if not await _ensure_admin(message):
         return
 
     me = await message.bot.get_me()
     uptime_seconds = get_uptime_seconds()
-    last_update = get_last_update_handled_iso() or get_last_event_timestamp() or "-"
+    last_update = get_last_update_handled_iso() or await run_db(get_last_event_timestamp) or "-"
 
-    from utils.scheduler import get_scheduler_health
+    from utils.scheduler import get_broadcast_archive_stats, get_fsm_sweep_stats, get_scheduler_health
     scheduler = get_scheduler_health()
     scheduler_started = "yes" if scheduler.get("started") else "no"
     scheduler_next_run = scheduler.get("next_run_time") or "-"
-    scheduler_processor_next = scheduler.get("processor_next_run_time") or "-"
     scheduler_leader = "yes" if scheduler.get("leader") else "no"
-    queue_counts = get_broadcast_queue_counts()
+    queue_counts = await run_db(get_broadcast_queue_counts)
     backend = "postgres" if is_postgres_backend() else "sqlite"
-    db_source = "-"
 
     db_path = settings.db_path
     db_abs_path = os.path.abspath(db_path)
@@ -96,24 +128,23 @@ async def health_cmd(message: Message):
             db_mtime = _format_dt_local(os.path.getmtime(db_abs_path))
     except Exception:
         pass
-    conn = None
-    try:
-        conn = get_connection()
-        cur = conn.cursor()
-        if is_postgres_backend():
-            cur.execute("SELECT current_database(), current_user")
-            src = cur.fetchone()
-            db_source = f"db={src[0]}, user={src[1]}"
-        else:
-            db_source = f"file={settings.db_path}"
-    except Exception as exc:
-        db_source = f"error={exc}"
-    finally:
-        try:
-            if conn:
-                conn.close()
-        except Exception:
-            pass
+    db_source = await run_db(_read_db_source)
+    telemetry = get_telemetry_stats()
+    ui_messages = get_ui_message_tracker_stats()
+    reviews = get_review_buffer_stats()
+    profiles = get_profile_cache_stats()
+    sender = get_broadcast_sender_stats()
+    worker = get_broadcast_worker_stats()
+    queue_lag = await get_broadcast_queue_lag_seconds()
+    fsm_sweep = get_fsm_sweep_stats()
+    broadcast_archive = get_broadcast_archive_stats()
+    fsm_cache_text = ""
+    if isinstance(fsm_storage, DBFSMStorage):
+        fsm_cache = fsm_storage.stats()
+        fsm_cache_text = (
+            f"• cache size={fsm_cache['size']}/{fsm_cache['capacity']} hit rate={fsm_cache['hit_rate']}%\n"
+            f"• writes={fsm_cache['writes']} skipped={fsm_cache['skipped_writes']}\n"
+        )
 
     text = (
         "🩺 Health (Admin)\n\n"
@@ -127,12 +158,36 @@ async def health_cmd(message: Message):
         f"• Started: {scheduler_started}\n"
         f"• Leader: {scheduler_leader}\n"
         f"• Next run: {scheduler_next_run}\n\n"
-        f"• Queue next run: {scheduler_processor_next}\n\n"
         "Broadcast Queue\n"
         f"• pending={queue_counts.get('pending', 0)}\n"
         f"• processing={queue_counts.get('processing', 0)}\n"
         f"• sent={queue_counts.get('sent', 0)}\n"
-        f"• failed={queue_counts.get('failed', 0)}\n\n"
+        f"• failed={queue_counts.get('failed', 0)}\n"
+        f"• cancelled={queue_counts.get('cancelled', 0)}\n"
+        f"• archive retention={settings.broadcast_retention_days}d last run: {broadcast_archive['last_run_at'] or '-'}\n"
+        f"• archived last={broadcast_archive['last_archived']} total={broadcast_archive['total_archived']}\n"
+        f"• worker running={'yes' if worker['running'] else 'no'} last batch: {worker['last_batch_at'] or '-'}\n"
+        f"• throughput={worker['jobs_per_second']} jobs/s (1 min) lag={queue_lag}s\n"
+        f"• send rate={sender['rate']}/{sender['max_rate']} msg/s paused={sender['paused_for']}s\n"
+        f"• 429 waits={sender['flood_waits']} last retry_after={sender['last_retry_after']}s\n"
+        f"• sent={sender['sent']} undeliverable={sender['failed']} unsubscribed={sender['unsubscribed']}\n\n"
+        "Telemetry buffer\n"
+        f"• running={'yes' if telemetry['running'] else 'no'}\n"
+        f"• depth={telemetry['depth']}/{telemetry['capacity']}\n"
+        f"• flushed={telemetry['flushed_rows']} dropped={telemetry['dropped']} failed={telemetry['failed_rows']}\n"
+        f"• flush ms last={telemetry['last_flush_ms']} avg={telemetry['avg_flush_ms']} max={telemetry['max_flush_ms']}\n\n"
+        "UI message cache\n"
+        f"• size={ui_messages['size']}/{ui_messages['capacity']} hit rate={ui_messages['hit_rate']}%\n"
+        f"• pending={ui_messages['pending']} flushed={ui_messages['flushed_rows']} failed flushes={ui_messages['failed_flushes']}\n\n"
+        "Profile cache\n"
+        f"• size={profiles['size']}/{profiles['capacity']} hit rate={profiles['hit_rate']}% TTL={profiles['ttl_seconds']}s\n\n"
+        "Quiz answers\n"
+        f"• running={'yes' if reviews['running'] else 'no'} pending={reviews['pending']}\n"
+        f"• flushed={reviews['flushed_reviews']} failed flushes={reviews['failed_flushes']}\n\n"
+        "FSM state\n"
+        f"{fsm_cache_text}"
+        f"• sweep TTL={settings.fsm_state_ttl_hours}h last run: {fsm_sweep['last_run_at'] or '-'}\n"
+        f"• reclaimed last={fsm_sweep['last_reclaimed']} total={fsm_sweep['total_reclaimed']}\n\n"
         "Database\n"
         f"• Path: {db_path}\n"
         f"• Size: {db_size} bytes\n"
@@ -164,7 +219,7 @@ async def admin_stats_cmd(message: Message):
     if not await _ensure_admin(message):
         return
 
-    stats = get_admin_stats_snapshot()
+    stats = await run_db(get_admin_stats_snapshot)
     weak_topics = stats.get("top_weak_topics") or []
     if weak_topics:
         weak_lines = "\n".join(
@@ -189,7 +244,7 @@ async def admin_stats_cmd(message: Message):
 async def users_count_cmd(message: Message):
     if not await _ensure_admin(message):
         return
-    total_users = get_users_count()
+    total_users = await run_db(get_users_count)
     text = (
         "👥 Foydalanuvchilar soni\n\n"
         f"• Jami users: {total_users}"
@@ -197,25 +252,9 @@ async def users_count_cmd(message: Message):
     await send_single_ui_message(message, text)
 
 
-@router.message(Command("diag_db"))
-async def diag_db_cmd(message: Message):
-    if not await _ensure_admin(message):
-        return
-    if not message.from_user:
-        return
-
-    user_id = int(message.from_user.id)
-    backend = "postgres" if is_postgres_backend() else "sqlite"
-    db_path = settings.db_path
-    exists = os.path.exists(db_path)
-    size = os.path.getsize(db_path) if exists else 0
-
-    total_users = 0
-    row = None
-    source_line = "-"
-    conn = None
+def _read_db_diag(user_id: int, db_path: str):
+    conn = get_connection(readonly=True)
     try:
-        conn = get_connection()
         cur = conn.cursor()
         if is_postgres_backend():
             cur.execute("SELECT current_database(), current_user")
@@ -231,14 +270,32 @@ async def diag_db_cmd(message: Message):
             (user_id,),
         )
         row = cur.fetchone()
-    except Exception as e:
-        await send_single_ui_message(message, f"DB diag xatolik: {e}")
-        return
     finally:
         try:
             conn.close()
         except Exception:
             pass
+    return source_line, total_users, row
+
+
+@router.message(Command("diag_db"))
+async def diag_db_cmd(message: Message):
+    if not await _ensure_admin(message):
+        return
+    if not message.from_user:
+        return
+
+    user_id = int(message.from_user.id)
+    backend = "postgres" if is_postgres_backend() else "sqlite"
+    db_path = settings.db_path
+    exists = os.path.exists(db_path)
+    size = os.path.getsize(db_path) if exists else 0
+
+    try:
+        source_line, total_users, row = await run_db(_read_db_diag, user_id, db_path)
+    except Exception as e:
+        await send_single_ui_message(message, f"DB diag xatolik: {e}")
+        return
 
     if row:
         me_line = (
@@ -265,7 +322,7 @@ async def ops_last_errors_cmd(message: Message):
     if not await _ensure_admin(message):
         return
 
-    rows = get_recent_ops_errors(limit=10)
+    rows = await run_db(get_recent_ops_errors, limit=10)
     if not rows:
         await send_single_ui_message(message, "🧯 Ops Errors\n\nHozircha xatoliklar yo'q.")
         return
@@ -343,41 +400,51 @@ async def ops_throw_test_cmd(message: Message):
     raise RuntimeError("ops_throw_test triggered by admin")
 
 
+def _announcement_id_arg(command: CommandObject) -> int | None:
+    args = (command.args or "").strip().lstrip("#")
+    return int(args) if args.isdigit() else None
+
+
 @router.message(Command("announce_update"))
 async def announce_update_cmd(message: Message):
     if not await _ensure_admin(message):
         return
-    users = get_subscribed_users()
-    if not users:
-        await send_single_ui_message(message, "📢 Update e'loni uchun foydalanuvchilar topilmadi.")
-        return
+    message_id = await start_announcement(message.bot, message.chat.id, UPDATE_ANNOUNCEMENT_TEXT)
+    if message_id is None:
+        await send_single_ui_message(message, "📢 Update e'lonini navbatga qo'yib bo'lmadi.")
 
-    sent = 0
-    failed = 0
-    sem = asyncio.Semaphore(30)
 
-    async def _send_one(user_id: int):
-        nonlocal sent, failed
-        async with sem:
-            try:
-                await message.bot.send_message(
-                    chat_id=int(user_id),
-                    text=UPDATE_ANNOUNCEMENT_TEXT,
-                    parse_mode="Markdown",
-                )
-                sent += 1
-            except Exception:
-                failed += 1
+@router.message(Command("announce_cancel"))
+async def announce_cancel_cmd(message: Message, command: CommandObject):
+    if not await _ensure_admin(message):
+        return
+    message_id, cancelled = await cancel_announcement(_announcement_id_arg(command))
+    if message_id is None:
+        await send_single_ui_message(message, "📢 Update e'loni topilmadi.")
+        return
+    await send_single_ui_message(
+        message,
+        f"⏸ Update e'loni #{message_id} bekor qilindi.\n"
+        f"• Navbatdan olindi: {cancelled}\n\n"
+        f"Davom ettirish: /announce_resume {message_id}",
+    )
 
-    await asyncio.gather(*[_send_one(int(uid)) for uid in users], return_exceptions=True)
 
-    text = (
-        "📢 Update e'loni yuborildi\n\n"
-        f"• Jami users: {len(users)}\n"
-        f"• Yuborildi: {sent}\n"
-        f"• Xatolik: {failed}"
-    )
-    await send_single_ui_message(message, text)
+@router.message(Command("announce_resume"))
+async def announce_resume_cmd(message: Message, command: CommandObject):
+    if not await _ensure_admin(message):
+        return
+    message_id, resumed = await resume_announcement(message.bot, message.chat.id, _announcement_id_arg(command))
+    if message_id is None:
+        await send_single_ui_message(message, "📢 Update e'loni topilmadi.")
+        return
+    if not resumed:
+        await send_single_ui_message(
+            message,
+            f"📢 Update e'loni #{message_id} {settings.broadcast_retention_days} kundan eski.\n"
+            "Yuborilganlar arxivlangan, davom ettirilsa hammaga qayta yuboriladi.\n\n"
+            "Yangi e'lon: /announce_update",
+        )
 
 @router.message(Command("backup_now"))
 async def backup_now_cmd(message: Message):
@@ -429,7 +496,7 @@ async def backup_send_latest_cmd(message: Message):
 async def admin_help_cmd(message: Message):
     if not await _ensure_admin(message):
         return
-    total_users = get_users_count()
+    total_users = await run_db(get_users_count)
     text = (
         "🛠️ Admin Buyruqlar\n\n"
         f"• /users_count (/user_count) - userlar soni ({total_users})\n"
@@ -440,6 +507,8 @@ async def admin_help_cmd(message: Message):
         "• /backup_list - backup ro'yxati\n"
         "• /backup_send_latest - oxirgi backupni yuborish\n"
         "• /announce_update - update e'lonini hamma userga yuborish\n"
+        "• /announce_cancel [id] - e'lonni to'xtatish\n"
+        "• /announce_resume [id] - to'xtatilgan e'lonni davom ettirish\n"
         "• /ops_alerts - ops alertlar holati\n"
         "• /ops_last_errors - oxirgi xatoliklar\n"
         "• /diag_db - ishlayotgan DB diagnostikasi"
@@ -8,9 +8,9 @@ from aiogram.types import (
 )
 from aiogram.fsm.context import FSMContext
 from typing import Awaitable, cast
-from database import get_or_create_user_profile, update_user_profile  # From package init
-from database.repositories.user_repository import add_user
-from database.repositories.user_repository import get_user_profile
+from database import update_user_profile  # From package init
+from database.aio import run_db
+from database.repositories.user_repository import ensure_user_profile
 from database.repositories.progress_repository import record_navigation_event
 from database.repositories.session_repository import get_daily_lesson_state
 from handlers.onboarding import start_onboarding
@@ -52,6 +52,23 @@ def _needs_onboarding(profile: dict) -> bool:
     return _profile_is_default(profile) and _profile_is_fresh(profile)
 
 
+def _load_start_context(user_id: int, full_name: str, username: str | None):
+    profile, created = ensure_user_profile(user_id)
+    profile = profile or {}
+    was_existing_user = not created
+    record_navigation_event(user_id, "start", entry_type="command")
+    # Existing DB users should not be forced through onboarding again.
+    if was_existing_user and _to_int(profile.get("onboarding_completed"), 0) != 1:
+        update_user_profile(user_id, onboarding_completed=1)
+        profile["onboarding_completed"] = 1
+    # Coming back after blocking the bot resubscribes to broadcasts.
+    if profile.get("broadcast_unsubscribed_at"):
+        update_user_profile(user_id, broadcast_unsubscribed_at=None)
+        profile["broadcast_unsubscribed_at"] = None
+    lesson_state = get_daily_lesson_state(user_id) or {}
+    return profile, was_existing_user, lesson_state
+
+
 async def _safe_delete_message(message: Message):
     try:
         await message.delete()
@@ -67,25 +84,21 @@ async def cmd_start(message: Message, state: FSMContext):
         return
 
     user_id = message.from_user.id
-    existing_profile = get_user_profile(user_id) or {}
-    was_existing_user = bool(existing_profile)
-    add_user(user_id, message.from_user.full_name, message.from_user.username)
-    profile = get_or_create_user_profile(user_id) or {}
-    record_navigation_event(user_id, "start", entry_type="command")
-    # Existing DB users should not be forced through onboarding again.
-    if was_existing_user and _to_int(profile.get("onboarding_completed"), 0) != 1:
-        update_user_profile(user_id, onboarding_completed=1)
-        profile["onboarding_completed"] = 1
+    profile, was_existing_user, lesson_state = await run_db(
+        _load_start_context,
+        user_id,
+        message.from_user.full_name,
+        message.from_user.username,
+    )
 
     if (not was_existing_user) and _needs_onboarding(profile):
         await cast(Awaitable[None], start_onboarding(message, state))
         return
     if _to_int(profile.get("onboarding_completed"), 0) != 1:
         # Backfill legacy users so they are not prompted again.
-        update_user_profile(user_id, onboarding_completed=1)
+        await run_db(update_user_profile, user_id, onboarding_completed=1)
 
     current_level = str(profile.get("current_level") or "A1")
-    lesson_state = get_daily_lesson_state(user_id) or {}
     lesson_status = lesson_state.get("status")
 
     if lesson_status == "in_progress":
@@ -129,7 +142,7 @@ async def cmd_menu(message: Message):
     await _safe_delete_message(message)
     if not message.from_user:
         return
-    record_navigation_event(message.from_user.id, "main_menu", entry_type="text")
+    await run_db(record_navigation_event, message.from_user.id, "main_menu", entry_type="text")
     await cast(
         Awaitable[None],
         _send_fresh_main_menu(message, MAIN_MENU_TEXT, user_id=message.from_user.id),
@@ -138,7 +151,7 @@ async def cmd_menu(message: Message):
 
 @router.callback_query(F.data == "home")
 async def go_to_home(call: CallbackQuery):
-    record_navigation_event(call.from_user.id, "main_menu", entry_type="callback")
+    await run_db(record_navigation_event, call.from_user.id, "main_menu", entry_type="callback")
     await call.answer()
     message = call.message if isinstance(call.message, Message) else None
     if not message:
@@ -4,23 +4,32 @@ import os
 import datetime
 import asyncio
 import logging
+from collections import OrderedDict
 from zoneinfo import ZoneInfo
 from typing import Awaitable, cast
 from aiogram import Router, F, Bot
 from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
 from core.config import settings
+from database.aio import run_db
 from database.repositories.broadcast_repository import (
+    ack_broadcast_jobs,
     claim_pending_jobs,
-    enqueue_broadcast_jobs,
-    mark_job_sent,
+    enqueue_time_slot_chunk,
+    get_broadcast_messages,
     recover_stale_processing_jobs,
-    reschedule_job,
 )
+from utils.broadcast_sender import RETRY, SENT, UNSUBSCRIBE, send_paced
 from utils.ui_utils import send_single_ui_message
 
 router = Router()
 DATA_DIR = "data"
 DAILY_TIMEZONE = "Asia/Tashkent"
+# Rendered broadcast_messages rows; they never change once written
+_RENDER_CACHE_SIZE = 64
+_RENDERED: OrderedDict[int, tuple[str, InlineKeyboardMarkup | None]] = OrderedDict()
+ANNOUNCEMENT_KIND = "announcement"
+# Waits before retrying a failed enqueue chunk from the same user id
+_ENQUEUE_RETRY_DELAYS = (1, 5, 15, 30, 60)
 
 
 def _now_in_daily_tz() -> datetime.datetime:
@@ -118,17 +127,53 @@ async def daily_random_handler(call: CallbackQuery):
     
     await message.edit_text(text, reply_markup=builder, parse_mode="Markdown")
 
+async def run_enqueue_chunk(chunk, *args, **kwargs) -> tuple[int, int | None]:
+    """
+    Runs one enqueue chunk, retrying the same chunk with backoff while it
+    fails; raises once _ENQUEUE_RETRY_DELAYS is used up.
+    """
+    for delay in _ENQUEUE_RETRY_DELAYS:
+        try:
+            return await run_db(chunk, *args, **kwargs)
+        except Exception as exc:
+            logging.warning("Broadcast enqueue chunk failed, retrying in %ss: %s", delay, exc)
+            await asyncio.sleep(delay)
+    return await run_db(chunk, *args, **kwargs)
+
+
+async def enqueue_time_slot(notification_time: str, kind: str, payload: dict, slot_key: str) -> int:
+    """
+    Enqueues the whole slot chunk by chunk; each chunk is one short
+    transaction, so the SQLite writer is free between chunks. A failed chunk
+    is retried from where it started.
+    """
+    inserted = 0
+    after_user_id = None
+    while True:
+        chunk_inserted, after_user_id = await run_enqueue_chunk(
+            enqueue_time_slot_chunk,
+            notification_time,
+            kind,
+            payload,
+            slot_key,
+            after_user_id=after_user_id,
+            limit=settings.broadcast_enqueue_chunk_size,
+        )
+        inserted += chunk_inserted
+        if after_user_id is None:
+            return inserted
+        await asyncio.sleep(0)
+
+
 async def send_daily_word_to_all(bot: Bot):
     try:
-        from database.repositories.user_repository import get_subscribed_users_for_time
         from core.texts import DAILY_QUOTES
         
         # Keep scheduler and DB time matching in the same timezone.
         current_time_str = _current_time_slot()
-        users = get_subscribed_users_for_time(current_time_str)
         word = get_todays_word()
         
-        if not word or not users:
+        if not word:
             return
 
         quote = random.choice(DAILY_QUOTES)
@@ -141,16 +186,15 @@ async def send_daily_word_to_all(bot: Bot):
             "word_uz": word.get("uz", ""),
             "slot": current_time_str,
         }
-        inserted = enqueue_broadcast_jobs(
-            users,
+        inserted = await enqueue_time_slot(
+            current_time_str,
             kind="daily_word",
             payload=payload,
             slot_key=_daily_slot_key(),
         )
         logging.info(
-            "Daily broadcast jobs enqueued slot=%s users=%d inserted=%d",
+            "Daily broadcast jobs enqueued slot=%s inserted=%d",
             current_time_str,
-            len(users),
             inserted,
         )
     except Exception as e:
@@ -176,38 +220,102 @@ def _render_daily_payload(payload: dict) -> tuple[str, InlineKeyboardMarkup]:
     return text, builder
 
 
-async def process_broadcast_queue(bot: Bot):
-    recovered = recover_stale_processing_jobs(
-        stale_seconds=settings.broadcast_processing_stale_seconds
-    )
-    if recovered > 0:
-        logging.warning("Recovered stale broadcast jobs: %d", recovered)
-    jobs = claim_pending_jobs(limit=settings.broadcast_claim_batch_size)
+def _render_announcement_payload(payload: dict) -> tuple[str, InlineKeyboardMarkup | None]:
+    return str(payload.get("text") or ""), None
+
+
+def _render_payload(kind: str, payload: dict) -> tuple[str, InlineKeyboardMarkup | None]:
+    if kind == ANNOUNCEMENT_KIND:
+        return _render_announcement_payload(payload)
+    return _render_daily_payload(payload)
+
+
+async def _render_messages(message_ids: set[int]) -> dict[int, tuple[str, InlineKeyboardMarkup | None]]:
+    """Text and keyboard per broadcast message id, loading and rendering only cache misses."""
+    missing = [message_id for message_id in message_ids if message_id not in _RENDERED]
+    if missing:
+        for message_id, (kind, payload) in (await run_db(get_broadcast_messages, missing)).items():
+            try:
+                _RENDERED[message_id] = _render_payload(kind, json.loads(payload or "{}"))
+            except Exception as exc:
+                logging.error("Broadcast message %s could not be rendered: %s", message_id, exc)
+    rendered = {}
+    for message_id in message_ids:
+        if message_id in _RENDERED:
+            _RENDERED.move_to_end(message_id)
+            rendered[message_id] = _RENDERED[message_id]
+    while len(_RENDERED) > _RENDER_CACHE_SIZE:
+        _RENDERED.popitem(last=False)
+    return rendered
+
+
+async def process_broadcast_queue(bot: Bot, recover: bool = True) -> int:
+    """Claims and sends one batch; returns the number of jobs claimed."""
+    if recover:
+        recovered = await run_db(
+            recover_stale_processing_jobs,
+            stale_seconds=settings.broadcast_processing_stale_seconds
+        )
+        if recovered > 0:
+            logging.warning("Recovered stale broadcast jobs: %d", recovered)
+    jobs = await run_db(claim_pending_jobs, limit=settings.broadcast_claim_batch_size)
     if not jobs:
-        return
+        return 0
 
+    rendered = await _render_messages({job["message_id"] for job in jobs if job.get("message_id") is not None})
     sem = asyncio.Semaphore(max(1, settings.broadcast_send_concurrency))
+    max_attempts = max(1, settings.broadcast_max_attempts)
+    ack_every = max(1, settings.broadcast_ack_batch_size)
+    # Outcomes are written in bulk; a crash before a flush only re-sends
+    # those jobs once they are recovered as stale
+    sent_ids: list[int] = []
+    failures: list[tuple[int, int, str, int]] = []
+    dropped: list[tuple[int, str]] = []
+    unsubscribed: list[int] = []
+
+    async def _flush_acks():
+        nonlocal sent_ids, failures, dropped, unsubscribed
+        if not (sent_ids or failures or dropped or unsubscribed):
+            return
+        batch = (sent_ids, failures, max_attempts, dropped, unsubscribed)
+        sent_ids, failures, dropped, unsubscribed = [], [], [], []
+        await run_db(ack_broadcast_jobs, *batch)
 
     async def _send_one(job: dict):
         async with sem:
+            job_id = int(job["id"])
+            user_id = int(job["user_id"])
             attempts_done = int(job.get("attempts", 0))
             try:
-                payload = json.loads(job.get("payload") or "{}")
-                text, builder = _render_daily_payload(payload)
-                await bot.send_message(
-                    int(job["user_id"]),
-                    text,
-                    reply_markup=builder,
-                    parse_mode="Markdown",
+                message_id = job.get("message_id")
+                if message_id is None:
+                    # Enqueued before broadcast_messages existed
+                    text, builder = _render_payload(str(job.get("kind")), json.loads(job.get("payload") or "{}"))
+                elif message_id in rendered:
+                    text, builder = rendered[message_id]
+                else:
+                    raise LookupError(f"broadcast message {message_id} is missing")
+                outcome, error, retry_after = await send_paced(
+                    user_id,
+                    lambda: bot.send_message(user_id, text, reply_markup=builder, parse_mode="Markdown"),
                 )
-                mark_job_sent(int(job["id"]))
             except Exception as exc:
-                reschedule_job(
-                    job_id=int(job["id"]),
-                    attempts_done=attempts_done,
-                    error_msg=str(exc),
-                    delay_seconds=_retry_delay_seconds(attempts_done),
-                    max_attempts=max(1, settings.broadcast_max_attempts),
-                )
+                outcome, error, retry_after = RETRY, str(exc), 0
+            if outcome == SENT:
+                sent_ids.append(job_id)
+            elif outcome == RETRY:
+                # Never earlier than Telegram's retry_after
+                delay = max(retry_after, _retry_delay_seconds(attempts_done))
+                failures.append((job_id, attempts_done, error or "", delay))
+            else:
+                dropped.append((job_id, error or outcome))
+                if outcome == UNSUBSCRIBE:
+                    unsubscribed.append(user_id)
+            if len(sent_ids) + len(failures) + len(dropped) >= ack_every:
+                await _flush_acks()
 
-    await asyncio.gather(*[_send_one(j) for j in jobs], return_exceptions=True)
+    try:
+        await asyncio.gather(*[_send_one(j) for j in jobs], return_exceptions=True)
+    finally:
+        await _flush_acks()
+    return len(jobs)
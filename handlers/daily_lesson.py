@@ -11,6 +11,7 @@ from services.stats_service import StatsService
 from services.grammar_service import GrammarService
 from database.repositories.session_repository import get_daily_lesson_state, save_daily_lesson_state, delete_daily_lesson_state
 from database.repositories.lesson_repository import save_daily_plan, mark_grammar_topic_seen
+from database.aio import run_db
 from utils.ui_utils import send_single_ui_message
 
 router = Router()
@@ -39,13 +40,10 @@ async def daily_lesson_start(message: Message):
     if not message.from_user:
         return
     user_id = message.from_user.id
-    StatsService.log_navigation(user_id, "daily_lesson", entry_type="text")
+    await run_db(StatsService.log_navigation, user_id, "daily_lesson", entry_type="text")
     await _show_entry_screen(message, user_id)
 
-@router.callback_query(F.data == "daily_begin")
-async def daily_begin_handler(call: CallbackQuery):
-    await call.answer()
-    user_id = call.from_user.id
+def _begin_daily_session(user_id: int) -> dict:
     profile = UserService.get_profile(user_id) or {}
     session_plan = LearningService.create_daily_plan(user_id, profile)
     save_daily_plan(user_id, session_plan)
@@ -62,6 +60,13 @@ async def daily_begin_handler(call: CallbackQuery):
         "results": {"quiz_correct": 0, "quiz_total": 0}
     }
     save_daily_lesson_state(user_id, state)
+    return state
+
+@router.callback_query(F.data == "daily_begin")
+async def daily_begin_handler(call: CallbackQuery):
+    await call.answer()
+    user_id = call.from_user.id
+    state = await run_db(_begin_daily_session, user_id)
 
     message = call.message if isinstance(call.message, Message) else None
     if not message:
@@ -73,7 +78,7 @@ async def daily_begin_handler(call: CallbackQuery):
 async def daily_resume_handler(call: CallbackQuery):
     await call.answer()
     user_id = call.from_user.id
-    state = get_daily_lesson_state(user_id)
+    state = await run_db(get_daily_lesson_state, user_id)
     message = call.message if isinstance(call.message, Message) else None
     if not message:
         await call.answer("Xabar topilmadi.", show_alert=True)
@@ -86,7 +91,7 @@ async def daily_resume_handler(call: CallbackQuery):
     await _render_step(message, user_id, state)
 
 async def _show_entry_screen(message: Message, user_id: int):
-    state = get_daily_lesson_state(user_id)
+    state = await run_db(get_daily_lesson_state, user_id)
     status = state.get("status") if state else STATUS_IDLE
     
     if status == STATUS_FINISHED:
@@ -129,7 +134,7 @@ async def _render_step(message: Message, user_id: int, state: dict):
             [InlineKeyboardButton(text="Ha, tayyorman!", callback_data="daily_step_2")]
         ])
     elif step == 2: # Vocab
-        words = get_words_by_ids(plan.get("vocab_ids", []))
+        words = await run_db(get_words_by_ids, plan.get("vocab_ids", []))
         if words:
             word_list = "\n".join([f"🔹 **{w['de']}** — {w['uz']}" for w in words])
             text = f"{header}Yangi so'zlar:\n\n{word_list}"
@@ -171,10 +176,10 @@ async def _render_step(message: Message, user_id: int, state: dict):
             ])
         else:
             current_id = quiz_ids[quiz_index]
-            target_word = get_words_by_ids([current_id])
+            target_word = await run_db(get_words_by_ids, [current_id])
             target_word = target_word[0] if target_word else {"de": "Noma'lum", "uz": "Noma'lum"}
             
-            others = get_random_words(plan.get("level", "A1"), limit=15)
+            others = await run_db(get_random_words, plan.get("level", "A1"), limit=8, exclude_ids={current_id})
             options = [{"text": target_word["uz"], "correct": 1}]
             for w in others:
                 if w["id"] != current_id and len(options) < 4:
@@ -233,10 +238,10 @@ async def daily_step_callback(call: CallbackQuery):
     if not message:
         await call.answer("Xabar topilmadi.", show_alert=True)
         return
-    state = get_daily_lesson_state(user_id)
+    state = await run_db(get_daily_lesson_state, user_id)
     if state:
         state["step"] = next_step
-        save_daily_lesson_state(user_id, state)
+        await run_db(save_daily_lesson_state, user_id, state)
         await _render_step(message, user_id, state)
     else:
         await call.answer("Dars sessiyasi topilmadi.")
@@ -257,7 +262,7 @@ async def daily_quiz_answer(call: CallbackQuery):
     if not message:
         await call.answer("Xabar topilmadi.", show_alert=True)
         return
-    state = get_daily_lesson_state(user_id)
+    state = await run_db(get_daily_lesson_state, user_id)
     if not state:
         await call.answer("Sessiya topilmadi.", show_alert=True)
         return
@@ -275,7 +280,7 @@ async def daily_quiz_answer(call: CallbackQuery):
 
     # Write idempotency marker before awaits to avoid double-click races.
     state["last_answered_quiz_index"] = current_quiz_index
-    save_daily_lesson_state(user_id, state)
+    await run_db(save_daily_lesson_state, user_id, state)
         
     if is_correct:
         if "results" not in state:
@@ -293,17 +298,10 @@ async def daily_quiz_answer(call: CallbackQuery):
     if state["quiz_index"] >= len(quiz_ids):
         state["step"] = 5
         
-    save_daily_lesson_state(user_id, state)
+    await run_db(save_daily_lesson_state, user_id, state)
     await _render_step(message, user_id, state)
 
-@router.callback_query(F.data == "daily_finish")
-async def daily_finish_callback(call: CallbackQuery):
-    await call.answer("Dars yakunlandi! 🏆", show_alert=True)
-    user_id = call.from_user.id
-    message = call.message if isinstance(call.message, Message) else None
-    if not message:
-        await call.answer("Xabar topilmadi.", show_alert=True)
-        return
+def _finish_daily_session(user_id: int):
     state = get_daily_lesson_state(user_id)
     if state:
         state["status"] = STATUS_FINISHED
@@ -314,6 +312,16 @@ async def daily_finish_callback(call: CallbackQuery):
         from database.repositories.progress_repository import log_event
         log_event(user_id, "daily_lesson_completed", level=level)
         StatsService.log_navigation(user_id, "daily_lesson_finish", entry_type="callback")
+
+@router.callback_query(F.data == "daily_finish")
+async def daily_finish_callback(call: CallbackQuery):
+    await call.answer("Dars yakunlandi! 🏆", show_alert=True)
+    user_id = call.from_user.id
+    message = call.message if isinstance(call.message, Message) else None
+    if not message:
+        await call.answer("Xabar topilmadi.", show_alert=True)
+        return
+    await run_db(_finish_daily_session, user_id)
     
     from utils.ui_utils import _send_fresh_main_menu
     try:
@@ -334,6 +342,6 @@ async def daily_cancel_handler(call: CallbackQuery):
     if not message:
         await call.answer("Xabar topilmadi.", show_alert=True)
         return
-    delete_daily_lesson_state(user_id)
+    await run_db(delete_daily_lesson_state, user_id)
     await call.answer("Dars bekor qilindi.")
     await _show_entry_screen(message, user_id)
@@ -1,12 +1,17 @@
 import os
 import logging
 from aiogram import Router, F
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message, CallbackQuery, FSInputFile, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from services.dictionary_service import DictionaryService
 from services.stats_service import StatsService
+from database.aio import run_db
 from core.config import settings
+from utils.fsm_utils import MAIN_MENU_BUTTONS
 from utils.ui_utils import send_single_ui_message
 from keyboards.builders import get_levels_keyboard, get_pagination_keyboard, get_alphabet_keyboard
 from core.texts import BTN_DICTIONARY
@@ -14,6 +19,37 @@ from core.texts import BTN_DICTIONARY
 router = Router()
 
 
+class DictionarySearchState(StatesGroup):
+    waiting_query = State()
+
+
+def _dictionary_levels_keyboard():
+    kb = InlineKeyboardBuilder.from_markup(get_levels_keyboard("dict"))
+    kb.row(InlineKeyboardButton(text="🔎 So'z qidirish", callback_data="dict_search"))
+    return kb.as_markup()
+
+
+def _search_results_keyboard():
+    return get_pagination_keyboard(back_callback="dict_back", back_label="🔙 Lug'at")
+
+
+def _format_search_results(result) -> str:
+    query = result["query"]
+    if result["too_short"]:
+        return (
+            f"🔎 Qidirish uchun kamida {DictionaryService.SEARCH_MIN_LENGTH} ta harf yozing.\n\n"
+            "Nemischa yoki o'zbekcha so'z yuboring:"
+        )
+    if not result["words"]:
+        return f"🔎 \"{query}\" bo'yicha hech narsa topilmadi.\n\nBoshqa so'z yuborib ko'ring:"
+    lines = [f"🔎 \"{query}\" bo'yicha natijalar:\n"]
+    for word in result["words"]:
+        pos = f" ({word['pos']})" if word.get('pos') else ""
+        lines.append(f"🔹 {word['de']}{pos} — {word['uz']} [{word['level']}]")
+    lines.append("\nYana qidirish uchun so'z yuboring.")
+    return "\n".join(lines)
+
+
 def _parse_dict_next_callback(data: str):
     """
     Parse pagination callback data.
@@ -43,6 +79,32 @@ def _parse_dict_next_callback(data: str):
     except ValueError:
         return None
 
+
+def _parse_dict_cursor_callback(data: str):
+    """
+    Parse keyset pagination callback data, where the last field is the id of
+    the last word shown, prefixed with "k".
+    Supported:
+    - dict_next_<LEVEL>_k<WORD_ID>
+    - dict_next_letter_<LETTER>_<LEVEL>_k<WORD_ID>
+    Returns tuple (level, after_id, letter) or None when invalid.
+    """
+    parts = (data or "").split("_")
+    if len(parts) < 4 or parts[0] != "dict" or parts[1] != "next" or not parts[-1].startswith("k"):
+        return None
+
+    try:
+        after_id = int(parts[-1][1:])
+    except ValueError:
+        return None
+    if parts[2] == "letter":
+        if len(parts) != 6:
+            return None
+        return parts[4], after_id, parts[3]
+    if len(parts) != 4:
+        return None
+    return parts[2], after_id, None
+
 @router.message(F.text == BTN_DICTIONARY)
 async def show_dictionary_levels(message: Message):
     try:
@@ -52,15 +114,60 @@ async def show_dictionary_levels(message: Message):
     
     if not message.from_user:
         return
-    StatsService.log_navigation(message.from_user.id, "dictionary", entry_type="text")
+    await run_db(StatsService.log_navigation, message.from_user.id, "dictionary", entry_type="text")
     
     await send_single_ui_message(
         message,
         "📘 **Lug'at (A1–C1)**\n\nBu bo'limda siz turli darajadagi so'zlarni o'rganishingiz mumkin. Qaysi darajani o'rganmoqchisiz?",
-        reply_markup=get_levels_keyboard("dict"),
+        reply_markup=_dictionary_levels_keyboard(),
         parse_mode="Markdown"
     )
 
+@router.callback_query(F.data == "dict_search")
+async def dictionary_search_prompt_handler(call: CallbackQuery, state: FSMContext):
+    """Asks for a word to look up; every text sent afterwards is a search."""
+    await call.answer()
+    message = call.message if isinstance(call.message, Message) else None
+    if not message:
+        await call.answer("Xabar topilmadi.", show_alert=True)
+        return
+    await state.set_state(DictionarySearchState.waiting_query)
+    await message.edit_text(
+        "🔎 Nemischa yoki o'zbekcha so'z yuboring.\n\nMasalan: Baum, der Bär, kitob",
+        reply_markup=_search_results_keyboard(),
+    )
+
+@router.message(DictionarySearchState.waiting_query, F.text, ~F.text.in_(MAIN_MENU_BUTTONS), ~F.text.startswith("/"))
+async def dictionary_search_query_handler(message: Message):
+    # Menu buttons and commands fall through to their own handlers
+    await _answer_search(message, message.text or "")
+
+@router.message(Command("search"))
+async def dictionary_search_command(message: Message, command: CommandObject, state: FSMContext):
+    """/search <word> looks a word up directly; bare /search opens the prompt."""
+    await state.set_state(DictionarySearchState.waiting_query)
+    await _answer_search(message, command.args or "")
+
+async def _answer_search(message: Message, query: str):
+    try:
+        await message.delete()
+    except Exception:
+        pass
+    if not message.from_user:
+        return
+    try:
+        result = await run_db(DictionaryService.search, query)
+    except Exception as exc:
+        logging.error("Dictionary search failed query=%r err=%s", query, exc)
+        result = None
+    text = _format_search_results(result) if result else "Qidiruvda xatolik. Iltimos, qayta urinib ko'ring."
+    await send_single_ui_message(
+        message,
+        text,
+        reply_markup=_search_results_keyboard(),
+        user_id=message.from_user.id,
+    )
+
 @router.callback_query(F.data.startswith("dict_alpha_"))
 async def dictionary_alphabet_view_handler(call: CallbackQuery):
     """Shows the A-Z letter picker for a specific level."""
@@ -95,7 +202,7 @@ async def dictionary_letter_handler(call: CallbackQuery):
     offset = 0
     
     try:
-        result = DictionaryService.get_page(level, offset=offset, letter=letter)
+        result = await run_db(DictionaryService.get_page, level, offset=offset, letter=letter)
     except Exception as exc:
         logging.error("Dictionary letter load failed level=%s letter=%s err=%s", level, letter, exc)
         await call.answer("Lug'atni yuklashda xatolik. Iltimos, qayta urinib ko'ring.", show_alert=True)
@@ -111,25 +218,28 @@ async def dictionary_letter_handler(call: CallbackQuery):
 async def dictionary_pagination_handler(call: CallbackQuery):
     """Handles Next page pagination."""
     await call.answer()
-    parsed = _parse_dict_next_callback(call.data or "")
-    if not parsed:
-        await call.answer("Noto'g'ri sahifa so'rovi.", show_alert=True)
-        return
+    after_id = None
+    cursor = _parse_dict_cursor_callback(call.data or "")
+    if cursor:
+        level, after_id, letter = cursor
+        offset = 0
+    else:
+        # Offset-style buttons from messages sent before keyset cursors
+        parsed = _parse_dict_next_callback(call.data or "")
+        if not parsed:
+            await call.answer("Noto'g'ri sahifa so'rovi.", show_alert=True)
+            return
+        level, offset, letter = parsed
 
-    level, offset, letter = parsed
     try:
-        if letter:
-            result = DictionaryService.get_page(level, offset=offset, letter=letter)
-            await _show_word_page(call, level, result, offset, letter=letter)
-        else:
-            result = DictionaryService.get_page(level, offset=offset)
-            await _show_word_page(call, level, result, offset)
+        result = await run_db(DictionaryService.get_page, level, offset=offset, letter=letter, after_id=after_id)
+        await _show_word_page(call, level, result, result["offset"], letter=letter)
     except Exception as exc:
-        logging.error("Dictionary pagination failed level=%s offset=%s letter=%s err=%s", level, offset, letter, exc)
+        logging.error("Dictionary pagination failed level=%s offset=%s after=%s letter=%s err=%s", level, offset, after_id, letter, exc)
         await call.answer("Sahifalashda xatolik. Iltimos, qayta urinib ko'ring.", show_alert=True)
 
-@router.callback_query(F.data.startswith("dict_") & ~F.data.startswith("dict_letter_") & ~F.data.startswith("dict_next_") & ~F.data.startswith("dict_alpha_") & ~F.data.contains("pdf"))
-async def dictionary_level_handler(call: CallbackQuery):
+@router.callback_query(F.data.startswith("dict_") & ~F.data.startswith("dict_letter_") & ~F.data.startswith("dict_next_") & ~F.data.startswith("dict_alpha_") & ~F.data.contains("pdf") & (F.data != "dict_search"))
+async def dictionary_level_handler(call: CallbackQuery, state: FSMContext):
     """Handles level selection (dict_A1, etc.) and dict_back."""
     await call.answer()
     data = call.data or ""
@@ -138,9 +248,11 @@ async def dictionary_level_handler(call: CallbackQuery):
         await call.answer("Xabar topilmadi.", show_alert=True)
         return
     if data == "dict_back":
+        if await state.get_state() == DictionarySearchState.waiting_query.state:
+            await state.clear()
         await message.edit_text(
             "📘 **Lug'at (A1–C1)**\n\nQaysi darajani o'rganmoqchisiz?",
-            reply_markup=get_levels_keyboard("dict"),
+            reply_markup=_dictionary_levels_keyboard(),
             parse_mode="Markdown"
         )
         return
@@ -151,7 +263,7 @@ async def dictionary_level_handler(call: CallbackQuery):
         return
     level = parts[1]
     try:
-        result = DictionaryService.get_page(level, offset=0)
+        result = await run_db(DictionaryService.get_page, level, offset=0)
     except Exception as exc:
         logging.error("Dictionary level load failed level=%s err=%s", level, exc)
         await call.answer("Lug'atni yuklashda xatolik. Iltimos, qayta urinib ko'ring.", show_alert=True)
@@ -182,12 +294,13 @@ async def _show_word_page(call, level, result, offset, letter=None):
     response_text = "\n".join(lines)
     
     # Pagination
+    cursor = f"k{result['next_cursor']}"
     if letter:
-        next_callback = f"dict_next_letter_{letter}_{level}_{offset}"
+        next_callback = f"dict_next_letter_{letter}_{level}_{cursor}"
         back_callback = f"dict_alpha_{level}"
         back_label = "🔙 Alifbo"
     else:
-        next_callback = f"dict_next_{level}_{offset}"
+        next_callback = f"dict_next_{level}_{cursor}"
         back_callback = "dict_back"
         back_label = "🔙 Orqaga"
 
@@ -22,21 +22,22 @@ def _exam_levels_keyboard():
     rows.append([InlineKeyboardButton(text="🏠 Bosh menyu", callback_data="home")])
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
-def _build_exam_questions(level: str, total: int = 10):
-    pool = get_random_words(level, limit=min(total * 6, 120))
+def _build_exam_questions(level: str, total: int = 10, rng: random.Random | None = None):
+    rng = rng or random.Random()
+    pool = get_random_words(level, limit=min(total * 6, 120), rng=rng)
     if len(pool) < 4:
         return []
 
-    sample_size = min(total, len(pool))
-    selected_targets = random.sample(pool, k=sample_size)
+    # The pool is already in random order, so its head is a uniform sample
+    selected_targets = pool[:min(total, len(pool))]
     questions = []
     for word in selected_targets:
         correct = word.get("uz")
         distractors_pool = [w.get("uz") for w in pool if w.get("uz") != correct and w.get("uz")]
         if len(distractors_pool) < 3:
             continue
-        options = random.sample(distractors_pool, 3) + [correct]
-        random.shuffle(options)
+        options = rng.sample(distractors_pool, 3) + [correct]
+        rng.shuffle(options)
         questions.append({
             "text": f"🇩🇪 **{word.get('de', '-') }** — tarjimasi nima?",
             "options": options,
@@ -4,6 +4,7 @@ from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKe
 
 from services.grammar_service import GrammarService
 from services.stats_service import StatsService
+from database.aio import run_db
 from keyboards.builders import get_levels_keyboard
 from utils.ui_utils import send_single_ui_message
 
@@ -18,7 +19,7 @@ async def show_grammar_levels(message: Message):
     
     if not message.from_user:
         return
-    StatsService.log_navigation(message.from_user.id, "grammar", entry_type="text")
+    await run_db(StatsService.log_navigation, message.from_user.id, "grammar", entry_type="text")
     
     await send_single_ui_message(
         message,
@@ -39,8 +40,8 @@ async def grammar_topic_list_handler(call: CallbackQuery):
     if not message:
         await call.answer("Xabar topilmadi.", show_alert=True)
         return
-    StatsService.log_navigation(call.from_user.id, "grammar", level=level, entry_type="callback")
-    StatsService.mark_progress(call.from_user.id, "grammar", level)
+    await run_db(StatsService.log_navigation, call.from_user.id, "grammar", level=level, entry_type="callback")
+    await run_db(StatsService.mark_progress, call.from_user.id, "grammar", level)
 
     topics = GrammarService.get_topics_by_level(level)
     if not topics:
@@ -50,7 +51,7 @@ async def grammar_topic_list_handler(call: CallbackQuery):
     rows = []
     
     # Adaptive recommendation
-    rec = GrammarService.get_recommendation(call.from_user.id, level)
+    rec = await run_db(GrammarService.get_recommendation, call.from_user.id, level)
     if rec:
         rows.append([
             InlineKeyboardButton(
@@ -98,7 +99,7 @@ async def grammar_topic_detail_handler(call: CallbackQuery):
         return
 
     try:
-        GrammarService.mark_completed(call.from_user.id, topic_id, level or "A1")
+        await run_db(GrammarService.mark_completed, call.from_user.id, topic_id, level or "A1")
     except Exception:
         pass  # Don't let tracking errors kill the view
 
@@ -10,6 +10,7 @@ from core.texts import ONBOARDING_WELCOME, INTRO_TEXT
 from utils.ui_utils import send_single_ui_message, _send_fresh_main_menu
 from keyboards.builders import get_levels_keyboard
 from database import update_user_profile
+from database.aio import run_db
 
 router = Router()
 
@@ -57,17 +58,17 @@ async def start_onboarding(message: Message, state: FSMContext, force: bool = Fa
 
     # Defensive guard: even if onboarding is called from a wrong path,
     # do not show it again for already-configured users.
-    profile = UserService.get_profile(user_id) or {}
+    profile = await run_db(UserService.get_profile, user_id) or {}
     if (not force) and _should_skip_onboarding(profile):
         if _to_int(profile.get("onboarding_completed"), 0) != 1:
-            update_user_profile(user_id, onboarding_completed=1)
+            await run_db(update_user_profile, user_id, onboarding_completed=1)
         await state.clear()
         await _send_fresh_main_menu(message, INTRO_TEXT, user_id=user_id)
         return
 
     await state.clear()
     await state.update_data(onboarding_force_edit=bool(force))
-    StatsService.log_activity(user_id, "onboarding_started")
+    await run_db(StatsService.log_activity, user_id, "onboarding_started")
     
     intro = (
         "🧭 **Boshlang'ich sozlash (1/4)**\n\n"
@@ -90,10 +91,10 @@ async def _guard_onboarding_callback(call: CallbackQuery, state: FSMContext) ->
     data = await state.get_data()
     if bool(data.get("onboarding_force_edit")):
         return True
-    profile = UserService.get_profile(call.from_user.id) or {}
+    profile = await run_db(UserService.get_profile, call.from_user.id) or {}
     if _should_skip_onboarding(profile):
         if _to_int(profile.get("onboarding_completed"), 0) != 1:
-            update_user_profile(call.from_user.id, onboarding_completed=1)
+            await run_db(update_user_profile, call.from_user.id, onboarding_completed=1)
         await state.clear()
         message = call.message if isinstance(call.message, Message) else None
         if message:
@@ -112,7 +113,7 @@ async def onboarding_level_handler(call: CallbackQuery, state: FSMContext):
         await call.answer("Noto'g'ri tanlov.", show_alert=True)
         return
     level = parts[1]
-    UserService.update_level(call.from_user.id, level)
+    await run_db(UserService.update_level, call.from_user.id, level)
     
     from core.texts import GOAL_LABELS
     from aiogram.utils.keyboard import InlineKeyboardBuilder
@@ -144,7 +145,7 @@ async def onboarding_goal_handler(call: CallbackQuery, state: FSMContext):
         await call.answer("Noto'g'ri tanlov.", show_alert=True)
         return
     goal = parts[1]
-    UserService.set_goal(call.from_user.id, goal)
+    await run_db(UserService.set_goal, call.from_user.id, goal)
     
     from aiogram.utils.keyboard import InlineKeyboardBuilder
     from aiogram.types import InlineKeyboardButton
@@ -176,7 +177,7 @@ async def onboarding_target_handler(call: CallbackQuery, state: FSMContext):
         await call.answer("Noto'g'ri tanlov.", show_alert=True)
         return
     minutes = int(parts[1])
-    UserService.update_daily_target(call.from_user.id, minutes)
+    await run_db(UserService.update_daily_target, call.from_user.id, minutes)
     
     from aiogram.utils.keyboard import InlineKeyboardBuilder
     from aiogram.types import InlineKeyboardButton
@@ -210,14 +211,14 @@ async def onboarding_time_handler(call: CallbackQuery, state: FSMContext):
         await call.answer("Noto'g'ri tanlov.", show_alert=True)
         return
     time_str = parts[1]
-    UserService.update_notification_time(call.from_user.id, time_str)
+    await run_db(UserService.update_notification_time, call.from_user.id, time_str)
     
-    UserService.complete_onboarding(call.from_user.id)
+    await run_db(UserService.complete_onboarding, call.from_user.id)
     
     await call.answer("Sozlamalar saqlandi! 🎉")
     await state.clear()
     
-    StatsService.log_activity(call.from_user.id, "onboarding_completed")
+    await run_db(StatsService.log_activity, call.from_user.id, "onboarding_completed")
     
     message = call.message if isinstance(call.message, Message) else None
     if not message:
@@ -1,6 +1,7 @@
 from aiogram import Router, F
 from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
+from database.aio import run_db
 from database.repositories.progress_repository import record_navigation_event
 from utils.ui_utils import send_single_ui_message
 
@@ -16,7 +17,7 @@ async def speaking_writing_handler(message: Message, state: FSMContext):
     if not message.from_user:
         return
 
-    record_navigation_event(message.from_user.id, "practice_main", entry_type="text")
+    await run_db(record_navigation_event, message.from_user.id, "practice_main", entry_type="text")
     
     text = (
         "🗣️ **Sprechen & Schreiben**\n\n"
@@ -5,6 +5,7 @@ from typing import Awaitable, cast
 
 from services.user_service import UserService
 from services.stats_service import StatsService
+from database.aio import run_db
 from utils.ui_utils import send_single_ui_message
 from handlers.onboarding import start_onboarding
 
@@ -20,7 +21,7 @@ async def show_profile(message: Message):
     if not message.from_user:
         return
     user_id = message.from_user.id
-    profile = UserService.get_profile(user_id)
+    profile = await run_db(UserService.get_profile, user_id)
     level = str(profile.get("current_level") or "A1")
     goal_label = str(profile.get("goal_label") or "Noma'lum")
     daily_time = int(profile.get("daily_time_minutes") or 15)
@@ -43,7 +44,7 @@ async def show_profile(message: Message):
     builder.row(InlineKeyboardButton(text="✏️ Ma'lumotlarni o'zgartirish", callback_data="profile_onboarding_start"))
     builder.row(InlineKeyboardButton(text="🏠 Bosh menyu", callback_data="home"))
     
-    StatsService.log_navigation(user_id, "profile")
+    await run_db(StatsService.log_navigation, user_id, "profile")
     
     await cast(
         Awaitable[Message],
@@ -62,5 +63,5 @@ async def profile_edit_info_callback(call: CallbackQuery, state: FSMContext):
         await call.answer("Xabar topilmadi.", show_alert=True)
         return
     await call.answer()
-    StatsService.log_navigation(call.from_user.id, "profile_edit", entry_type="callback")
+    await run_db(StatsService.log_navigation, call.from_user.id, "profile_edit", entry_type="callback")
     await cast(Awaitable[None], start_onboarding(message, state, force=True))
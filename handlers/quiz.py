@@ -11,8 +11,9 @@ from typing import Awaitable, cast
 
 from services.assessment_service import AssessmentService
 from services.stats_service import StatsService
-from services.learning_service import LearningService
 from keyboards.builders import get_levels_keyboard, get_quiz_length_keyboard
+from database.aio import run_db
+from database.review_buffer import flush_quiz_answers, record_quiz_answer
 from utils.ui_utils import send_single_ui_message
 
 router = Router()
@@ -33,7 +34,7 @@ async def quiz_start_handler(message: Message, state: FSMContext):
 
     if not message.from_user:
         return
-    StatsService.log_navigation(message.from_user.id, "quiz_test", entry_type="text")
+    await run_db(StatsService.log_navigation, message.from_user.id, "quiz_test", entry_type="text")
 
     await cast(
         Awaitable[Message],
@@ -83,7 +84,7 @@ async def quiz_start_questions(call: CallbackQuery, state: FSMContext):
     level = parts[2]
     length = int(parts[3])
 
-    questions = AssessmentService.generate_quiz(level, length)
+    questions = await run_db(AssessmentService.generate_quiz, level, length)
     if not questions:
         await call.answer("Savollar toplishda xatolik (so'zlar kam).", show_alert=True)
         return
@@ -119,9 +120,9 @@ async def quiz_answer_handler(call: CallbackQuery, state: FSMContext):
     # Update Mastery if it's a word-based quiz
     if not call.from_user:
         return
-    LearningService.process_review_result(
-        call.from_user.id, questions[idx]["word_id"], is_correct
-    )
+    word_id = questions[idx].get("word_id")
+    if word_id is not None:
+        await record_quiz_answer(call.from_user.id, word_id, is_correct)
 
     if is_correct:
         score += 1
@@ -135,6 +136,7 @@ async def quiz_answer_handler(call: CallbackQuery, state: FSMContext):
     if idx < len(questions):
         await _send_next_question(call, questions[idx], idx, len(questions))
     else:
+        await flush_quiz_answers(call.from_user.id)
         await _show_quiz_results(call, score, len(questions), data["level"])
         await state.clear()
 
@@ -188,7 +190,8 @@ async def _show_quiz_results(call, score, total, level):
 
     if not call.from_user:
         return
-    StatsService.mark_progress(
+    await run_db(
+        StatsService.mark_progress,
         call.from_user.id, "quiz", level, completed=(percentage >= 80)
     )
     message = call.message if isinstance(call.message, Message) else None
@@ -6,6 +6,7 @@ from services.user_service import UserService
 from services.learning_service import LearningService
 from utils.ui_utils import _get_progress_bar
 from utils.ui_utils import send_single_ui_message
+from database.aio import run_db
 from database.connection import get_connection
 
 router = Router()
@@ -45,85 +46,44 @@ def _get_results_snapshot(user_id: int) -> dict:
         "speaking_completed": 0,
         "speaking_last_at": None,
     }
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     cursor = conn.cursor()
     try:
+        # One primary-key lookup; the row is kept current by the writers
         cursor.execute(
-            "SELECT COUNT(*), MAX(created_at) FROM event_logs WHERE user_id = ? AND event_type = ?",
-            (user_id, "daily_lesson_completed"),
-        )
-        row = cursor.fetchone()
-        if row:
-            snapshot["daily_total_completed"] = int(row[0] or 0)
-            snapshot["daily_last_completed_at"] = row[1]
-
-        cursor.execute(
-            "SELECT score, total, created_at FROM quiz_results WHERE user_id = ?",
+            """
+            SELECT daily_completed, daily_last_at,
+                   quiz_attempts, quiz_pct_sum, quiz_pct_count, quiz_best_pct,
+                   quiz_latest_score, quiz_latest_total, quiz_latest_at,
+                   writing_submissions, writing_submission_last_at, writing_events, writing_event_last_at,
+                   speaking_submissions, speaking_submission_last_at, speaking_events, speaking_event_last_at
+            FROM user_stats_summary WHERE user_id = ?
+            """,
             (user_id,),
         )
-        quiz_rows = cursor.fetchall() or []
-        if quiz_rows:
-            quiz_attempts = len(quiz_rows)
-            snapshot["quiz_attempts"] = quiz_attempts
-            pct_values = []
-            for item in quiz_rows:
-                score = int(item[0] or 0)
-                total = int(item[1] or 0)
-                if total > 0:
-                    pct_values.append((score / total) * 100.0)
-            if pct_values:
-                snapshot["quiz_avg_pct"] = round(sum(pct_values) / len(pct_values), 1)
-                snapshot["quiz_best_pct"] = round(max(pct_values), 1)
-            latest = sorted(
-                quiz_rows,
-                key=lambda r: _to_datetime(r[2]) or datetime.datetime.min,
-                reverse=True,
-            )[0]
-            snapshot["quiz_latest_score"] = int(latest[0] or 0)
-            snapshot["quiz_latest_total"] = int(latest[1] or 0)
-            snapshot["quiz_latest_at"] = latest[2]
-
-        cursor.execute(
-            "SELECT COUNT(*), MAX(created_at) FROM user_submissions "
-            "WHERE user_id = ? AND LOWER(module) IN (?, ?)",
-            (user_id, "writing", "schreiben"),
-        )
-        row = cursor.fetchone()
-        writing_sub_count = int((row[0] if row else 0) or 0)
-        writing_sub_last = row[1] if row else None
-
-        cursor.execute(
-            "SELECT COUNT(*), MAX(created_at) FROM event_logs "
-            "WHERE user_id = ? AND LOWER(event_type) LIKE ?",
-            (user_id, "writing_task_completed_%"),
-        )
         row = cursor.fetchone()
-        writing_evt_count = int((row[0] if row else 0) or 0)
-        writing_evt_last = row[1] if row else None
-
-        snapshot["writing_completed"] = writing_sub_count if writing_sub_count > 0 else writing_evt_count
-        snapshot["writing_last_at"] = writing_sub_last or writing_evt_last
-
-        cursor.execute(
-            "SELECT COUNT(*), MAX(created_at) FROM user_submissions "
-            "WHERE user_id = ? AND LOWER(module) IN (?, ?)",
-            (user_id, "speaking", "sprechen"),
-        )
-        row = cursor.fetchone()
-        speaking_sub_count = int((row[0] if row else 0) or 0)
-        speaking_sub_last = row[1] if row else None
-
-        cursor.execute(
-            "SELECT COUNT(*), MAX(created_at) FROM event_logs "
-            "WHERE user_id = ? AND LOWER(event_type) LIKE ?",
-            (user_id, "speaking_task_completed_%"),
-        )
-        row = cursor.fetchone()
-        speaking_evt_count = int((row[0] if row else 0) or 0)
-        speaking_evt_last = row[1] if row else None
-
-        snapshot["speaking_completed"] = speaking_sub_count if speaking_sub_count > 0 else speaking_evt_count
-        snapshot["speaking_last_at"] = speaking_sub_last or speaking_evt_last
+        if not row:
+            return snapshot
+        snapshot["daily_total_completed"] = int(row[0] or 0)
+        snapshot["daily_last_completed_at"] = row[1]
+
+        snapshot["quiz_attempts"] = int(row[2] or 0)
+        pct_count = int(row[4] or 0)
+        if pct_count:
+            snapshot["quiz_avg_pct"] = round(float(row[3] or 0) / pct_count, 1)
+            snapshot["quiz_best_pct"] = round(float(row[5] or 0), 1)
+        if snapshot["quiz_attempts"]:
+            snapshot["quiz_latest_score"] = int(row[6] or 0)
+            snapshot["quiz_latest_total"] = int(row[7] or 0)
+            snapshot["quiz_latest_at"] = row[8]
+
+        writing_sub_count = int(row[9] or 0)
+        snapshot["writing_completed"] = writing_sub_count if writing_sub_count > 0 else int(row[11] or 0)
+        snapshot["writing_last_at"] = row[10] or row[12]
+
+        speaking_sub_count = int(row[13] or 0)
+        snapshot["speaking_completed"] = speaking_sub_count if speaking_sub_count > 0 else int(row[15] or 0)
+        snapshot["speaking_last_at"] = row[14] or row[16]
     except Exception:
         return snapshot
     finally:
@@ -140,11 +100,11 @@ async def show_stats_dashboard(message: Message):
     if not message.from_user:
         return
     user_id = message.from_user.id
-    profile = UserService.get_profile(user_id) or {}
+    profile = await run_db(UserService.get_profile, user_id) or {}
     level = str(profile.get("current_level") or "A1")
-    mastery = LearningService.get_mastery_level(user_id, level)
+    mastery = await run_db(LearningService.get_mastery_level, user_id, level)
     progress_bar = _get_progress_bar(mastery["percentage"])
-    snapshot = _get_results_snapshot(user_id)
+    snapshot = await run_db(_get_results_snapshot, user_id)
 
     status_emoji = "🟢" if mastery["percentage"] >= 60 else "🟡" if mastery["percentage"] >= 30 else "🔴"
     quiz_latest_line = "-"
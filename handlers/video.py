@@ -3,6 +3,7 @@ import os
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from keyboards.builders import get_levels_keyboard
+from database.aio import run_db
 from database.repositories.progress_repository import record_navigation_event, log_event
 from utils.ui_utils import send_single_ui_message
 
@@ -24,7 +25,7 @@ async def video_materials_menu(message: Message):
         pass
     if not message.from_user:
         return
-    record_navigation_event(message.from_user.id, "video_materials_menu", entry_type="text")
+    await run_db(record_navigation_event, message.from_user.id, "video_materials_menu", entry_type="text")
     text = (
         "🎥 **Video va materiallar**\n\n"
         "Kerakli bo'limni tanlang:"
@@ -76,7 +77,7 @@ async def video_list_handler(call: CallbackQuery):
     if not message:
         await call.answer("Xabar topilmadi.", show_alert=True)
         return
-    record_navigation_event(call.from_user.id, "video_materials", level=level, entry_type="callback")
+    await run_db(record_navigation_event, call.from_user.id, "video_materials", level=level, entry_type="callback")
     all_videos = load_videos()
     
     videos = [v for v in all_videos if v['level'] == level]
@@ -126,7 +127,7 @@ async def video_watch_handler(call: CallbackQuery):
         await call.answer("Video topilmadi.", show_alert=True)
         return
         
-    log_event(call.from_user.id, "video_watch", section_name="video", level=video['level'], metadata={"video_id": video_id})
+    await run_db(log_event, call.from_user.id, "video_watch", section_name="video", level=video['level'], metadata={"video_id": video_id})
         
     text = (
         f"🎬 **{video['title']}**\n\n"
@@ -7,10 +7,18 @@ from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_applicati
 
 from core.config import settings
 from database import create_table, bootstrap_words_if_empty
+from database.aio import shutdown_db_executor
+from database.notify import start_listener, stop_listener
+from database.telemetry import start_telemetry, stop_telemetry
+from database.review_buffer import start_review_buffer, stop_review_buffer
+from database.ui_messages import start_ui_message_tracker, stop_ui_message_tracker
+from database.word_catalog import load_word_catalog
 from utils.db_fsm_storage import DBFSMStorage
+from utils.broadcast_worker import stop_broadcast_worker
 from utils.scheduler import start_scheduler, stop_scheduler
 from utils.runtime_state import mark_started
 from utils.update_tracking import UpdateTrackingMiddleware
+from utils.unit_of_work import UnitOfWorkFlushMiddleware, UnitOfWorkMiddleware
 from utils.single_instance import SingleInstanceLock
 from utils.fsm_utils import StateCleanupMiddleware
 
@@ -41,6 +49,8 @@ async def main():
     # Initialize Database
     create_table()
     bootstrap_words_if_empty()
+    catalog = load_word_catalog()
+    logging.info("Word catalog loaded: %d words", len(catalog))
     logging.info("DB path: %s", settings.db_path)
     
     if not settings.bot_token:
@@ -62,7 +72,9 @@ async def main():
     
     # Middlewares
     dp.update.outer_middleware(UpdateTrackingMiddleware())
+    dp.update.outer_middleware(UnitOfWorkMiddleware())
     dp.update.outer_middleware(StateCleanupMiddleware())
+    bot.session.middleware(UnitOfWorkFlushMiddleware())
     
     # Register Routers
     routers = [
@@ -94,6 +106,7 @@ async def main():
     user_commands = [
         types.BotCommand(command="start", description="Botni ishga tushirish"),
         types.BotCommand(command="menu", description="Bosh menyu"),
+        types.BotCommand(command="search", description="Lug‘atdan so‘z qidirish"),
         types.BotCommand(command="stats", description="Mening natijalarim"),
         types.BotCommand(command="profile", description="Profil sozlamalari"),
         types.BotCommand(command="version", description="Bot versiyasi"),
@@ -115,18 +128,29 @@ async def main():
             types.BotCommand(command="backup_now", description="Backup yaratish"),
             types.BotCommand(command="diag_db", description="DB diagnostika"),
             types.BotCommand(command="announce_update", description="Update e'lonini yuborish"),
+            types.BotCommand(command="announce_cancel", description="E'lonni to'xtatish"),
+            types.BotCommand(command="announce_resume", description="E'lonni davom ettirish"),
         ]
         await bot.set_my_commands(
             admin_commands,
             scope=types.BotCommandScopeChat(chat_id=int(settings.admin_id)),
         )
 
+    await start_telemetry()
+    await start_ui_message_tracker()
+    await start_review_buffer()
+    start_listener()
     await start_scheduler(bot)
 
     if is_webhook_mode:
         if not settings.webhook_url:
             logging.error("WEBHOOK_URL (or WEBHOOK_BASE_URL + WEBHOOK_PATH) is required in webhook mode.")
+            await stop_broadcast_worker()
             stop_scheduler()
+            stop_listener()
+            await stop_review_buffer()
+            await stop_ui_message_tracker()
+            await stop_telemetry()
             return
 
         await bot.set_webhook(
@@ -160,18 +184,30 @@ async def main():
             while True:
                 await asyncio.sleep(3600)
         finally:
+            await stop_broadcast_worker()
             stop_scheduler()
             try:
                 await runner.cleanup()
             except Exception:
                 pass
+            stop_listener()
+            await stop_review_buffer()
+            await stop_ui_message_tracker()
+            await stop_telemetry()
+            shutdown_db_executor()
     else:
         await bot.delete_webhook(drop_pending_updates=True)
         logging.info("🚀 Germanic Bot started in polling mode.")
         try:
             await dp.start_polling(bot)
         finally:
+            await stop_broadcast_worker()
             stop_scheduler()
+            stop_listener()
+            await stop_review_buffer()
+            await stop_ui_message_tracker()
+            await stop_telemetry()
+            shutdown_db_executor()
             if instance_lock:
                 instance_lock.release()
 
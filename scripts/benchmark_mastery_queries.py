@@ -0,0 +1,139 @@
+"""
+Compares the old CAST-based mastery/mistake joins with the integer joins on
+a synthetic SQLite database: prints EXPLAIN QUERY PLAN and average latency.
+
+Usage:
+    python scripts/benchmark_mastery_queries.py --users 2000 --runs 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LEVELS = ["A1", "A2", "B1", "B2", "C1"]
+
+QUERIES = {
+    "due_reviews": (
+        """
+        SELECT m.item_id FROM user_mastery m
+        JOIN words w ON CAST(w.id AS TEXT) = CAST(m.item_id AS TEXT)
+        WHERE m.user_id = ? AND w.level = ? AND m.next_review <= CURRENT_TIMESTAMP
+        ORDER BY m.next_review ASC
+        LIMIT 20
+        """,
+        """
+        SELECT m.item_id FROM user_mastery m
+        JOIN words w ON w.id = m.item_id
+        WHERE m.user_id = ? AND w.level = ? AND m.next_review <= CURRENT_TIMESTAMP
+        ORDER BY m.next_review ASC
+        LIMIT 20
+        """,
+    ),
+    "level_progress": (
+        """
+        SELECT COUNT(*) FROM user_mastery m
+        JOIN words w ON CAST(w.id AS TEXT) = CAST(m.item_id AS TEXT)
+        WHERE m.user_id = ? AND w.level = ? AND m.box >= 4
+        """,
+        """
+        SELECT COUNT(*) FROM user_mastery m
+        JOIN words w ON w.id = m.item_id
+        WHERE m.user_id = ? AND w.level = ? AND m.box >= 4
+        """,
+    ),
+    "weighted_mistakes": (
+        """
+        SELECT m.item_id FROM user_mistakes m
+        JOIN words w ON CAST(w.id AS TEXT) = m.item_id
+        WHERE m.user_id = ? AND w.level = ? AND m.module = 'vocab' AND m.mastered = 0
+        ORDER BY m.mistake_count DESC, m.last_mistake_at DESC
+        LIMIT 20
+        """,
+        """
+        SELECT m.word_id FROM user_mistakes m
+        JOIN words w ON w.id = m.word_id
+        WHERE m.user_id = ? AND w.level = ? AND m.module = 'vocab' AND m.mastered = 0
+        ORDER BY m.mistake_count DESC, m.last_mistake_at DESC
+        LIMIT 20
+        """,
+    ),
+}
+
+
+def _populate(cur, users: int, words: int, per_user: int, rng: random.Random):
+    cur.executemany(
+        "INSERT INTO words (de, uz, level) VALUES (?, ?, ?)",
+        [(f"Wort{i}", f"so'z{i}", LEVELS[i % len(LEVELS)]) for i in range(words)],
+    )
+    word_ids = list(range(1, words + 1))
+    mastery_rows = []
+    mistake_rows = []
+    for user_id in range(1, users + 1):
+        for word_id in rng.sample(word_ids, per_user):
+            mastery_rows.append((user_id, word_id, rng.randint(0, 6), f"2024-01-{rng.randint(1, 28):02d} 00:00:00"))
+        for word_id in rng.sample(word_ids, per_user):
+            mistake_rows.append((user_id, str(word_id), rng.randint(1, 5), word_id))
+    cur.executemany(
+        "INSERT INTO user_mastery (user_id, item_id, box, next_review) VALUES (?, ?, ?, ?)",
+        mastery_rows,
+    )
+    cur.executemany(
+        "INSERT INTO user_mistakes (user_id, item_id, module, mistake_count, word_id) VALUES (?, ?, 'vocab', ?, ?)",
+        mistake_rows,
+    )
+    cur.execute("ANALYZE")
+
+
+def _plan(cur, sql: str) -> list[str]:
+    cur.execute("EXPLAIN QUERY PLAN " + sql, (1, "A1"))
+    return [str(row[3]) for row in cur.fetchall()]
+
+
+def _avg_ms(cur, sql: str, users: int, runs: int, rng: random.Random) -> float:
+    started = time.perf_counter()
+    for _ in range(runs):
+        cur.execute(sql, (rng.randint(1, users), rng.choice(LEVELS)))
+        cur.fetchall()
+    return (time.perf_counter() - started) * 1000 / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CAST vs integer joins for mastery/mistake queries")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=12000)
+    parser.add_argument("--per-user", type=int, default=40, help="mastery and mistake rows per user")
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="germanic_bench_")
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["DB_PATH"] = os.path.join(tmp_dir, "bench.db")
+
+    from database import create_table
+    from database.connection import get_connection
+
+    create_table()
+    rng = random.Random(42)
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        _populate(cur, args.users, args.words, args.per_user, rng)
+        conn.commit()
+        print(f"DB: {os.environ['DB_PATH']} users={args.users} words={args.words} rows/user={args.per_user}")
+        for name, (old_sql, new_sql) in QUERIES.items():
+            print(f"\n=== {name} ===")
+            for label, sql in (("before (CAST join)", old_sql), ("after (integer join)", new_sql)):
+                print(f"{label}: {_avg_ms(cur, sql, args.users, args.runs, rng):.3f} ms/query")
+                for line in _plan(cur, sql):
+                    print(f"    {line}")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
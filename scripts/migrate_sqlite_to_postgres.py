@@ -34,7 +34,15 @@ TABLES = [
     "grammar_progress",
     "event_logs",
     "user_submissions",
+    "broadcast_messages",
     "broadcast_jobs",
+    "broadcast_daily_summary",
+    "daily_activity",
+    "daily_active_users",
+    "weak_item_counts",
+    "stats_counters",
+    "user_stats_summary",
+    "ui_messages",
 ]
 
 SEQUENCE_TABLES = [
@@ -44,6 +52,7 @@ SEQUENCE_TABLES = [
     ("quiz_results", "id"),
     ("event_logs", "id"),
     ("user_submissions", "id"),
+    ("broadcast_messages", "id"),
     ("broadcast_jobs", "id"),
 ]
 
@@ -36,7 +36,7 @@ def _report_users(cur, since_date: str):
     total = _one(cur, "SELECT COUNT(*) FROM user_profile")
     new_users = _one(
         cur,
-        "SELECT COUNT(*) FROM user_profile WHERE DATE(created_at) >= ?",
+        "SELECT COUNT(*) FROM user_profile WHERE created_at >= ?",
         (since_date,),
     )
     print(f"Total users: {total}")
@@ -47,7 +47,7 @@ def _report_users(cur, since_date: str):
         """
         SELECT DATE(created_at) AS day, COUNT(*) AS cnt
         FROM user_profile
-        WHERE DATE(created_at) >= ?
+        WHERE created_at >= ?
         GROUP BY DATE(created_at)
         ORDER BY day ASC
         """,
@@ -68,7 +68,7 @@ def _report_activity(cur, since_date: str):
         """
         SELECT DATE(created_at) AS day, COUNT(DISTINCT user_id) AS dau
         FROM event_logs
-        WHERE DATE(created_at) >= ?
+        WHERE created_at >= ?
         GROUP BY DATE(created_at)
         ORDER BY day ASC
         """,
@@ -86,7 +86,7 @@ def _report_activity(cur, since_date: str):
         """
         SELECT COALESCE(section_name, 'unknown') AS section_name, COUNT(*) AS cnt
         FROM event_logs
-        WHERE DATE(created_at) >= ?
+        WHERE created_at >= ?
         GROUP BY COALESCE(section_name, 'unknown')
         ORDER BY cnt DESC
         LIMIT 10
@@ -107,7 +107,7 @@ def _report_daily_progress(cur, since_date: str):
         SELECT COUNT(*)
         FROM user_progress
         WHERE module_name = 'daily_lesson'
-          AND DATE(last_active) >= ?
+          AND last_active >= ?
         """,
         (since_date,),
     )
@@ -118,7 +118,7 @@ def _report_daily_progress(cur, since_date: str):
         FROM user_progress
         WHERE module_name = 'daily_lesson'
           AND completion_status = 1
-          AND DATE(last_active) >= ?
+          AND last_active >= ?
         """,
         (since_date,),
     )
@@ -194,7 +194,7 @@ def main():
     print("Germanic Bot Ops Report")
     print(f"Date window: {since_date}..{datetime.date.today().isoformat()} ({days} days)")
 
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     cur = conn.cursor()
     try:
         _report_users(cur, since_date)
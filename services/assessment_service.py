@@ -3,10 +3,11 @@ from database.repositories.word_repository import get_random_words
 
 class AssessmentService:
     @staticmethod
-    def generate_quiz(level: str, length: int = 10):
+    def generate_quiz(level: str, length: int = 10, rng: random.Random | None = None):
+        rng = rng or random.Random()
         # Fetch more words than needed to have distractor pool
         pool_size = min(length * 5, 100)
-        word_pool = get_random_words(level, limit=pool_size)
+        word_pool = get_random_words(level, limit=pool_size, rng=rng)
         
         if len(word_pool) < 4:
             return None
@@ -18,13 +19,13 @@ class AssessmentService:
         
         for correct in correct_pool:
             # Pick 3 distractors
-            distractors = random.sample(
+            distractors = rng.sample(
                 [w for w in distractor_pool if w['id'] != correct['id']], 
                 k=min(3, len(distractor_pool)-1)
             )
             
             options = [correct['uz']] + [w['uz'] for w in distractors]
-            random.shuffle(options)
+            rng.shuffle(options)
             
             questions.append({
                 "word_id": correct['id'],
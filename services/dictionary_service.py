@@ -1,31 +1,51 @@
-from database.repositories.word_repository import (
-    get_words_by_level, 
-    get_words_by_level_and_letter,
-    get_total_words_count,
-    get_total_words_count_by_letter
-)
+from database.repositories.word_repository import search_word_ids
+from database.word_catalog import get_word_catalog
 from core.config import settings
 
 class DictionaryService:
+    SEARCH_MIN_LENGTH = 2
+    SEARCH_LIMIT = 10
+
     @staticmethod
-    def get_page(level: str, offset: int = 0, letter: str | None = None):
+    def get_page(level: str, offset: int = 0, letter: str | None = None, after_id: int | None = None):
+        """
+        One page of a level (optionally one letter) in sort-key order.
+        With after_id the page starts right after that word (keyset cursor),
+        so deep pages cost the same as the first one; offset is then derived.
+        """
         limit = settings.page_size
+        catalog = get_word_catalog()
         
-        if letter:
-            words = get_words_by_level_and_letter(level, letter, limit=limit, offset=offset)
-            total = get_total_words_count_by_letter(level, letter)
-        else:
-            words = get_words_by_level(level, limit=limit, offset=offset)
-            total = get_total_words_count(level)
+        if after_id is not None:
+            offset = catalog.position_after(level, after_id, letter=letter)
+        records = catalog.page(level, offset=offset, limit=limit, letter=letter)
+        words = [record.as_dict() for record in records]
+        total = catalog.count_by_letter(level, letter) if letter else catalog.count(level)
             
-        has_next = (offset + limit) < total
+        has_next = (offset + len(words)) < total
         return {
             "words": words,
             "total": total,
             "has_next": has_next,
-            "limit": limit
+            "limit": limit,
+            "offset": offset,
+            "next_cursor": words[-1]["id"] if words else None,
         }
 
+    @staticmethod
+    def search(query: str, level: str | None = None, limit: int | None = None):
+        """
+        Ranked German/Uzbek lookup. Articles, case, umlauts, ß and apostrophes
+        are ignored and each word of the query may be a prefix. Queries shorter
+        than SEARCH_MIN_LENGTH letters return no words.
+        """
+        query = (query or "").strip()
+        if sum(ch.isalnum() for ch in query) < DictionaryService.SEARCH_MIN_LENGTH:
+            return {"query": query, "words": [], "too_short": True}
+        ids = search_word_ids(query, level=level, limit=limit or DictionaryService.SEARCH_LIMIT)
+        words = [record.as_dict() for record in get_word_catalog().get_many(ids)]
+        return {"query": query, "words": words, "too_short": False}
+
     @staticmethod
     def get_alphabet():
         return list("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
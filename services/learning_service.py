@@ -1,5 +1,12 @@
 import datetime
-from database.repositories.mastery_repository import get_due_reviews, update_mastery, get_level_progress_stats, get_weighted_mistake_word_ids
+import random
+from database.repositories.mastery_repository import (
+    get_due_reviews,
+    get_level_progress_stats,
+    get_mastered_word_ids,
+    get_weighted_mistake_word_ids,
+    update_mastery,
+)
 from database.repositories.word_repository import get_words_by_ids, get_random_words
 from database.repositories.lesson_repository import get_last_daily_plan, get_grammar_coverage_map
 from services.grammar_service import GrammarService
@@ -7,9 +14,10 @@ from core.config import settings
 
 class LearningService:
     @staticmethod
-    def get_daily_lesson_pool(user_id: int, level: str, count: int = 10):
+    def get_daily_lesson_pool(user_id: int, level: str, count: int = 10, rng: random.Random | None = None):
         """
         Mixes SRS due reviews with new words for a daily session.
+        New words never repeat a due review or a word the user already mastered.
         """
         # 1. Get due reviews
         due_ids = get_due_reviews(user_id, limit=int(count * settings.daily_mistake_blend))
@@ -19,7 +27,8 @@ class LearningService:
         remaining = count - len(due_words)
         new_words = []
         if remaining > 0:
-            new_words = get_random_words(level, limit=remaining)
+            exclude_ids = set(due_ids) | set(get_mastered_word_ids(user_id, level))
+            new_words = get_random_words(level, limit=remaining, exclude_ids=exclude_ids, rng=rng)
             
         return {
             "reviews": due_words,
@@ -42,7 +51,7 @@ class LearningService:
         }
 
     @staticmethod
-    def create_daily_plan(user_id: int, profile: dict):
+    def create_daily_plan(user_id: int, profile: dict, rng: random.Random | None = None):
         level = profile.get("current_level", "A1")
         # Logic from daily_lesson.py build_daily_plan
         minutes = int(profile.get("daily_time_minutes") or profile.get("daily_target") or 10)
@@ -52,10 +61,11 @@ class LearningService:
         avoid_topic_id = last_plan_obj.get("grammar_topic_id") if last_plan_obj else None
 
         topic = LearningService.pick_grammar_topic(user_id, level, avoid_topic_id)
-        vocab_words = LearningService.select_words_for_topic(level, topic, vocab_n)
+        mastered_ids = set(get_mastered_word_ids(user_id, level))
+        vocab_words = LearningService.select_words_for_topic(level, topic, vocab_n, exclude_ids=mastered_ids, rng=rng)
         vocab_ids = [w["id"] for w in vocab_words]
         
-        practice_ids = LearningService._pick_practice_ids(user_id, level, quiz_n, vocab_ids)
+        practice_ids = LearningService._pick_practice_ids(user_id, level, quiz_n, vocab_ids, rng=rng)
         
         production_mode = "writing" if level in ("A1", "A2") else "speaking" if level == "C1" else ("speaking" if (datetime.date.today().toordinal() + user_id) % 2 else "writing")
 
@@ -82,18 +92,21 @@ class LearningService:
         return least_seen[0]
 
     @staticmethod
-    def select_words_for_topic(level, topic, count):
-        pool = get_random_words(level, limit=count * 10)
+    def select_words_for_topic(level, topic, count, exclude_ids=None, rng=None):
+        pool = get_random_words(level, limit=count * 10, exclude_ids=exclude_ids, rng=rng)
+        if len(pool) < count and exclude_ids:
+            # Nearly everything is excluded: top up rather than return a short list
+            pool += get_random_words(level, limit=count - len(pool), exclude_ids={w['id'] for w in pool}, rng=rng)
         # Simple scoring based on topic text
         topic_text = f"{topic.get('title','')} {topic.get('content','')}".lower()
         scored = sorted(pool, key=lambda w: (1 if w['de'].lower() in topic_text or w['uz'].lower() in topic_text else 0), reverse=True)
         return scored[:count]
 
     @staticmethod
-    def _pick_practice_ids(user_id, level, count, exclude_ids):
+    def _pick_practice_ids(user_id, level, count, exclude_ids, rng=None):
         mistake_ids = get_weighted_mistake_word_ids(user_id, level, limit=10) or []
         picked = [wid for wid in mistake_ids if wid not in exclude_ids][:count]
         if len(picked) < count:
-            extra = get_random_words(level, limit=count - len(picked))
-            picked.extend([w['id'] for w in extra if w['id'] not in exclude_ids and w['id'] not in picked])
+            extra = get_random_words(level, limit=count - len(picked), exclude_ids=set(exclude_ids) | set(picked), rng=rng)
+            picked.extend(w['id'] for w in extra)
         return picked[:count]
@@ -1,7 +1,12 @@
+import asyncio
 import datetime
 
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramNotFound, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
 from handlers.daily import _current_time_slot, _daily_slot_key, _retry_delay_seconds
-from handlers.dictionary import _parse_dict_next_callback
+from utils.broadcast_sender import FAILED, RETRY, SENT, UNSUBSCRIBE, BroadcastSender, classify_send_error
+from handlers.dictionary import _parse_dict_cursor_callback, _parse_dict_next_callback
 
 
 def test_parse_dict_next_callback_normal_level():
@@ -20,6 +25,13 @@ def test_parse_dict_next_callback_rejects_invalid_shapes():
     assert _parse_dict_next_callback("dict_prev_A1_0") is None
 
 
+def test_parse_dict_cursor_callback_shapes():
+    assert _parse_dict_cursor_callback("dict_next_A1_k123") == ("A1", 123, None)
+    assert _parse_dict_cursor_callback("dict_next_letter_B_A2_k7") == ("A2", 7, "B")
+    assert _parse_dict_cursor_callback("dict_next_A1_20") is None
+    assert _parse_dict_cursor_callback("dict_next_A1_kx") is None
+
+
 def test_current_time_slot_format():
     slot = _current_time_slot()
     assert len(slot) == 5
@@ -38,3 +50,50 @@ def test_retry_delay_seconds_growth_and_cap():
     assert _retry_delay_seconds(1) == 30
     assert _retry_delay_seconds(2) == 60
     assert _retry_delay_seconds(10) == 900
+
+
+def test_classify_send_error_separates_permanent_failures():
+    method = SendMessage(chat_id=1, text="x")
+    assert classify_send_error(TelegramForbiddenError(method, "Forbidden: bot was blocked by the user")) == UNSUBSCRIBE
+    assert classify_send_error(TelegramBadRequest(method, "Bad Request: chat not found")) == UNSUBSCRIBE
+    assert classify_send_error(TelegramBadRequest(method, "Bad Request: can't parse entities")) == FAILED
+    assert classify_send_error(TelegramRetryAfter(method, "Too Many Requests", 3)) == RETRY
+    assert classify_send_error(TelegramNotFound(method, "Not Found")) == RETRY
+    assert classify_send_error(RuntimeError("connection reset")) == RETRY
+
+
+def test_broadcast_sender_honours_retry_after_and_slows_down():
+    method = SendMessage(chat_id=1, text="x")
+    sender = BroadcastSender(rate_per_second=20, per_chat_interval_ms=0, max_retry_after_wait=5, recover_after=2)
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise TelegramRetryAfter(method, "Too Many Requests", 0)
+
+    async def flooded():
+        raise TelegramRetryAfter(method, "Too Many Requests", 60)
+
+    assert asyncio.run(sender.send(1, flaky)) == (SENT, None, 0)
+    assert len(calls) == 2
+    assert sender.rate == 10 and sender.flood_waits == 1
+    # Too long to wait in place: handed back with the server's delay
+    outcome, _, retry_after = asyncio.run(sender.send(2, flooded))
+    assert (outcome, retry_after) == (RETRY, 60)
+    assert sender.rate == 5
+
+
+def test_broadcast_sender_paces_each_chat():
+    sender = BroadcastSender(rate_per_second=1000, per_chat_interval_ms=50, max_retry_after_wait=0)
+    sent_at = []
+
+    async def send():
+        sent_at.append(asyncio.get_running_loop().time())
+
+    async def run():
+        await asyncio.gather(sender.send(7, send), sender.send(7, send), sender.send(8, send))
+
+    asyncio.run(run())
+    assert len(sent_at) == 3
+    assert max(sent_at) - min(sent_at) >= 0.045
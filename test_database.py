@@ -0,0 +1,1205 @@
+import asyncio
+import contextvars
+import dataclasses
+import sqlite3
+import threading
+
+import pytest
+
+from database import connection, migrations
+from database.aio import run_db
+from database.connection import (
+    CompatCursor,
+    _to_postgres_placeholders,
+    begin_unit_of_work,
+    end_unit_of_work,
+    get_connection,
+)
+from database.migrations import apply_migrations, discover_migrations, get_schema_version
+from database.repositories.mastery_repository import get_weighted_mistake_word_ids
+from database.repositories.progress_repository import log_mistake
+from database.telemetry import TelemetryBuffer
+
+
+def test_sqlite_pool_enables_wal_and_pragmas(sqlite_db):
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("PRAGMA journal_mode")
+        assert str(cur.fetchone()[0]).lower() == "wal"
+        cur.execute("PRAGMA busy_timeout")
+        assert int(cur.fetchone()[0]) == sqlite_db.sqlite_busy_timeout_ms
+        cur.execute("PRAGMA synchronous")
+        assert int(cur.fetchone()[0]) == 1  # NORMAL
+    finally:
+        conn.close()
+
+
+def test_sqlite_pool_reuses_connections(sqlite_db):
+    first = get_connection(readonly=True)
+    raw_first = first._conn
+    first.close()
+    second = get_connection(readonly=True)
+    try:
+        assert second._conn is raw_first
+    finally:
+        second.close()
+
+    writer = get_connection()
+    raw_writer = writer._conn
+    writer.close()
+    writer = get_connection()
+    try:
+        assert writer._conn is raw_writer
+    finally:
+        writer.close()
+
+
+def test_sqlite_reader_is_query_only(sqlite_db):
+    conn = get_connection(readonly=True)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.cursor().execute("CREATE TABLE t (id INTEGER)")
+    finally:
+        conn.close()
+
+
+def test_sqlite_release_rolls_back_uncommitted_writes(sqlite_db):
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("CREATE TABLE t (id INTEGER)")
+    conn.commit()
+    cur.execute("INSERT INTO t (id) VALUES (1)")
+    conn.close()
+
+    reader = get_connection(readonly=True)
+    try:
+        cur = reader.cursor()
+        cur.execute("SELECT COUNT(*) FROM t")
+        assert cur.fetchone()[0] == 0
+    finally:
+        reader.close()
+
+
+def test_sqlite_failed_calls_do_not_hold_pool_connections(sqlite_db, monkeypatch):
+    from database.repositories import session_repository
+
+    monkeypatch.setattr(connection, "settings", dataclasses.replace(sqlite_db, sqlite_busy_timeout_ms=500, sqlite_pool_max_size=2))
+    conn = get_connection()
+    conn.cursor().execute("CREATE TABLE t (id INTEGER)")
+    conn.commit()
+    conn.close()
+    with pytest.raises(sqlite3.OperationalError):
+        session_repository.delete_daily_lesson_state(1)
+
+    def _leak(readonly: bool):
+        leaked = get_connection(readonly=readonly)
+        leaked.cursor().execute("SELECT * FROM missing")
+
+    for readonly in (False, False, True, True, True):
+        with pytest.raises(sqlite3.OperationalError):
+            _leak(readonly)
+
+    conn = get_connection()
+    try:
+        conn.cursor().execute("INSERT INTO t (id) VALUES (1)")
+        conn.commit()
+    finally:
+        conn.close()
+    with get_connection(readonly=True) as reader:
+        assert reader.cursor().execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+
+
+def test_run_db_runs_off_loop_and_keeps_context():
+    marker = contextvars.ContextVar("marker", default=None)
+
+    def _probe():
+        return threading.current_thread().name, marker.get()
+
+    async def _main():
+        marker.set("update-1")
+        return await run_db(_probe)
+
+    thread_name, value = asyncio.run(_main())
+    assert thread_name.startswith("db")
+    assert value == "update-1"
+
+
+def _create_notes_table():
+    conn = get_connection()
+    try:
+        conn.cursor().execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT)")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _insert_note(body: str, commit: bool = True):
+    conn = get_connection()
+    try:
+        conn.cursor().execute("INSERT INTO notes (body) VALUES (?)", (body,))
+        if commit:
+            conn.commit()
+    finally:
+        conn.close()
+
+
+def _note_bodies() -> list[str]:
+    conn = get_connection(readonly=True)
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT body FROM notes ORDER BY id")
+        return [row[0] for row in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def test_unit_of_work_commits_once_at_the_end(sqlite_db):
+    _create_notes_table()
+    unit, token = begin_unit_of_work()
+    try:
+        assert _note_bodies() == []
+        assert not unit.holds_connection  # reads alone do not take the writer
+        _insert_note("a")
+        _insert_note("b")
+        assert _note_bodies() == ["a", "b"]  # reads see the unit's own writes
+    finally:
+        end_unit_of_work(token)
+    assert _note_bodies() == []
+    unit.commit()
+    assert _note_bodies() == ["a", "b"]
+
+
+def test_unit_of_work_discards_uncommitted_call(sqlite_db):
+    _create_notes_table()
+    unit, token = begin_unit_of_work()
+    try:
+        _insert_note("kept")
+        _insert_note("dropped", commit=False)
+    finally:
+        end_unit_of_work(token)
+    unit.commit()
+    assert _note_bodies() == ["kept"]
+
+
+def test_unit_of_work_rollback_releases_writer(sqlite_db):
+    _create_notes_table()
+    unit, token = begin_unit_of_work()
+    try:
+        _insert_note("a")
+    finally:
+        end_unit_of_work(token)
+    unit.rollback()
+    _insert_note("b")
+    assert _note_bodies() == ["b"]
+
+
+def test_postgres_placeholders_skip_quoted_literals():
+    sql = "SELECT '?' AS q, \"a?b\" FROM t WHERE x = ? AND y LIKE 'it''s?' AND z = ?"
+    assert _to_postgres_placeholders(sql) == (
+        "SELECT '?' AS q, \"a?b\" FROM t WHERE x = %s AND y LIKE 'it''s?' AND z = %s"
+    )
+
+
+def test_compat_cursor_rows_share_column_index():
+    class _Column:
+        def __init__(self, name):
+            self.name = name
+
+    class _RawCursor:
+        description = [_Column("id"), _Column("de")]
+
+        def execute(self, sql, params=None):
+            self.sql = sql
+
+        def fetchall(self):
+            return [(1, "Haus"), (2, "Baum")]
+
+    raw = _RawCursor()
+    cur = CompatCursor(raw)
+    rows = cur.execute("SELECT id, de FROM words WHERE level = ?", ("A1",)).fetchall()
+    assert raw.sql == "SELECT id, de FROM words WHERE level = %s"
+    assert rows[1]["de"] == "Baum"
+    assert dict(rows[0]) == {"id": 1, "de": "Haus"}
+    assert rows[0]._idx is rows[1]._idx
+
+
+def test_migrations_apply_once_and_record_versions(sqlite_db):
+    latest = discover_migrations()[-1].version
+    assert apply_migrations() == latest
+    assert get_schema_version() == latest
+    assert apply_migrations() == 0
+
+    conn = get_connection(readonly=True)
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name = 'idx_words_level_de'")
+        assert cur.fetchone() is not None
+    finally:
+        conn.close()
+
+
+def test_migrations_upgrade_legacy_user_profile(sqlite_db):
+    conn = get_connection()
+    try:
+        # Schema from before notification_time was introduced.
+        conn.cursor().execute(
+            "CREATE TABLE user_profile (user_id INTEGER PRIMARY KEY, current_level TEXT, goal TEXT, "
+            "daily_time_minutes INTEGER, onboarding_completed INTEGER, xp INTEGER, "
+            "created_at TIMESTAMP, updated_at TIMESTAMP)"
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    apply_migrations()
+
+    conn = get_connection(readonly=True)
+    try:
+        cur = conn.cursor()
+        cur.execute("PRAGMA table_info(user_profile)")
+        assert "notification_time" in {row[1] for row in cur.fetchall()}
+    finally:
+        conn.close()
+
+
+def test_failed_migration_rolls_back(sqlite_db, monkeypatch):
+    def _broken(cursor, backend):
+        cursor.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(migrations, "discover_migrations", lambda: [migrations.Migration(1, "broken", _broken)])
+    with pytest.raises(RuntimeError):
+        apply_migrations()
+
+    conn = get_connection(readonly=True)
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT name FROM sqlite_master WHERE name IN ('half_done', 'schema_migrations')")
+        assert cur.fetchall() == []
+    finally:
+        conn.close()
+
+
+def test_vocab_mistakes_join_on_integer_word_id(sqlite_db):
+    apply_migrations()
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("INSERT INTO words (id, de, uz, level) VALUES (7, 'Haus', 'uy', 'A1'), (8, 'Baum', 'daraxt', 'B1')")
+        conn.commit()
+    finally:
+        conn.close()
+
+    log_mistake(1, 7, "vocab")
+    log_mistake(1, 7, "vocab")
+    log_mistake(1, "8", "vocab")
+    log_mistake(1, "smoke_word", "vocab")
+
+    assert get_weighted_mistake_word_ids(1, "A1") == [7]
+    assert sorted(get_weighted_mistake_word_ids(1)) == [7, 8]
+
+
+def _count_rows(table):
+    conn = get_connection(readonly=True)
+    try:
+        cur = conn.cursor()
+        cur.execute(f"SELECT COUNT(*) FROM {table}")
+        return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_telemetry_buffer_batches_rows_and_flushes_on_stop(sqlite_db):
+    apply_migrations()
+    buffer = TelemetryBuffer(max_size=100, batch_size=50, flush_interval_ms=50)
+    assert not buffer.submit("navigation_logs", (1, "menu", None, "text"))
+
+    async def _main():
+        buffer.start()
+        for i in range(30):
+            assert buffer.submit("navigation_logs", (i, "menu", None, "text"))
+        worker = threading.Thread(
+            target=lambda: [buffer.submit("event_logs", (i, "click", None, None, None)) for i in range(10)]
+        )
+        worker.start()
+        worker.join()
+        await asyncio.sleep(0.2)
+        first = buffer.stats()
+        for i in range(5):
+            buffer.submit("navigation_logs", (i, "late", None, "text"))
+        await buffer.stop()
+        return first
+
+    first = asyncio.run(_main())
+    assert first["flushed_rows"] == 40 and first["flushes"] == 1 and first["depth"] == 0
+    assert _count_rows("navigation_logs") == 35
+    assert _count_rows("event_logs") == 10
+    assert buffer.stats()["flushed_rows"] == 45
+
+
+def test_telemetry_buffer_drops_rows_when_full(sqlite_db):
+    apply_migrations()
+    buffer = TelemetryBuffer(max_size=3, batch_size=10, flush_interval_ms=10_000)
+
+    async def _main():
+        buffer.start()
+        accepted = [buffer.submit("navigation_logs", (i, "menu", None, "text")) for i in range(8)]
+        depth = buffer.stats()["depth"]
+        await buffer.stop()
+        return accepted, depth
+
+    accepted, depth = asyncio.run(_main())
+    assert all(accepted)
+    assert depth == 3
+    assert buffer.stats()["dropped"] == 5
+    assert _count_rows("navigation_logs") == 3
+
+
+def test_admin_snapshot_reads_incremental_rollups(sqlite_db):
+    from database.repositories.admin_repository import get_admin_stats_snapshot
+    from database.repositories.progress_repository import log_event, record_navigation_event
+    from database.repositories.user_repository import add_user, get_or_create_user_profile
+
+    apply_migrations()
+    add_user(1, "One")
+    add_user(1, "One")
+    get_or_create_user_profile(2)
+    for user_id in (1, 1, 2, 1):
+        record_navigation_event(user_id, "menu")
+    log_event(1, "daily_lesson_completed", level="A1")
+    log_event(2, "grammar_topic_opened")
+    log_mistake(1, "42", "vocab")
+    log_mistake(1, "42", "vocab")
+    log_mistake(2, "42", "vocab")
+    log_mistake(2, "g_1", "grammar")
+
+    stats = get_admin_stats_snapshot()
+    assert stats["total_users"] == 2
+    assert stats["new_users_today"] == 2
+    assert stats["active_users_today"] == 2
+    assert stats["daily_completions_today"] == 1
+    assert stats["daily_completions_last_7_days"] == 1
+    assert stats["total_mistakes_logged"] == 3
+    assert stats["top_weak_topics"] == [{"topic_id": "42", "score": 3}, {"topic_id": "g_1", "score": 1}]
+
+
+def test_rollup_migration_backfills_existing_rows(sqlite_db, monkeypatch):
+    rollups = next(m for m in discover_migrations() if m.name == "daily_rollups")
+    earlier = [m for m in discover_migrations() if m.version < rollups.version]
+    with monkeypatch.context() as patch:
+        patch.setattr(migrations, "discover_migrations", lambda: earlier)
+        apply_migrations()
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("INSERT INTO user_profile (user_id, created_at) VALUES (1, '2024-05-01 10:00:00'), (2, '2024-05-02 09:00:00')")
+    cur.execute(
+        "INSERT INTO navigation_logs (user_id, section_name, created_at) VALUES "
+        "(1, 'a', '2024-05-01 10:00:00'), (1, 'b', '2024-05-01 11:00:00'), (2, 'a', '2024-05-01 12:00:00')"
+    )
+    cur.execute("INSERT INTO user_mistakes (user_id, item_id, module, mistake_count) VALUES (1, '7', 'vocab', 4)")
+    conn.commit()
+    conn.close()
+
+    apply_migrations()
+    conn = get_connection(readonly=True)
+    cur = conn.cursor()
+    cur.execute("SELECT day, active_users, new_users FROM daily_activity ORDER BY day")
+    assert [tuple(r) for r in cur.fetchall()] == [("2024-05-01", 2, 1), ("2024-05-02", 0, 1)]
+    cur.execute("SELECT name, value FROM stats_counters ORDER BY name")
+    assert [tuple(r) for r in cur.fetchall()] == [("user_mistakes", 1), ("user_profile", 2)]
+    conn.close()
+
+
+def test_results_summary_tracks_writers(sqlite_db):
+    from database.repositories.progress_repository import add_quiz_result, log_event
+    from database.repositories.session_repository import save_user_submission
+    from handlers.stats import _get_results_snapshot
+
+    apply_migrations()
+    assert _get_results_snapshot(1)["quiz_attempts"] == 0
+    add_quiz_result(1, "A1", 8, 10)
+    add_quiz_result(1, "A1", 3, 6)
+    add_quiz_result(1, "A1", 0, 0)
+    log_event(1, "daily_lesson_completed")
+    log_event(1, "daily_lesson_completed")
+    log_event(1, "Speaking_Task_Completed_dialog")
+    log_event(1, "writing_task_completed_letter")
+    save_user_submission(1, "Schreiben", "Hallo")
+    save_user_submission(2, "speaking", "Hallo")
+
+    snapshot = _get_results_snapshot(1)
+    assert snapshot["daily_total_completed"] == 2
+    assert snapshot["daily_last_completed_at"]
+    assert snapshot["quiz_attempts"] == 3
+    assert snapshot["quiz_avg_pct"] == 65.0
+    assert snapshot["quiz_best_pct"] == 80.0
+    assert (snapshot["quiz_latest_score"], snapshot["quiz_latest_total"]) == (0, 0)
+    # Submissions win over task events when both exist
+    assert snapshot["writing_completed"] == 1
+    assert snapshot["speaking_completed"] == 1
+    assert _get_results_snapshot(2)["speaking_completed"] == 1
+
+
+def test_completion_events_bypass_the_telemetry_buffer(sqlite_db, monkeypatch):
+    from database import telemetry
+    from database.repositories.progress_repository import log_event
+    from handlers.stats import _get_results_snapshot
+
+    apply_migrations()
+    buffer = TelemetryBuffer(max_size=1, batch_size=10, flush_interval_ms=60_000)
+    monkeypatch.setattr(telemetry, "_BUFFER", buffer)
+
+    async def _main():
+        buffer.start()
+        log_event(1, "grammar_topic_opened")
+        log_event(1, "grammar_topic_opened")  # buffer full: dropped
+        log_event(1, "daily_lesson_completed")
+        log_event(1, "writing_task_completed_letter")
+        stats = buffer.stats()
+        snapshot = _get_results_snapshot(1)
+        await buffer.stop()
+        return stats, snapshot
+
+    stats, snapshot = asyncio.run(_main())
+    assert (stats["depth"], stats["dropped"]) == (1, 1)
+    assert snapshot["daily_total_completed"] == 1
+    assert snapshot["writing_completed"] == 1
+    conn = get_connection(readonly=True)
+    cur = conn.cursor()
+    cur.execute("SELECT SUM(completions) FROM daily_activity")
+    assert cur.fetchone()[0] == 1
+    conn.close()
+
+
+def test_results_summary_migration_backfills_history(sqlite_db, monkeypatch):
+    summary = next(m for m in discover_migrations() if m.name == "user_stats_summary")
+    earlier = [m for m in discover_migrations() if m.version < summary.version]
+    with monkeypatch.context() as patch:
+        patch.setattr(migrations, "discover_migrations", lambda: earlier)
+        apply_migrations()
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO quiz_results (user_id, level, score, total, created_at) VALUES "
+        "(1, 'A1', 5, 10, '2024-05-01 10:00:00'), (1, 'A1', 9, 10, '2024-05-02 10:00:00')"
+    )
+    cur.execute(
+        "INSERT INTO event_logs (user_id, event_type, created_at) VALUES "
+        "(1, 'writing_task_completed_essay', '2024-05-03 08:00:00'), (3, 'grammar_topic_opened', '2024-05-03 08:00:00')"
+    )
+    conn.commit()
+    conn.close()
+
+    apply_migrations()
+    from handlers.stats import _get_results_snapshot
+
+    snapshot = _get_results_snapshot(1)
+    assert snapshot["quiz_attempts"] == 2
+    assert snapshot["quiz_avg_pct"] == 70.0
+    assert snapshot["quiz_best_pct"] == 90.0
+    assert snapshot["quiz_latest_score"] == 9
+    assert snapshot["quiz_latest_at"] == "2024-05-02 10:00:00"
+    assert snapshot["writing_completed"] == 1
+    assert snapshot["writing_last_at"] == "2024-05-03 08:00:00"
+    conn = get_connection(readonly=True)
+    cur = conn.cursor()
+    cur.execute("SELECT user_id FROM user_stats_summary")
+    assert [r[0] for r in cur.fetchall()] == [1]
+    conn.close()
+
+
+def _fsm_row_count():
+    conn = get_connection(readonly=True)
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM fsm_state")
+        return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_fsm_storage_caches_rows_and_skips_unchanged_writes(sqlite_db):
+    from aiogram.fsm.storage.base import StorageKey
+    from utils.db_fsm_storage import DBFSMStorage
+
+    apply_migrations()
+    key = StorageKey(bot_id=1, chat_id=5, user_id=5)
+
+    async def scenario():
+        storage = DBFSMStorage(cache_size=2)
+        assert await storage.get_state(key) is None
+        assert await storage.get_data(key) == {}
+        assert (storage.hits, storage.misses) == (1, 1)
+
+        await storage.set_state(key, "Quiz:answering")
+        await storage.update_data(key, {"questions": [{"id": 1}], "index": 0})
+        data = await storage.get_data(key)
+        data["questions"].append({"id": 2})  # callers get their own copy
+        await storage.update_data(key, {"index": 0})
+        await storage.set_state(key, "Quiz:answering")
+        assert storage.writes == 2 and storage.skipped_writes == 2
+
+        fresh = DBFSMStorage(cache_size=2)
+        assert await fresh.get_state(key) == "Quiz:answering"
+        assert await fresh.get_data(key) == {"questions": [{"id": 1}], "index": 0}
+        assert fresh.misses == 1
+
+        for chat_id in (6, 7):
+            await storage.get_state(StorageKey(bot_id=1, chat_id=chat_id, user_id=chat_id))
+        assert storage.stats()["size"] == 2  # least recently used key evicted
+
+    asyncio.run(scenario())
+    assert _fsm_row_count() == 1
+
+
+def test_fsm_storage_forgets_writes_rolled_back_with_the_update(sqlite_db):
+    from aiogram.fsm.storage.base import StorageKey
+    from utils.db_fsm_storage import DBFSMStorage
+
+    apply_migrations()
+    key = StorageKey(bot_id=1, chat_id=5, user_id=5)
+    storage = DBFSMStorage(cache_size=10)
+
+    async def handler():
+        unit, token = begin_unit_of_work()
+        try:
+            await storage.set_state(key, "Search:waiting_query")
+            assert await storage.get_state(key) == "Search:waiting_query"
+        finally:
+            end_unit_of_work(token)
+        await run_db(unit.rollback)
+        assert await storage.get_state(key) is None
+
+    asyncio.run(handler())
+    assert _fsm_row_count() == 0
+
+
+def test_fsm_sweeper_deletes_idle_rows_in_batches(sqlite_db, monkeypatch):
+    from aiogram.fsm.storage.base import StorageKey
+    from utils import scheduler
+    from utils.db_fsm_storage import DBFSMStorage
+
+    apply_migrations()
+    monkeypatch.setattr(
+        scheduler,
+        "settings",
+        dataclasses.replace(sqlite_db, fsm_state_ttl_hours=24, fsm_sweep_batch_size=2, fsm_sweep_vacuum=True),
+    )
+    storage = DBFSMStorage(cache_size=10)
+    idle_key = StorageKey(bot_id=1, chat_id=1, user_id=1)
+
+    async def scenario():
+        await storage.set_state(idle_key, "Quiz:answering")
+        await storage.set_state(StorageKey(bot_id=1, chat_id=9, user_id=9), "Quiz:answering")
+        conn = get_connection()
+        cur = conn.cursor()
+        cur.execute("UPDATE fsm_state SET updated_at = '2020-01-01 00:00:00' WHERE chat_id = 1")
+        cur.executemany(
+            "INSERT INTO fsm_state (bot_id, chat_id, user_id, updated_at) VALUES (1, ?, ?, '2020-01-02 00:00:00')",
+            [(chat_id, chat_id) for chat_id in range(2, 6)],
+        )
+        conn.commit()
+        conn.close()
+
+        assert await scheduler.sweep_fsm_state() == 5
+        assert await storage.get_state(idle_key) is None  # cached entry went with the row
+        assert await scheduler.sweep_fsm_state() == 0
+
+    asyncio.run(scenario())
+    assert _fsm_row_count() == 1
+    stats = scheduler.get_fsm_sweep_stats()
+    assert stats["last_reclaimed"] == 0 and stats["total_reclaimed"] >= 5
+    assert stats["last_vacuum_at"]
+
+
+def test_ui_message_tracker_serves_reads_from_cache_and_writes_back(sqlite_db):
+    from database.repositories.ui_repository import get_ui_messages
+    from database.ui_messages import UiMessageTracker
+
+    apply_migrations()
+
+    async def scenario():
+        tracker = UiMessageTracker(cache_size=10, flush_interval_ms=60_000)
+        tracker.start()
+        assert await tracker.get(7) == (None, None)
+        await tracker.update(7, main_menu_id=100, active_id=100)
+        await tracker.update(7, active_id=101)
+        await tracker.update(7, active_id=102)
+        assert await tracker.get(7) == (100, 102)
+        assert (tracker.hits, tracker.misses) == (4, 1)
+        assert await run_db(get_ui_messages, 7) == (None, None)  # not flushed yet
+        await tracker.stop()
+        assert tracker.stats()["flushed_rows"] == 1
+        assert await run_db(get_ui_messages, 7) == (100, 102)
+
+        direct = UiMessageTracker(cache_size=10, flush_interval_ms=0)
+        await direct.update(8, active_id=5)  # no flusher: written straight away
+        assert await run_db(get_ui_messages, 8) == (None, 5)
+
+    asyncio.run(scenario())
+
+
+def test_ui_messages_migration_backfills_from_ui_state(sqlite_db, monkeypatch):
+    from database.repositories.ui_repository import get_ui_messages
+
+    ui_messages = next(m for m in discover_migrations() if m.name == "ui_messages")
+    earlier = [m for m in discover_migrations() if m.version < ui_messages.version]
+    with monkeypatch.context() as patch:
+        patch.setattr(migrations, "discover_migrations", lambda: earlier)
+        apply_migrations()
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO ui_state (user_id, key, val) VALUES "
+        "(1, 'main_menu_msg_id', '10'), (1, 'active_ui_msg_id', '12'), (2, 'active_ui_msg_id', '20')"
+    )
+    conn.commit()
+    conn.close()
+
+    apply_migrations()
+    assert get_ui_messages(1) == (10, 12)
+    assert get_ui_messages(2) == (None, 20)
+
+
+def test_profile_cache_serves_repeat_reads_and_invalidates_on_writes(sqlite_db, monkeypatch):
+    from database.repositories import user_repository
+    from services.user_service import UserService
+
+    apply_migrations()
+    profile, created = user_repository.ensure_user_profile(5)
+    assert created and profile["user_id"] == 5
+    assert user_repository.ensure_user_profile(5)[1] is False
+
+    with monkeypatch.context() as patch:
+        patch.setattr(user_repository, "get_user_profile", lambda user_id: pytest.fail("cache miss"))
+        first = UserService.get_profile(5)
+        first["current_level"] = "C1"  # callers get their own copy
+        assert UserService.get_profile(5)["current_level"] != "C1"
+
+    UserService.update_level(5, "B1")
+    user_repository.update_xp(5, 10)
+    assert UserService.get_profile(5)["current_level"] == "B1"
+    assert UserService.get_profile(5)["xp"] == 10
+
+    unit, token = begin_unit_of_work()
+    try:
+        UserService.update_level(5, "C2")
+        assert UserService.get_profile(5)["current_level"] == "C2"  # cached from the open unit
+    finally:
+        end_unit_of_work(token)
+    unit.rollback()
+    assert UserService.get_profile(5)["current_level"] == "B1"
+
+
+def test_profile_created_in_a_rolled_back_unit_is_not_cached(sqlite_db):
+    from database.repositories import user_repository
+
+    apply_migrations()
+    unit, token = begin_unit_of_work()
+    try:
+        assert user_repository.ensure_user_profile(6)[1] is True
+        assert user_repository.ensure_user_profile(6)[1] is False
+    finally:
+        end_unit_of_work(token)
+    unit.rollback()
+    assert user_repository.get_user_profile(6) is None
+    profile, created = user_repository.ensure_user_profile(6)
+    assert created and profile["user_id"] == 6
+    assert _count_rows("user_profile") == 1
+
+
+def test_mastery_upsert_moves_boxes_in_one_statement(sqlite_db):
+    from database.repositories.mastery_repository import record_reviews_bulk, update_mastery
+
+    apply_migrations()
+    assert update_mastery(1, 10, True) == 1
+    assert update_mastery(1, 10, True) == 2
+    assert update_mastery(1, 11, False) == 0
+    assert update_mastery(1, 11, False) == 0
+
+    boxes = record_reviews_bulk(1, [(10, True), (12, True), (10, True), (11, True), (10, False)])
+    assert boxes == {10: 3, 12: 1, 11: 1}
+    for _ in range(10):
+        update_mastery(1, 12, True)
+
+    conn = get_connection(readonly=True)
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT item_id, box, CAST(ROUND(julianday(next_review) - julianday('now')) AS INTEGER) "
+        "FROM user_mastery WHERE user_id = 1 ORDER BY item_id"
+    )
+    assert [tuple(r) for r in cur.fetchall()] == [(10, 3, 7), (11, 1, 1), (12, 6, 90)]
+    conn.close()
+
+
+def test_time_slot_enqueue_is_set_based_chunked_and_idempotent(sqlite_db):
+    from database.repositories.broadcast_repository import enqueue_time_slot_chunk
+    from handlers import daily
+
+    apply_migrations()
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.executemany(
+        "INSERT INTO user_profile (user_id, notification_time) VALUES (?, ?)",
+        [(user_id, "09:00" if user_id % 3 else "18:00") for user_id in range(1, 11)],
+    )
+    conn.commit()
+    conn.close()
+
+    assert enqueue_time_slot_chunk("09:00", "daily_word", {"w": 1}, "2024-05-01_09:00", limit=4) == (4, 5)
+    assert enqueue_time_slot_chunk("09:00", "daily_word", {"w": 1}, "2024-05-01_09:00", 5, limit=4) == (3, 10)
+    assert enqueue_time_slot_chunk("09:00", "daily_word", {"w": 1}, "2024-05-01_09:00", 10, limit=4) == (0, None)
+    # A rerun of the slot adds nothing; the 18:00 slot is separate
+    assert asyncio.run(daily.enqueue_time_slot("09:00", "daily_word", {"w": 1}, "2024-05-01_09:00")) == 0
+    assert asyncio.run(daily.enqueue_time_slot("18:00", "daily_word", {"w": 1}, "2024-05-01_18:00")) == 3
+
+    conn = get_connection(readonly=True)
+    cur = conn.cursor()
+    cur.execute("SELECT dedupe_key FROM broadcast_jobs WHERE user_id = 4")
+    assert cur.fetchone()[0] == "daily_word:2024-05-01_09:00:4"
+    cur.execute("SELECT COUNT(*) FROM broadcast_jobs")
+    assert cur.fetchone()[0] == 10
+    conn.close()
+
+
+def test_time_slot_enqueue_retries_a_failed_chunk_from_where_it_stopped(sqlite_db, monkeypatch):
+    from database.repositories.broadcast_repository import enqueue_time_slot_chunk
+    from handlers import daily
+
+    apply_migrations()
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.executemany("INSERT INTO user_profile (user_id, notification_time) VALUES (?, '09:00')", [(i,) for i in range(1, 11)])
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(daily, "_ENQUEUE_RETRY_DELAYS", (0, 0))
+    monkeypatch.setattr(daily, "settings", dataclasses.replace(sqlite_db, broadcast_enqueue_chunk_size=3))
+    calls = []
+
+    def flaky_chunk(*args, **kwargs):
+        calls.append(kwargs["after_user_id"])
+        if len(calls) in (2, 3):
+            raise sqlite3.OperationalError("database is locked (writer busy)")
+        return enqueue_time_slot_chunk(*args, **kwargs)
+
+    monkeypatch.setattr(daily, "enqueue_time_slot_chunk", flaky_chunk)
+    assert asyncio.run(daily.enqueue_time_slot("09:00", "daily_word", {"w": 1}, "slot")) == 10
+    assert calls == [None, 3, 3, 3, 6, 9, 10]
+    assert _count_rows("broadcast_jobs") == 10
+
+    def broken_chunk(*args, **kwargs):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(daily, "enqueue_time_slot_chunk", broken_chunk)
+    with pytest.raises(sqlite3.OperationalError):
+        asyncio.run(daily.enqueue_time_slot("09:00", "daily_word", {"w": 1}, "slot2"))
+
+
+def test_broadcast_claims_in_one_statement_and_acks_in_bulk(sqlite_db, monkeypatch):
+    from database.repositories import broadcast_repository
+    from handlers import daily
+
+    apply_migrations()
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.executemany("INSERT INTO user_profile (user_id, notification_time) VALUES (?, '09:00')", [(i,) for i in range(1, 8)])
+    conn.commit()
+    conn.close()
+    broadcast_repository.enqueue_time_slot_chunk("09:00", "daily_word", {"word_de": "Haus"}, "slot")
+
+    claimed = broadcast_repository.claim_pending_jobs(limit=3)
+    assert [job["user_id"] for job in claimed] == [1, 2, 3]
+    assert broadcast_repository.get_broadcast_queue_counts()["processing"] == 3
+    broadcast_repository.ack_broadcast_jobs([claimed[0]["id"], claimed[1]["id"]], [(claimed[2]["id"], 0, "boom", 30)], 6)
+    counts = broadcast_repository.get_broadcast_queue_counts()
+    assert (counts["sent"], counts["pending"], counts["processing"]) == (2, 5, 0)
+
+    class FakeBot:
+        async def send_message(self, chat_id, *args, **kwargs):
+            if chat_id == 5:
+                raise RuntimeError("blocked")
+
+    acks = []
+    real_ack = broadcast_repository.ack_broadcast_jobs
+
+    def counting_ack(sent_ids, failures, *args):
+        acks.append((len(sent_ids), len(failures)))
+        real_ack(sent_ids, failures, *args)
+
+    monkeypatch.setattr(daily, "ack_broadcast_jobs", counting_ack)
+    monkeypatch.setattr(daily, "settings", dataclasses.replace(sqlite_db, broadcast_ack_batch_size=100))
+    asyncio.run(daily.process_broadcast_queue(FakeBot()))
+
+    # Users 4-7 were due (3 is backing off); one bulk ack for the whole batch
+    assert acks == [(3, 1)]
+    conn = get_connection(readonly=True)
+    cur = conn.cursor()
+    cur.execute("SELECT user_id, status, attempts, last_error FROM broadcast_jobs WHERE status != 'sent' ORDER BY user_id")
+    assert [tuple(r) for r in cur.fetchall()] == [(3, "pending", 1, "boom"), (5, "pending", 1, "blocked")]
+    conn.close()
+
+
+def test_broadcast_unsubscribes_blocked_users(sqlite_db):
+    from aiogram.exceptions import TelegramForbiddenError
+    from aiogram.methods import SendMessage
+    from database.repositories import broadcast_repository
+    from handlers import daily
+    from handlers.common import _load_start_context
+
+    apply_migrations()
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.executemany("INSERT INTO user_profile (user_id, notification_time) VALUES (?, '09:00')", [(1,), (2,)])
+    conn.commit()
+    conn.close()
+    broadcast_repository.enqueue_time_slot_chunk("09:00", "daily_word", {}, "day1")
+    broadcast_repository.enqueue_broadcast_jobs([2], "daily_word", {}, "later")
+    conn = get_connection()
+    conn.cursor().execute("UPDATE broadcast_jobs SET available_at = '2999-01-01 00:00:00' WHERE dedupe_key LIKE '%later%'")
+    conn.commit()
+    conn.close()
+
+    class FakeBot:
+        async def send_message(self, chat_id, *args, **kwargs):
+            if chat_id == 2:
+                raise TelegramForbiddenError(SendMessage(chat_id=2, text="x"), "Forbidden: bot was blocked by the user")
+
+    asyncio.run(daily.process_broadcast_queue(FakeBot()))
+
+    conn = get_connection(readonly=True)
+    cur = conn.cursor()
+    cur.execute("SELECT user_id, status, attempts FROM broadcast_jobs ORDER BY id")
+    # No retries for the blocked user, and their queued jobs are dropped
+    assert [tuple(r) for r in cur.fetchall()] == [(1, "sent", 0), (2, "failed", 1), (2, "failed", 0)]
+    cur.execute("SELECT user_id FROM user_profile WHERE broadcast_unsubscribed_at IS NOT NULL")
+    assert [r[0] for r in cur.fetchall()] == [2]
+    conn.close()
+    assert broadcast_repository.enqueue_time_slot_chunk("09:00", "daily_word", {}, "day2") == (1, 1)
+
+    # /start again resubscribes
+    _load_start_context(2, "Blocked User", None)
+    assert broadcast_repository.enqueue_time_slot_chunk("09:00", "daily_word", {}, "day3") == (2, 2)
+
+
+def test_broadcast_not_found_errors_do_not_unsubscribe(sqlite_db):
+    from aiogram.exceptions import TelegramNotFound
+    from aiogram.methods import SendMessage
+    from database.repositories import broadcast_repository
+    from handlers import daily
+
+    apply_migrations()
+    conn = get_connection()
+    conn.cursor().execute("INSERT INTO user_profile (user_id, notification_time) VALUES (1, '09:00')")
+    conn.commit()
+    conn.close()
+    broadcast_repository.enqueue_time_slot_chunk("09:00", "daily_word", {}, "day1")
+
+    class MisconfiguredBot:
+        async def send_message(self, chat_id, *args, **kwargs):
+            raise TelegramNotFound(SendMessage(chat_id=chat_id, text="x"), "Not Found")
+
+    asyncio.run(daily.process_broadcast_queue(MisconfiguredBot()))
+
+    conn = get_connection(readonly=True)
+    cur = conn.cursor()
+    cur.execute("SELECT status, attempts FROM broadcast_jobs")
+    assert [tuple(r) for r in cur.fetchall()] == [("pending", 1)]
+    cur.execute("SELECT broadcast_unsubscribed_at FROM user_profile WHERE user_id = 1")
+    assert cur.fetchone()[0] is None
+    conn.close()
+
+
+def test_broadcast_worker_wakes_on_enqueue_and_drains(sqlite_db, monkeypatch):
+    from database.repositories import broadcast_repository
+    from handlers import daily
+    from utils.broadcast_worker import BroadcastWorker
+
+    apply_migrations()
+    monkeypatch.setattr(broadcast_repository, "_ENQUEUE_LISTENERS", [])
+    monkeypatch.setattr(daily, "settings", dataclasses.replace(sqlite_db, broadcast_claim_batch_size=2))
+    delivered = []
+
+    class FakeBot:
+        async def send_message(self, chat_id, *args, **kwargs):
+            delivered.append(chat_id)
+
+    async def scenario():
+        worker = BroadcastWorker(idle_seconds=60)
+        broadcast_repository.on_jobs_enqueued(worker.wake)
+        worker.start(FakeBot(), daily.process_broadcast_queue)
+        await asyncio.sleep(0.05)
+        assert worker.running and delivered == []
+        # Well inside the idle timeout, so only the enqueue signal can wake it
+        await run_db(broadcast_repository.enqueue_broadcast_jobs, [1, 2, 3, 4, 5], "daily_word", {}, "slot")
+        for _ in range(100):
+            if len(delivered) == 5:
+                break
+            await asyncio.sleep(0.02)
+        stats = worker.stats()
+        await worker.stop()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert sorted(delivered) == [1, 2, 3, 4, 5]
+    assert (stats["processed"], stats["batches"]) == (5, 3)
+    assert stats["jobs_per_second"] > 0
+    assert broadcast_repository.get_next_pending_at() is None
+
+
+def test_broadcast_jobs_reference_one_rendered_message(sqlite_db, monkeypatch):
+    from database.repositories import broadcast_repository
+    from handlers import daily
+
+    apply_migrations()
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.executemany("INSERT INTO user_profile (user_id, notification_time) VALUES (?, '09:00')", [(i,) for i in range(1, 6)])
+    # A job queued before broadcast_messages, still carrying its payload
+    cur.execute(
+        "INSERT INTO broadcast_jobs (user_id, kind, payload, dedupe_key) VALUES (9, 'daily_word', ?, 'legacy')",
+        ('{"word_de": "Alt"}',),
+    )
+    conn.commit()
+    conn.close()
+    payload = {"word_de": "Haus", "word_uz": "uy"}
+    broadcast_repository.enqueue_time_slot_chunk("09:00", "daily_word", payload, "day1", limit=3)
+    broadcast_repository.enqueue_time_slot_chunk("09:00", "daily_word", payload, "day1", 3)
+
+    conn = get_connection(readonly=True)
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*), COUNT(DISTINCT message_id), MAX(LENGTH(payload)) FROM broadcast_jobs WHERE user_id < 9")
+    assert tuple(cur.fetchone()) == (5, 1, 0)
+    cur.execute("SELECT kind, content_key FROM broadcast_messages")
+    assert [tuple(r) for r in cur.fetchall()] == [("daily_word", "daily_word:day1")]
+    conn.close()
+
+    renders = []
+    real_render = daily._render_daily_payload
+
+    def counting_render(payload):
+        renders.append(payload.get("word_de"))
+        return real_render(payload)
+
+    monkeypatch.setattr(daily, "_render_daily_payload", counting_render)
+    texts = {}
+
+    class FakeBot:
+        async def send_message(self, chat_id, text, *args, **kwargs):
+            texts[chat_id] = text
+
+    monkeypatch.setattr(daily, "settings", dataclasses.replace(sqlite_db, broadcast_claim_batch_size=3))
+    asyncio.run(daily.process_broadcast_queue(FakeBot()))
+    asyncio.run(daily.process_broadcast_queue(FakeBot()))
+
+    assert sorted(texts) == [1, 2, 3, 4, 5, 9]
+    assert "Haus" in texts[5] and "Alt" in texts[9]
+    # Once for the slot across both batches, once for the legacy row
+    assert sorted(renders) == ["Alt", "Haus"]
+
+
+def test_announcement_is_queued_in_chunks_and_can_be_cancelled_and_resumed(sqlite_db, monkeypatch):
+    from types import SimpleNamespace
+
+    from database.repositories import broadcast_repository
+    from handlers import daily
+    from utils import broadcast_campaigns
+
+    apply_migrations()
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.executemany("INSERT INTO user_profile (user_id) VALUES (?)", [(i,) for i in range(1, 6)])
+    conn.commit()
+    conn.close()
+    test_settings = dataclasses.replace(sqlite_db, broadcast_enqueue_chunk_size=2, broadcast_progress_interval_seconds=1)
+    monkeypatch.setattr(broadcast_campaigns, "settings", test_settings)
+    delivered, edits = {}, []
+
+    class FakeBot:
+        async def send_message(self, chat_id, text, *args, **kwargs):
+            delivered.setdefault(chat_id, []).append(text)
+            return SimpleNamespace(message_id=1000 + len(delivered[chat_id]))
+
+        async def edit_message_text(self, text, chat_id, message_id):
+            edits.append((message_id, text))
+
+    async def settle(message_id):
+        for _ in range(300):
+            if message_id not in broadcast_campaigns._TASKS:
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError("announcement task did not finish")
+
+    async def scenario():
+        bot = FakeBot()
+        message_id = await broadcast_campaigns.start_announcement(bot, 99, "Yangi versiya!")
+        for _ in range(100):
+            progress = await run_db(broadcast_repository.get_broadcast_message_progress, message_id)
+            if progress["jobs"]["pending"] == 5:
+                break
+            await asyncio.sleep(0.01)
+        assert await broadcast_campaigns.cancel_announcement() == (message_id, 5)
+        await settle(message_id)
+        assert "bekor qilindi" in edits[-1][1]
+        assert await daily.process_broadcast_queue(bot) == 0
+
+        assert await broadcast_campaigns.resume_announcement(bot, 99, message_id) == (message_id, True)
+        for _ in range(100):
+            if await daily.process_broadcast_queue(bot):
+                break
+            await asyncio.sleep(0.01)
+        await settle(message_id)
+        return message_id
+
+    message_id = asyncio.run(scenario())
+    assert sorted(chat_id for chat_id in delivered if chat_id != 99) == [1, 2, 3, 4, 5]
+    assert delivered[3] == ["Yangi versiya!"]
+    assert len(delivered[99]) == 2  # one progress message per run
+    assert "tugadi" in edits[-1][1] and "Yuborildi: 5" in edits[-1][1]
+    progress = broadcast_repository.get_broadcast_message_progress(message_id)
+    assert (progress["status"], progress["jobs"]["sent"], progress["jobs"]["cancelled"]) == ("active", 5, 0)
+
+
+def test_announcement_enqueue_failure_is_reported_as_interrupted(sqlite_db, monkeypatch):
+    from types import SimpleNamespace
+
+    from database.repositories import broadcast_repository
+    from handlers import daily
+    from utils import broadcast_campaigns
+
+    apply_migrations()
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.executemany("INSERT INTO user_profile (user_id) VALUES (?)", [(i,) for i in range(1, 6)])
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(broadcast_campaigns, "settings", dataclasses.replace(sqlite_db, broadcast_enqueue_chunk_size=2))
+    monkeypatch.setattr(daily, "_ENQUEUE_RETRY_DELAYS", (0,))
+    edits = []
+
+    class FakeBot:
+        async def send_message(self, chat_id, text, *args, **kwargs):
+            return SimpleNamespace(message_id=1000)
+
+        async def edit_message_text(self, text, chat_id, message_id):
+            edits.append(text)
+
+    def failing_after_first_chunk(message_id, after_user_id=None, limit=2000):
+        if after_user_id is not None:
+            raise sqlite3.OperationalError("database is locked (writer busy)")
+        return broadcast_repository.enqueue_broadcast_message_chunk(message_id, after_user_id, limit)
+
+    async def run(start):
+        message_id = await start()
+        for _ in range(300):
+            if message_id not in broadcast_campaigns._TASKS:
+                return message_id
+            await asyncio.sleep(0.01)
+        raise AssertionError("announcement task did not finish")
+
+    bot = FakeBot()
+    monkeypatch.setattr(broadcast_campaigns, "enqueue_broadcast_message_chunk", failing_after_first_chunk)
+    message_id = asyncio.run(run(lambda: broadcast_campaigns.start_announcement(bot, 99, "Salom")))
+    assert f"to'xtab qoldi — /announce_resume {message_id}" in edits[-1]
+    assert "tugadi" not in edits[-1]
+    assert broadcast_repository.get_broadcast_message_progress(message_id)["jobs"]["pending"] == 2
+
+    async def resume():
+        await broadcast_campaigns.resume_announcement(bot, 99, message_id)
+        for _ in range(300):
+            progress = await run_db(broadcast_repository.get_broadcast_message_progress, message_id)
+            if progress["jobs"]["pending"] == 5:
+                break
+            await asyncio.sleep(0.01)
+        broadcast_campaigns._TASKS[message_id].cancel()
+        return progress["jobs"]["pending"]
+
+    monkeypatch.setattr(broadcast_campaigns, "enqueue_broadcast_message_chunk", broadcast_repository.enqueue_broadcast_message_chunk)
+    assert asyncio.run(resume()) == 5
+
+
+def test_broadcast_status_counters_track_jobs_and_archive_folds_old_rows(sqlite_db):
+    from database.repositories import broadcast_repository
+
+    def actual_counts():
+        conn = get_connection(readonly=True)
+        cur = conn.cursor()
+        cur.execute("SELECT status, COUNT(*) FROM broadcast_jobs GROUP BY status")
+        rows = {row[0]: row[1] for row in cur.fetchall()}
+        conn.close()
+        return {status: rows.get(status, 0) for status in broadcast_repository.BROADCAST_JOB_STATUSES}
+
+    apply_migrations()
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.executemany("INSERT INTO user_profile (user_id, notification_time) VALUES (?, '09:00')", [(i,) for i in range(1, 9)])
+    conn.commit()
+    conn.close()
+    broadcast_repository.enqueue_time_slot_chunk("09:00", "daily_word", {"word_de": "Haus"}, "slot")
+    claimed = broadcast_repository.claim_pending_jobs(limit=5)
+    broadcast_repository.ack_broadcast_jobs(
+        [claimed[0]["id"], claimed[1]["id"], claimed[2]["id"]],
+        [(claimed[3]["id"], 5, "boom", 30), (claimed[4]["id"], 0, "boom", 30)],
+        6,
+    )
+    assert broadcast_repository.get_broadcast_queue_counts() == actual_counts()
+    message_id = broadcast_repository.create_broadcast_message("announcement", {"text": "Hi"}, "a1")
+    broadcast_repository.enqueue_broadcast_message_chunk(message_id, limit=100)
+    broadcast_repository.set_broadcast_message_status(message_id, "cancelled")
+    counts = broadcast_repository.get_broadcast_queue_counts()
+    assert counts == actual_counts()
+    assert (counts["sent"], counts["failed"], counts["cancelled"]) == (3, 1, 8)
+
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("UPDATE broadcast_jobs SET updated_at = '2024-01-01 10:00:00' WHERE status IN ('sent', 'failed')")
+    cur.execute("UPDATE broadcast_jobs SET updated_at = '2024-01-02 10:00:00' WHERE id = ?", (claimed[0]["id"],))
+    conn.commit()
+    conn.close()
+    assert broadcast_repository.archive_broadcast_jobs("2024-02-01 00:00:00", 3) == 3
+    assert broadcast_repository.archive_broadcast_jobs("2024-02-01 00:00:00", 3) == 1
+    assert broadcast_repository.archive_broadcast_jobs("2024-02-01 00:00:00", 3) == 0
+
+    counts = broadcast_repository.get_broadcast_queue_counts()
+    assert counts == actual_counts()
+    assert (counts["sent"], counts["failed"], counts["pending"]) == (0, 0, 4)
+    conn = get_connection(readonly=True)
+    cur = conn.cursor()
+    cur.execute("SELECT day, kind, sent, failed FROM broadcast_daily_summary ORDER BY day")
+    assert [tuple(row) for row in cur.fetchall()] == [
+        ("2024-01-01", "daily_word", 2, 1),
+        ("2024-01-02", "daily_word", 1, 0),
+    ]
+    conn.close()
+
+
+def test_announcements_past_retention_are_not_resumed(sqlite_db, monkeypatch):
+    from database.repositories import broadcast_repository
+    from utils import broadcast_campaigns
+
+    apply_migrations()
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.executemany("INSERT INTO user_profile (user_id) VALUES (?)", [(1,), (2,)])
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(broadcast_campaigns, "settings", dataclasses.replace(sqlite_db, broadcast_retention_days=14))
+    message_id = broadcast_repository.create_broadcast_message("announcement", {"text": "Eski"}, "old")
+    broadcast_repository.enqueue_broadcast_message_chunk(message_id, limit=100)
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("UPDATE broadcast_messages SET created_at = '2020-01-01 00:00:00'")
+    cur.execute("UPDATE broadcast_jobs SET status = 'sent', updated_at = '2020-01-01 00:00:00'")
+    conn.commit()
+    conn.close()
+    broadcast_repository.set_broadcast_message_status(message_id, "cancelled")
+    assert broadcast_repository.archive_broadcast_jobs("2020-02-01 00:00:00", 100) == 2
+
+    class FakeBot:
+        async def send_message(self, *args, **kwargs):
+            raise AssertionError("nothing should be sent")
+
+    result = asyncio.run(broadcast_campaigns.resume_announcement(FakeBot(), 99, message_id))
+    assert result == (message_id, False)
+    progress = broadcast_repository.get_broadcast_message_progress(message_id)
+    assert (progress["status"], sum(progress["jobs"].values())) == ("cancelled", 0)
@@ -0,0 +1,108 @@
+import dataclasses
+
+from database.migrations import apply_migrations
+from database.repositories.word_repository import add_word, get_total_words_count, get_words_by_ids
+from database.word_catalog import WordCatalog, WordRecord, get_word_catalog
+from services.dictionary_service import DictionaryService
+from utils.text_folding import word_sort_key
+
+
+def _record(word_id, de, level="A1", uz="-"):
+    return WordRecord((word_id, de, uz, level, None, None, None, None, None))
+
+
+def _catalog():
+    return WordCatalog(
+        [
+            _record(1, "die Birne"),
+            _record(2, "Apfel"),
+            _record(3, "backen"),
+            _record(4, "der Baum"),
+            _record(5, "Auto", level="A2"),
+        ]
+    )
+
+
+def test_catalog_orders_levels_and_counts():
+    catalog = _catalog()
+    assert list(catalog.level_ids("A1")) == [2, 3, 4, 1]
+    assert catalog.count("A1") == 4
+    assert catalog.count("B2") == 0
+
+
+def test_catalog_letter_pages_include_articles():
+    catalog = _catalog()
+    assert [r.de for r in catalog.page("A1", letter="B")] == ["backen", "der Baum", "die Birne"]
+    assert [r.de for r in catalog.page("A1", offset=1, limit=1, letter="b")] == ["der Baum"]
+    assert catalog.count_by_letter("A1", "b") == 3
+
+
+def test_catalog_get_many_keeps_request_order():
+    catalog = _catalog()
+    assert [r.id for r in catalog.get_many([4, "2", 4, 99])] == [4, 2]
+
+
+def test_catalog_reloads_after_add_word(sqlite_db):
+    apply_migrations()
+    add_word("A1", "der Tisch", "stol", "noun (m)")
+    assert get_total_words_count("A1") == 1
+    add_word("A1", "die Lampe", "chiroq", "noun (f)")
+    assert get_total_words_count("A1") == 2
+
+    catalog = get_word_catalog()
+    page = DictionaryService.get_page("A1", letter="L")
+    assert [w["de"] for w in page["words"]] == ["die Lampe"]
+    assert page["total"] == 1
+    assert [w["de"] for w in get_words_by_ids(list(catalog.level_ids("A1")))] == ["die Lampe", "der Tisch"]
+
+
+def test_word_sort_key_strips_article_and_folds_umlauts():
+    assert word_sort_key("der Bär") == "bar"
+    assert word_sort_key("Straße") == "strasse"
+    assert word_sort_key("die") == "die"
+    assert word_sort_key("  Öl ") == "ol"
+
+
+def test_catalog_files_umlauts_under_base_letter():
+    catalog = WordCatalog([_record(1, "das Öl"), _record(2, "oben"), _record(3, "die Ordnung")])
+    assert [r.de for r in catalog.page("A1", letter="O")] == ["oben", "das Öl", "die Ordnung"]
+    assert catalog.count_by_letter("A1", "o") == 3
+
+
+def test_keyset_pages_match_offset_pages(sqlite_db, monkeypatch):
+    apply_migrations()
+    for de in ("der Apfel", "Auto", "die Ärztin", "Abend", "das Angebot", "ab"):
+        add_word("A1", de, "-", "noun")
+    monkeypatch.setattr("services.dictionary_service.settings", dataclasses.replace(sqlite_db, page_size=2))
+
+    seen = []
+    page = DictionaryService.get_page("A1", letter="A")
+    while True:
+        seen.extend(w["de"] for w in page["words"])
+        assert page["words"] == DictionaryService.get_page("A1", offset=page["offset"], letter="A")["words"]
+        if not page["has_next"]:
+            break
+        page = DictionaryService.get_page("A1", letter="A", after_id=page["next_cursor"])
+
+    assert seen == ["ab", "Abend", "das Angebot", "der Apfel", "die Ärztin", "Auto"]
+    assert page["offset"] == 4 and page["total"] == 6
+
+
+def test_search_folds_articles_umlauts_and_prefixes(sqlite_db):
+    apply_migrations()
+    add_word("A1", "der Bär", "ayiq", "noun (m)")
+    add_word("A1", "die Straße", "ko‘cha", "noun (f)")
+    add_word("A2", "die Straßenbahn", "tramvay", "noun (f)")
+    add_word("A1", "der Lehrer", "o'qituvchi", "noun (m)")
+
+    def found(query, **kwargs):
+        return [w["de"] for w in DictionaryService.search(query, **kwargs)["words"]]
+
+    assert found("Bär") == ["der Bär"]
+    assert found("die baer") == []
+    assert found("bar") == ["der Bär"]
+    assert found("strasse") == ["die Straße", "die Straßenbahn"]
+    assert found("Straß", level="A2") == ["die Straßenbahn"]
+    assert found("ko'cha") == ["die Straße"]
+    assert found("oqituv") == ["der Lehrer"]
+    assert DictionaryService.search("a")["too_short"] is True
@@ -1,4 +1,10 @@
+import asyncio
+import random
+from types import SimpleNamespace
+
+from database.word_catalog import WordCatalog, WordRecord
 from services.assessment_service import AssessmentService
+from utils.sampling import sample_distinct
 
 
 def test_generate_quiz_returns_expected_count_and_options(monkeypatch):
@@ -13,7 +19,7 @@ def test_generate_quiz_returns_expected_count_and_options(monkeypatch):
         {"id": 8, "de": "Tag", "uz": "kun"},
     ]
 
-    monkeypatch.setattr("services.assessment_service.get_random_words", lambda level, limit: fake_pool[:limit])
+    monkeypatch.setattr("services.assessment_service.get_random_words", lambda level, limit, **kwargs: fake_pool[:limit])
     questions = AssessmentService.generate_quiz("A1", length=3)
 
     assert questions is not None
@@ -27,7 +33,7 @@ def test_generate_quiz_returns_expected_count_and_options(monkeypatch):
 def test_generate_quiz_returns_none_when_pool_too_small(monkeypatch):
     monkeypatch.setattr(
         "services.assessment_service.get_random_words",
-        lambda level, limit: [{"id": 1, "de": "Haus", "uz": "uy"}],
+        lambda level, limit, **kwargs: [{"id": 1, "de": "Haus", "uz": "uy"}],
     )
     assert AssessmentService.generate_quiz("A1", length=10) is None
 
@@ -35,3 +41,94 @@ def test_generate_quiz_returns_none_when_pool_too_small(monkeypatch):
 def test_validate_answer_case_insensitive():
     assert AssessmentService.validate_answer("Kitob", "kitob")
     assert not AssessmentService.validate_answer("kitob", "daftar")
+
+
+def test_generate_quiz_is_reproducible_with_seeded_rng(monkeypatch):
+    fake_pool = [{"id": i, "de": f"Wort{i}", "uz": f"soz{i}"} for i in range(1, 21)]
+    monkeypatch.setattr("services.assessment_service.get_random_words", lambda level, limit, **kwargs: fake_pool[:limit])
+
+    first = AssessmentService.generate_quiz("A1", length=4, rng=random.Random(7))
+    second = AssessmentService.generate_quiz("A1", length=4, rng=random.Random(7))
+    assert first == second
+
+
+def test_sample_distinct_skips_excluded_and_never_repeats():
+    population = list(range(100))
+    exclude = set(range(0, 100, 2))
+
+    picked = sample_distinct(population, 30, exclude=exclude, rng=random.Random(1))
+    assert len(picked) == 30
+    assert len(set(picked)) == 30
+    assert not exclude.intersection(picked)
+    assert picked == sample_distinct(population, 30, exclude=exclude, rng=random.Random(1))
+
+    # Asking for more than is left returns every remaining item once
+    assert sorted(sample_distinct(population, 80, exclude=exclude)) == list(range(1, 100, 2))
+    assert sample_distinct(population, 0) == []
+
+
+def test_catalog_sample_ids_stays_within_level():
+    catalog = WordCatalog(
+        [WordRecord((i, f"Wort{i}", "-", "A1" if i <= 10 else "A2", None, None, None, None, None)) for i in range(1, 16)]
+    )
+    picked = catalog.sample_ids("A1", 5, exclude={1, 2, 3}, rng=random.Random(3))
+    assert len(picked) == 5
+    assert all(4 <= word_id <= 10 for word_id in picked)
+    assert catalog.sample_ids("B1", 5) == []
+
+
+def test_abandoned_quiz_answers_still_reach_user_mastery(sqlite_db, monkeypatch):
+    from aiogram.fsm.context import FSMContext
+    from aiogram.fsm.storage.base import StorageKey
+    from aiogram.fsm.storage.memory import MemoryStorage
+
+    from database import review_buffer
+    from database.aio import run_db
+    from database.connection import get_connection
+    from database.migrations import apply_migrations
+    from handlers import quiz
+
+    apply_migrations()
+    buffer = review_buffer.ReviewBuffer(flush_interval_ms=50)
+    monkeypatch.setattr(review_buffer, "_BUFFER", buffer)
+
+    class FakeCall:
+        from_user = SimpleNamespace(id=7)
+        message = None
+
+        def __init__(self, data):
+            self.data = data
+
+        async def answer(self, *args, **kwargs):
+            pass
+
+    def mastery_boxes():
+        conn = get_connection(readonly=True)
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT item_id, box FROM user_mastery WHERE user_id = 7")
+            return {row[0]: row[1] for row in cur.fetchall()}
+        finally:
+            conn.close()
+
+    async def scenario():
+        buffer.start()
+        state = FSMContext(MemoryStorage(), StorageKey(bot_id=1, chat_id=7, user_id=7))
+        questions = [
+            {"word_id": 10 + i, "de": f"Wort{i}", "correct_answer": "ja", "options": ["ja", "nein"]}
+            for i in range(10)
+        ]
+        await state.set_state(quiz.QuizState.in_progress)
+        await state.update_data(questions=questions, current_idx=0, score=0, level="A1")
+        await quiz.quiz_answer_handler(FakeCall("quiz_answer_ja"), state)
+        await quiz.quiz_answer_handler(FakeCall("quiz_answer_nein"), state)
+        await state.clear()  # e.g. /start in the middle of the quiz
+        for _ in range(100):
+            if buffer.stats()["flushed_reviews"] == 2:
+                break
+            await asyncio.sleep(0.02)
+        boxes = await run_db(mastery_boxes)
+        await buffer.stop()
+        return boxes
+
+    assert asyncio.run(scenario()) == {10: 1, 11: 0}
@@ -11,6 +11,7 @@ import threading
 from pathlib import Path
 from core.config import settings
 from database import log_ops_error
+from database.aio import run_db
 from database.connection import is_postgres_backend
 from utils.error_notifier import schedule_ops_error_notification
 
@@ -351,7 +352,8 @@ async def run_backup_async(bot=None, trigger: str = "manual"):
 
     err = result.get("error") or "backup failed"
     logging.warning("Backup failed trigger=%s err=%s", trigger, err)
-    log_ops_error(
+    await run_db(
+        log_ops_error,
         severity="ERROR",
         where_ctx="backup_manager",
         user_id=None,
@@ -0,0 +1,190 @@
+"""
+Admin announcements through the durable broadcast queue.
+
+An announcement is a broadcast_messages row of kind "announcement". A
+background task enqueues its jobs chunk by chunk (BROADCAST_ENQUEUE_CHUNK_SIZE
+users per transaction), so the admin command returns at once, and the
+broadcast worker sends them with the usual pacing and retries. The task edits
+a progress message every BROADCAST_PROGRESS_INTERVAL_SECONDS until nothing is
+left to send. A chunk that keeps failing after retries stops the enqueue
+and leaves the progress message marked interrupted, never finished.
+Cancelling marks the message and its pending jobs cancelled; resuming re-runs
+the enqueue, which dedupe keys make idempotent, so it also finishes an
+enqueue cut short by an error or a restart.
+"""
+import asyncio
+import contextvars
+import datetime
+import logging
+
+from aiogram import Bot
+
+from core.config import settings
+from database.aio import run_db
+from database.repositories.broadcast_repository import (
+    create_broadcast_message,
+    enqueue_broadcast_message_chunk,
+    get_broadcast_message_progress,
+    get_latest_broadcast_message_id,
+    set_broadcast_message_status,
+)
+from handlers.daily import ANNOUNCEMENT_KIND, run_enqueue_chunk
+
+_TASKS: dict[int, asyncio.Task] = {}
+
+
+def progress_text(progress: dict | None, enqueuing: bool = False, interrupted: bool = False) -> str:
+    if progress is None:
+        return "📢 Update e'loni topilmadi."
+    jobs = progress["jobs"]
+    total = sum(jobs.values())
+    remaining = jobs["pending"] + jobs["processing"]
+    if progress["status"] == "cancelled":
+        state = "⏸ bekor qilindi"
+    elif interrupted:
+        state = f"⚠️ to'xtab qoldi — /announce_resume {progress['id']}"
+    elif enqueuing:
+        state = "📥 navbatga qo'yilmoqda"
+    elif remaining:
+        state = "📤 yuborilmoqda"
+    else:
+        state = "✅ tugadi"
+    message_id = progress["id"]
+    return (
+        f"📢 Update e'loni #{message_id}\n\n"
+        f"• Holat: {state}\n"
+        f"• Navbatda jami: {total}\n"
+        f"• Yuborildi: {jobs['sent']}\n"
+        f"• Kutilmoqda: {remaining}\n"
+        f"• Xatolik: {jobs['failed']}\n"
+        f"• Bekor qilingan: {jobs['cancelled']}\n\n"
+        f"/announce_cancel {message_id} · /announce_resume {message_id}"
+    )
+
+
+async def _edit_progress(bot: Bot, chat_id: int, progress_message_id: int, text: str):
+    try:
+        await bot.edit_message_text(text=text, chat_id=chat_id, message_id=progress_message_id)
+    except Exception as exc:
+        # "message is not modified" and deleted progress messages are expected
+        logging.debug("Announcement progress edit skipped: %s", exc)
+
+
+async def _run(bot: Bot, chat_id: int, progress_message_id: int, message_id: int):
+    try:
+        await _enqueue_and_report(bot, chat_id, progress_message_id, message_id)
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        logging.error("Announcement #%s stopped: %s", message_id, exc)
+
+
+async def _enqueue_and_report(bot: Bot, chat_id: int, progress_message_id: int, message_id: int):
+    interval = max(1, settings.broadcast_progress_interval_seconds)
+    loop = asyncio.get_running_loop()
+    edited_at = loop.time()
+    after_user_id = None
+    while True:
+        try:
+            _inserted, after_user_id = await run_enqueue_chunk(
+                enqueue_broadcast_message_chunk,
+                message_id,
+                after_user_id=after_user_id,
+                limit=settings.broadcast_enqueue_chunk_size,
+            )
+        except Exception as exc:
+            logging.error("Announcement #%s enqueue interrupted after user %s: %s", message_id, after_user_id, exc)
+            progress = await run_db(get_broadcast_message_progress, message_id)
+            await _edit_progress(bot, chat_id, progress_message_id, progress_text(progress, interrupted=True))
+            return
+        if after_user_id is None:
+            break
+        if loop.time() - edited_at >= interval:
+            progress = await run_db(get_broadcast_message_progress, message_id)
+            await _edit_progress(bot, chat_id, progress_message_id, progress_text(progress, enqueuing=True))
+            edited_at = loop.time()
+    while True:
+        progress = await run_db(get_broadcast_message_progress, message_id)
+        await _edit_progress(bot, chat_id, progress_message_id, progress_text(progress))
+        if progress is None or progress["status"] == "cancelled":
+            return
+        if not progress["jobs"]["pending"] + progress["jobs"]["processing"]:
+            return
+        await asyncio.sleep(interval)
+
+
+def _start_task(bot: Bot, chat_id: int, progress_message_id: int, message_id: int):
+    running = _TASKS.get(message_id)
+    if running is not None and not running.done():
+        running.cancel()
+    # A fresh context: the task outlives the command's unit of work
+    task = asyncio.get_running_loop().create_task(
+        _run(bot, chat_id, progress_message_id, message_id),
+        name=f"announcement-{message_id}",
+        context=contextvars.Context(),
+    )
+    _TASKS[message_id] = task
+
+    def _forget(done: asyncio.Task):
+        if _TASKS.get(message_id) is done:
+            del _TASKS[message_id]
+
+    task.add_done_callback(_forget)
+
+
+async def start_announcement(bot: Bot, chat_id: int, text: str) -> int | None:
+    """Creates the announcement and starts enqueueing it; returns its message id."""
+    slot_key = datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
+    message_id = await run_db(create_broadcast_message, ANNOUNCEMENT_KIND, {"text": text}, slot_key)
+    if message_id is None:
+        return None
+    progress = await run_db(get_broadcast_message_progress, message_id)
+    sent = await bot.send_message(chat_id, progress_text(progress, enqueuing=True))
+    _start_task(bot, chat_id, sent.message_id, message_id)
+    return message_id
+
+
+async def cancel_announcement(message_id: int | None = None) -> tuple[int | None, int]:
+    """Cancels the given (or latest) announcement; returns (message id, jobs cancelled)."""
+    if message_id is None:
+        message_id = await run_db(get_latest_broadcast_message_id, ANNOUNCEMENT_KIND)
+        if message_id is None:
+            return None, 0
+    cancelled = await run_db(set_broadcast_message_status, message_id, "cancelled")
+    return message_id, cancelled
+
+
+def _past_retention(progress: dict) -> bool:
+    """
+    True once the message's sent jobs may have been archived: resuming it
+    would then re-send to everyone, since their dedupe keys are gone.
+    """
+    if settings.broadcast_retention_days <= 0:
+        return False
+    created = progress.get("created_at")
+    if not isinstance(created, datetime.datetime):
+        created = datetime.datetime.fromisoformat(str(created)[:19])
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=settings.broadcast_retention_days)
+    return created.replace(tzinfo=None) < cutoff
+
+
+async def resume_announcement(bot: Bot, chat_id: int, message_id: int | None = None) -> tuple[int | None, bool]:
+    """
+    Resumes the given (or latest) announcement with a new progress message.
+    Returns (message id, resumed); an announcement older than
+    BROADCAST_RETENTION_DAYS is found but not resumed.
+    """
+    if message_id is None:
+        message_id = await run_db(get_latest_broadcast_message_id, ANNOUNCEMENT_KIND)
+    if message_id is None:
+        return None, False
+    progress = await run_db(get_broadcast_message_progress, message_id)
+    if progress is None or progress["kind"] != ANNOUNCEMENT_KIND:
+        return None, False
+    if _past_retention(progress):
+        return message_id, False
+    await run_db(set_broadcast_message_status, message_id, "active")
+    progress = await run_db(get_broadcast_message_progress, message_id)
+    sent = await bot.send_message(chat_id, progress_text(progress, enqueuing=True))
+    _start_task(bot, chat_id, sent.message_id, message_id)
+    return message_id, True
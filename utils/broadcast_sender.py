@@ -0,0 +1,179 @@
+"""
+Paced sending for broadcast jobs.
+
+Every send takes a token from one bucket refilled at BROADCAST_RATE_PER_SECOND
+(Telegram allows about 30 messages a second per bot), and sends to the same
+chat are spaced BROADCAST_PER_CHAT_INTERVAL_MS apart. A 429 pauses all sends
+for the server's retry_after and halves the rate; the rate climbs back after
+a run of successful sends. Errors that a retry cannot fix are classified as
+permanent, and for blocked or unreachable chats the user is unsubscribed.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNotFound,
+    TelegramRetryAfter,
+)
+
+from core.config import settings
+
+SENT = "sent"
+RETRY = "retry"
+FAILED = "failed"
+UNSUBSCRIBE = "unsubscribe"
+
+# Bad-request descriptions that mean the chat itself is gone
+_GONE_CHAT_MARKERS = (
+    "chat not found",
+    "user not found",
+    "peer_id_invalid",
+    "user is deactivated",
+    "bot was blocked",
+    "bot was kicked",
+)
+_CHAT_PACING_PRUNE_AT = 10000
+
+
+def classify_send_error(exc: Exception) -> str:
+    """RETRY, FAILED (this message can never be sent) or UNSUBSCRIBE (the chat is gone)."""
+    if isinstance(exc, TelegramRetryAfter):
+        return RETRY
+    if isinstance(exc, TelegramNotFound):
+        # HTTP 404 is a wrong token or endpoint, not a deleted chat
+        return RETRY
+    if isinstance(exc, TelegramForbiddenError):
+        return UNSUBSCRIBE
+    if isinstance(exc, TelegramBadRequest):
+        message = str(exc).lower()
+        if any(marker in message for marker in _GONE_CHAT_MARKERS):
+            return UNSUBSCRIBE
+        return FAILED
+    return RETRY
+
+
+class BroadcastSender:
+    def __init__(
+        self,
+        rate_per_second: float,
+        per_chat_interval_ms: int,
+        max_retry_after_wait: float,
+        min_rate_per_second: float = 1.0,
+        recover_after: int = 100,
+    ):
+        self.max_rate = max(0.1, rate_per_second)
+        self.min_rate = min(self.max_rate, max(0.1, min_rate_per_second))
+        self.rate = self.max_rate
+        self.per_chat_interval = max(0, per_chat_interval_ms) / 1000
+        self.max_retry_after_wait = max(0.0, max_retry_after_wait)
+        self.recover_after = max(1, recover_after)
+        self._tokens = self.max_rate
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._chat_next: dict[int, float] = {}
+        self._streak = 0
+        self.sent = 0
+        self.flood_waits = 0
+        self.failed = 0
+        self.unsubscribed = 0
+        self.last_retry_after = 0
+
+    async def send(self, chat_id: int, send: Callable[[], Awaitable[Any]]) -> tuple[str, str | None, int]:
+        """
+        Sends once the global bucket and the chat's pacing allow it. A 429
+        whose retry_after fits BROADCAST_RETRY_AFTER_MAX_WAIT_SECONDS is
+        waited out and retried in place. Returns (outcome, error, retry delay
+        in seconds); the delay is the server's retry_after for floods and 0
+        otherwise.
+        """
+        while True:
+            await self._pace_chat(chat_id)
+            await self._acquire()
+            try:
+                await send()
+            except TelegramRetryAfter as exc:
+                self._on_flood(exc.retry_after)
+                if exc.retry_after > self.max_retry_after_wait:
+                    return RETRY, str(exc), int(exc.retry_after)
+                continue
+            except Exception as exc:
+                outcome = classify_send_error(exc)
+                if outcome == FAILED:
+                    self.failed += 1
+                elif outcome == UNSUBSCRIBE:
+                    self.unsubscribed += 1
+                return outcome, str(exc), 0
+            self._on_success()
+            return SENT, None, 0
+
+    async def _acquire(self):
+        # No await between the check and the take, so no lock is needed
+        while True:
+            now = time.monotonic()
+            wait = self._paused_until - now
+            if wait <= 0:
+                self._tokens = min(self.max_rate, self._tokens + (now - self._refilled_at) * self.rate)
+                self._refilled_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            await asyncio.sleep(wait)
+
+    async def _pace_chat(self, chat_id: int):
+        if not self.per_chat_interval:
+            return
+        now = time.monotonic()
+        if len(self._chat_next) > _CHAT_PACING_PRUNE_AT:
+            self._chat_next = {cid: at for cid, at in self._chat_next.items() if at > now}
+        slot = max(now, self._chat_next.get(chat_id, 0.0))
+        self._chat_next[chat_id] = slot + self.per_chat_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def _on_flood(self, retry_after: int):
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + max(0, retry_after))
+        self._tokens = 0.0
+        self._refilled_at = max(now, self._paused_until)
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._streak = 0
+        self.flood_waits += 1
+        self.last_retry_after = int(retry_after)
+
+    def _on_success(self):
+        self.sent += 1
+        self._streak += 1
+        if self._streak >= self.recover_after and self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate * 1.25)
+            self._streak = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "rate": round(self.rate, 1),
+            "max_rate": self.max_rate,
+            "paused_for": max(0.0, round(self._paused_until - time.monotonic(), 1)),
+            "sent": self.sent,
+            "flood_waits": self.flood_waits,
+            "last_retry_after": self.last_retry_after,
+            "failed": self.failed,
+            "unsubscribed": self.unsubscribed,
+        }
+
+
+_SENDER = BroadcastSender(
+    settings.broadcast_rate_per_second,
+    settings.broadcast_per_chat_interval_ms,
+    settings.broadcast_retry_after_max_wait_seconds,
+)
+
+
+async def send_paced(chat_id: int, send: Callable[[], Awaitable[Any]]) -> tuple[str, str | None, int]:
+    return await _SENDER.send(chat_id, send)
+
+
+def get_broadcast_sender_stats() -> dict[str, Any]:
+    return _SENDER.stats()
@@ -0,0 +1,162 @@
+"""
+Long-running broadcast queue worker.
+
+Claims and sends batch after batch while jobs are due. When the queue is
+drained it sleeps until the next pending job becomes due, at most
+BROADCAST_WORKER_IDLE_SECONDS, and wakes early when jobs are enqueued: in
+process through on_jobs_enqueued, from other instances over LISTEN/NOTIFY on
+Postgres. It runs next to the scheduler, on the leader instance only, so the
+sender's rate limit covers every send the bot makes.
+"""
+import asyncio
+import datetime
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from aiogram import Bot
+
+from core.config import settings
+from database.aio import run_db
+from database.notify import subscribe
+from database.repositories.broadcast_repository import (
+    BROADCAST_QUEUE_CHANNEL,
+    get_next_pending_at,
+    on_jobs_enqueued,
+)
+
+ProcessBatch = Callable[..., Awaitable[int]]
+
+_THROUGHPUT_WINDOW_SECONDS = 60.0
+_RECOVER_INTERVAL_SECONDS = 60.0
+# Floor for the idle sleep, so a due job that cannot be claimed is no busy loop
+_MIN_IDLE_SECONDS = 1.0
+
+
+class BroadcastWorker:
+    def __init__(self, idle_seconds: float):
+        self.idle_seconds = max(_MIN_IDLE_SECONDS, idle_seconds)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self._recovered_at = 0.0
+        self._recent: deque[tuple[float, int]] = deque()
+        self.processed = 0
+        self.batches = 0
+        self.last_batch_at: str | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, bot: Bot, process: ProcessBatch):
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._closing = False
+        self._task = self._loop.create_task(self._run(bot, process), name="broadcast-worker")
+
+    async def stop(self, timeout: float = 30.0):
+        """Lets the batch in flight finish (and write its acks), then stops."""
+        task = self._task
+        if task is None:
+            return
+        self._closing = True
+        self.wake()
+        try:
+            await asyncio.wait_for(task, timeout)
+        except asyncio.TimeoutError:
+            logging.error("Broadcast worker did not stop within %ss", timeout)
+        self._task = None
+        self._wake = None
+        self._loop = None
+
+    def wake(self):
+        """Thread-safe; a no-op while the worker is not running."""
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            pass
+
+    async def _run(self, bot: Bot, process: ProcessBatch):
+        while not self._closing:
+            # Cleared before claiming, so an enqueue during the batch is not lost
+            self._wake.clear()
+            recover = time.monotonic() - self._recovered_at >= _RECOVER_INTERVAL_SECONDS
+            if recover:
+                self._recovered_at = time.monotonic()
+            try:
+                processed = await process(bot, recover=recover)
+            except Exception as exc:
+                logging.error("Broadcast worker batch failed: %s", exc)
+                processed = 0
+            if processed:
+                self._record(processed)
+                continue
+            await self._idle()
+
+    async def _idle(self):
+        timeout = self.idle_seconds
+        next_at = await run_db(get_next_pending_at)
+        if next_at is not None:
+            due_in = (next_at - datetime.datetime.utcnow()).total_seconds()
+            timeout = min(timeout, max(_MIN_IDLE_SECONDS, due_in))
+        if self._closing:
+            return
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _record(self, processed: int):
+        now = time.monotonic()
+        self._recent.append((now, processed))
+        while self._recent and self._recent[0][0] < now - _THROUGHPUT_WINDOW_SECONDS:
+            self._recent.popleft()
+        self.processed += processed
+        self.batches += 1
+        self.last_batch_at = datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z"
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        recent = sum(count for at, count in self._recent if at >= now - _THROUGHPUT_WINDOW_SECONDS)
+        return {
+            "running": self.running,
+            "processed": self.processed,
+            "batches": self.batches,
+            "jobs_per_second": round(recent / _THROUGHPUT_WINDOW_SECONDS, 1),
+            "last_batch_at": self.last_batch_at,
+        }
+
+
+_WORKER = BroadcastWorker(settings.broadcast_worker_idle_seconds)
+on_jobs_enqueued(_WORKER.wake)
+subscribe(BROADCAST_QUEUE_CHANNEL, lambda _payload: _WORKER.wake(), on_reset=_WORKER.wake)
+
+
+def start_broadcast_worker(bot: Bot):
+    from handlers.daily import process_broadcast_queue
+
+    _WORKER.start(bot, process_broadcast_queue)
+
+
+async def stop_broadcast_worker():
+    await _WORKER.stop()
+
+
+def get_broadcast_worker_stats() -> dict[str, Any]:
+    return _WORKER.stats()
+
+
+async def get_broadcast_queue_lag_seconds() -> float:
+    """How long the oldest due job has been waiting; 0 when nothing is due."""
+    next_at = await run_db(get_next_pending_at)
+    if next_at is None:
+        return 0.0
+    return round(max(0.0, (datetime.datetime.utcnow() - next_at).total_seconds()), 1)
@@ -1,14 +1,27 @@
-import asyncio
 import json
+import threading
+import weakref
+from collections import OrderedDict
 from typing import Any, Mapping
 
 from aiogram.fsm.state import State
 from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
 
-from database.connection import get_connection
+from core.config import settings
+from database.aio import run_db
+from database.connection import compact_table, current_unit_of_work, get_connection
+from database.notify import notify, subscribe
 
+FSM_INVALIDATE_CHANNEL = "fsm_state_invalidate"
 
-def _normalize_key(key: StorageKey) -> tuple[int, int, int, int, str, str]:
+NormalizedKey = tuple[int, int, int, int, str, str]
+_KEY_COLUMNS = "bot_id, chat_id, user_id, thread_id, business_connection_id, destiny"
+
+# Live storages, so rows deleted by the sweeper also leave their caches
+_STORAGES: "weakref.WeakSet[DBFSMStorage]" = weakref.WeakSet()
+
+
+def _normalize_key(key: StorageKey) -> NormalizedKey:
     return (
         int(key.bot_id),
         int(key.chat_id),
@@ -27,27 +40,165 @@ def _coerce_state(state: StateType = None) -> str | None:
     return str(state)
 
 
+def _parse_data(payload: str | None) -> dict[str, Any]:
+    if not payload:
+        return {}
+    try:
+        parsed = json.loads(payload)
+        return parsed if isinstance(parsed, dict) else {}
+    except Exception:
+        return {}
+
+
+class _Entry:
+    """Cached fsm_state row. data is the parsed payload, filled lazily and never handed out."""
+
+    __slots__ = ("state", "payload", "data")
+
+    def __init__(self, state: str | None, payload: str | None):
+        self.state = state
+        self.payload = payload or "{}"
+        self.data: dict[str, Any] | None = None
+
+    def parsed(self) -> dict[str, Any]:
+        if self.data is None:
+            self.data = _parse_data(self.payload)
+        return self.data
+
+
 class DBFSMStorage(BaseStorage):
+    """
+    FSM storage on the fsm_state table with a bounded in-process LRU of
+    (state, data) per key in front of it. Writes go to the database first and
+    update the cache after; writes that would not change the row are skipped.
+    The cache is dropped for a key when the update's unit of work rolls back
+    and, on Postgres, when another instance writes the key (LISTEN/NOTIFY).
+    FSM_CACHE_SIZE=0 turns the cache off.
+    """
+
+    def __init__(self, cache_size: int | None = None):
+        self.cache_size = max(0, settings.fsm_cache_size if cache_size is None else cache_size)
+        self._cache: OrderedDict[NormalizedKey, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a slow read cannot cache a stale row
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.skipped_writes = 0
+        if self.cache_size:
+            subscribe(FSM_INVALIDATE_CHANNEL, self._on_remote_write, on_reset=self.clear_cache)
+            _STORAGES.add(self)
+
     async def set_state(self, key: StorageKey, state: StateType = None) -> None:
-        await asyncio.to_thread(self._set_state_sync, key, _coerce_state(state))
+        norm = _normalize_key(key)
+        new_state = _coerce_state(state)
+        entry = self._cached(norm)
+        if entry is not None and entry.state == new_state:
+            self.skipped_writes += 1
+            return
+        row = await run_db(self._set_state_sync, norm, new_state)
+        self._after_write(norm, row)
 
     async def get_state(self, key: StorageKey) -> str | None:
-        return await asyncio.to_thread(self._get_state_sync, key)
+        entry = await self._entry(_normalize_key(key))
+        return entry.state
 
     async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
-        await asyncio.to_thread(self._set_data_sync, key, dict(data))
+        norm = _normalize_key(key)
+        data = dict(data)
+        entry = self._cached(norm)
+        if entry is not None and entry.parsed() == data:
+            self.skipped_writes += 1
+            return
+        row = await run_db(self._set_data_sync, norm, json.dumps(data, ensure_ascii=False))
+        self._after_write(norm, row)
 
     async def get_data(self, key: StorageKey) -> dict[str, Any]:
-        return await asyncio.to_thread(self._get_data_sync, key)
+        entry = await self._entry(_normalize_key(key))
+        # A fresh copy each time, exactly as a database read would return it
+        return _parse_data(entry.payload)
 
     async def close(self) -> None:
         return
 
-    def _set_state_sync(self, key: StorageKey, state: str | None) -> None:
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+            self._generation += 1
+
+    def invalidate(self, norm: NormalizedKey):
+        with self._lock:
+            self._cache.pop(norm, None)
+            self._generation += 1
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "capacity": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0.0,
+            "writes": self.writes,
+            "skipped_writes": self.skipped_writes,
+        }
+
+    def _cached(self, norm: NormalizedKey) -> _Entry | None:
+        if not self.cache_size:
+            return None
+        with self._lock:
+            entry = self._cache.get(norm)
+            if entry is not None:
+                self._cache.move_to_end(norm)
+        return entry
+
+    def _store(self, norm: NormalizedKey, entry: _Entry, generation: int | None = None):
+        if not self.cache_size:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._cache[norm] = entry
+            self._cache.move_to_end(norm)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def _entry(self, norm: NormalizedKey) -> _Entry:
+        entry = self._cached(norm)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        generation = self._generation
+        state, payload = await run_db(self._get_row_sync, norm)
+        entry = _Entry(state, payload)
+        self._store(norm, entry, generation)
+        return entry
+
+    def _after_write(self, norm: NormalizedKey, row: tuple[str | None, str | None]):
+        self.writes += 1
+        if not self.cache_size:
+            return
+        with self._lock:
+            self._generation += 1
+        self._store(norm, _Entry(*row))
+        unit = current_unit_of_work()
+        if unit is not None:
+            unit.on_rollback(lambda: self.invalidate(norm))
+
+    def _on_remote_write(self, payload: str):
+        try:
+            norm = tuple(json.loads(payload))
+        except Exception:
+            self.clear_cache()
+            return
+        self.invalidate(norm)
+
+    def _set_state_sync(self, norm: NormalizedKey, state: str | None) -> tuple[str | None, str | None]:
         conn = get_connection()
         try:
             cur = conn.cursor()
-            bot_id, chat_id, user_id, thread_id, business_connection_id, destiny = _normalize_key(key)
             cur.execute(
                 """
                 INSERT INTO fsm_state (
@@ -56,40 +207,21 @@ class DBFSMStorage(BaseStorage):
                 VALUES (?, ?, ?, ?, ?, ?, ?, '{}', CURRENT_TIMESTAMP)
                 ON CONFLICT(bot_id, chat_id, user_id, thread_id, business_connection_id, destiny)
                 DO UPDATE SET state = EXCLUDED.state, updated_at = CURRENT_TIMESTAMP
+                RETURNING state, data
                 """,
-                (bot_id, chat_id, user_id, thread_id, business_connection_id, destiny, state),
-            )
-            conn.commit()
-        finally:
-            conn.close()
-
-    def _get_state_sync(self, key: StorageKey) -> str | None:
-        conn = get_connection()
-        try:
-            cur = conn.cursor()
-            bot_id, chat_id, user_id, thread_id, business_connection_id, destiny = _normalize_key(key)
-            cur.execute(
-                """
-                SELECT state
-                FROM fsm_state
-                WHERE bot_id = ? AND chat_id = ? AND user_id = ? AND thread_id = ?
-                  AND business_connection_id = ? AND destiny = ?
-                """,
-                (bot_id, chat_id, user_id, thread_id, business_connection_id, destiny),
+                (*norm, state),
             )
             row = cur.fetchone()
+            notify(cur, FSM_INVALIDATE_CHANNEL, json.dumps(norm))
+            conn.commit()
         finally:
             conn.close()
-        if not row:
-            return None
-        return row[0]
+        return (row[0], row[1]) if row else (state, None)
 
-    def _set_data_sync(self, key: StorageKey, data: dict[str, Any]) -> None:
+    def _set_data_sync(self, norm: NormalizedKey, payload: str) -> tuple[str | None, str | None]:
         conn = get_connection()
         try:
             cur = conn.cursor()
-            bot_id, chat_id, user_id, thread_id, business_connection_id, destiny = _normalize_key(key)
-            payload = json.dumps(data, ensure_ascii=False)
             cur.execute(
                 """
                 INSERT INTO fsm_state (
@@ -98,34 +230,73 @@ class DBFSMStorage(BaseStorage):
                 VALUES (?, ?, ?, ?, ?, ?, NULL, ?, CURRENT_TIMESTAMP)
                 ON CONFLICT(bot_id, chat_id, user_id, thread_id, business_connection_id, destiny)
                 DO UPDATE SET data = EXCLUDED.data, updated_at = CURRENT_TIMESTAMP
+                RETURNING state, data
                 """,
-                (bot_id, chat_id, user_id, thread_id, business_connection_id, destiny, payload),
+                (*norm, payload),
             )
+            row = cur.fetchone()
+            notify(cur, FSM_INVALIDATE_CHANNEL, json.dumps(norm))
             conn.commit()
         finally:
             conn.close()
+        return (row[0], row[1]) if row else (None, payload)
 
-    def _get_data_sync(self, key: StorageKey) -> dict[str, Any]:
-        conn = get_connection()
+    def _get_row_sync(self, norm: NormalizedKey) -> tuple[str | None, str | None]:
+        """State and data in one read; a missing row reads as (None, None)."""
+        conn = get_connection(readonly=True)
         try:
             cur = conn.cursor()
-            bot_id, chat_id, user_id, thread_id, business_connection_id, destiny = _normalize_key(key)
             cur.execute(
                 """
-                SELECT data
+                SELECT state, data
                 FROM fsm_state
                 WHERE bot_id = ? AND chat_id = ? AND user_id = ? AND thread_id = ?
                   AND business_connection_id = ? AND destiny = ?
                 """,
-                (bot_id, chat_id, user_id, thread_id, business_connection_id, destiny),
+                norm,
             )
             row = cur.fetchone()
         finally:
             conn.close()
-        if not row or not row[0]:
-            return {}
-        try:
-            parsed = json.loads(row[0])
-            return parsed if isinstance(parsed, dict) else {}
-        except Exception:
-            return {}
+        if not row:
+            return None, None
+        return row[0], row[1]
+
+
+def delete_expired_fsm_states(cutoff: str, limit: int) -> int:
+    """
+    Deletes up to limit rows not written since cutoff ('YYYY-MM-DD HH:MM:SS'
+    UTC), oldest first via idx_fsm_state_updated_at, in one short
+    transaction. Returns the number of rows deleted.
+    """
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            f"""
+            DELETE FROM fsm_state
+            WHERE ({_KEY_COLUMNS}) IN (
+                SELECT {_KEY_COLUMNS} FROM fsm_state
+                WHERE updated_at < ?
+                ORDER BY updated_at
+                LIMIT ?
+            )
+            RETURNING {_KEY_COLUMNS}
+            """,
+            (cutoff, limit),
+        )
+        keys = [tuple(row) for row in cur.fetchall()]
+        for norm in keys:
+            notify(cur, FSM_INVALIDATE_CHANNEL, json.dumps(norm))
+        conn.commit()
+    finally:
+        conn.close()
+    for storage in list(_STORAGES):
+        for norm in keys:
+            storage.invalidate(norm)
+    return len(keys)
+
+
+def compact_fsm_state():
+    """Returns the space freed by the sweeper to the OS."""
+    compact_table("fsm_state")
@@ -0,0 +1,37 @@
+import random
+from typing import Collection, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def sample_distinct(
+    population: Sequence[T],
+    k: int,
+    exclude: Collection[T] | None = None,
+    rng: random.Random | None = None,
+) -> list[T]:
+    """
+    Draws up to k distinct items from population, skipping anything in exclude.
+
+    Runs a partial Fisher-Yates shuffle over positions, recording only the
+    swapped slots in a dict, so the population is never copied or sorted and
+    the cost is O(k) plus one draw per excluded item hit. Every position is
+    visited at most once, which bounds the loop even when exclude covers most
+    of the population. Pass a seeded random.Random for reproducible draws.
+    """
+    randrange = (rng or random).randrange
+    n = len(population)
+    k = min(max(0, k), n)
+    swapped: dict[int, int] = {}
+    picked: list[T] = []
+    i = 0
+    while len(picked) < k and i < n:
+        j = randrange(i, n)
+        position = swapped.get(j, j)
+        swapped[j] = swapped.get(i, i)
+        item = population[position]
+        i += 1
+        if exclude and item in exclude:
+            continue
+        picked.append(item)
+    return picked
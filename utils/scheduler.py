@@ -1,17 +1,38 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from aiogram import Bot
+import asyncio
+import datetime
 import logging
 
 from core.config import settings
-from database.connection import get_connection, is_postgres_backend
+from database.aio import run_db
+from database.connection import compact_table, get_connection, is_postgres_backend
+from database.repositories.activity_repository import prune_daily_active_users
+from database.repositories.broadcast_repository import archive_broadcast_jobs, delete_unused_broadcast_messages
 from utils.backup_manager import run_backup_async
+from utils.broadcast_worker import start_broadcast_worker
+from utils.db_fsm_storage import compact_fsm_state, delete_expired_fsm_states
 
 SCHEDULER_JOB_ID_DAILY_WORD = "send_daily_word_to_all"
-SCHEDULER_JOB_ID_BROADCAST_PROCESSOR = "process_broadcast_queue"
 SCHEDULER_JOB_ID_DAILY_BACKUP = "daily_sqlite_backup"
+SCHEDULER_JOB_ID_ROLLUP_PRUNE = "prune_activity_rollups"
+SCHEDULER_JOB_ID_FSM_SWEEP = "sweep_fsm_state"
+SCHEDULER_JOB_ID_BROADCAST_ARCHIVE = "archive_broadcast_jobs"
 _scheduler: AsyncIOScheduler | None = None
 _scheduler_leader_conn = None
 SCHEDULER_ADVISORY_LOCK_KEY = 99170031
+_fsm_sweep_stats = {
+    "last_run_at": None,
+    "last_reclaimed": 0,
+    "total_reclaimed": 0,
+    "last_vacuum_at": None,
+}
+_broadcast_archive_stats = {
+    "last_run_at": None,
+    "last_archived": 0,
+    "total_archived": 0,
+    "last_vacuum_at": None,
+}
 
 
 def _acquire_scheduler_leader_lock() -> bool:
@@ -51,7 +72,7 @@ def _release_scheduler_leader_lock():
 
 
 async def start_scheduler(bot: Bot):
-    from handlers.daily import send_daily_word_to_all, process_broadcast_queue, DAILY_TIMEZONE
+    from handlers.daily import send_daily_word_to_all, DAILY_TIMEZONE
     global _scheduler
     if not _acquire_scheduler_leader_lock():
         logging.warning("Scheduler not started on this replica (leader lock not acquired).")
@@ -68,16 +89,6 @@ async def start_scheduler(bot: Bot):
         id=SCHEDULER_JOB_ID_DAILY_WORD,
         replace_existing=True
     )
-    scheduler.add_job(
-        process_broadcast_queue,
-        "interval",
-        minutes=1,
-        args=[bot],
-        id=SCHEDULER_JOB_ID_BROADCAST_PROCESSOR,
-        replace_existing=True,
-        coalesce=True,
-        max_instances=1,
-    )
     backup_hour, backup_minute = _parse_backup_time_utc(settings.backup_time_utc)
     scheduler.add_job(
         run_backup_async,
@@ -89,16 +100,141 @@ async def start_scheduler(bot: Bot):
         id=SCHEDULER_JOB_ID_DAILY_BACKUP,
         replace_existing=True
     )
+    scheduler.add_job(
+        prune_activity_rollups,
+        "cron",
+        hour=0,
+        minute=30,
+        timezone="UTC",
+        id=SCHEDULER_JOB_ID_ROLLUP_PRUNE,
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+    )
+    if settings.fsm_state_ttl_hours > 0:
+        scheduler.add_job(
+            sweep_fsm_state,
+            "interval",
+            minutes=max(1, settings.fsm_sweep_interval_minutes),
+            id=SCHEDULER_JOB_ID_FSM_SWEEP,
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+    if settings.broadcast_retention_days > 0:
+        scheduler.add_job(
+            archive_old_broadcast_jobs,
+            "cron",
+            hour=1,
+            minute=0,
+            timezone="UTC",
+            id=SCHEDULER_JOB_ID_BROADCAST_ARCHIVE,
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
     scheduler.start()
     _scheduler = scheduler
+    start_broadcast_worker(bot)
     logging.info(
-        "Scheduler started. enqueue=hourly@%s, queue_processor=1m, daily_backup=%02d:%02d UTC",
+        "Scheduler started. enqueue=hourly@%s, queue_processor=continuous, daily_backup=%02d:%02d UTC",
         DAILY_TIMEZONE,
         backup_hour,
         backup_minute
     )
 
 
+async def prune_activity_rollups():
+    # Per-user activity is only needed while its day can still gain users.
+    deleted = await run_db(prune_daily_active_users)
+    if deleted:
+        logging.info("Pruned %s daily_active_users rows", deleted)
+
+
+async def sweep_fsm_state():
+    """
+    Deletes FSM rows idle for longer than FSM_STATE_TTL_HOURS. Each batch is
+    its own short transaction, so the SQLite writer is free between batches;
+    FSM_SWEEP_MAX_BATCHES caps one run and the next run picks up the rest.
+    """
+    cutoff = (
+        datetime.datetime.now(datetime.timezone.utc)
+        - datetime.timedelta(hours=settings.fsm_state_ttl_hours)
+    ).strftime("%Y-%m-%d %H:%M:%S")
+    batch_size = max(1, settings.fsm_sweep_batch_size)
+    reclaimed = 0
+    for _ in range(max(1, settings.fsm_sweep_max_batches)):
+        try:
+            deleted = await run_db(delete_expired_fsm_states, cutoff, batch_size)
+        except Exception as exc:
+            logging.error("FSM state sweep failed: %s", exc)
+            break
+        reclaimed += deleted
+        if deleted < batch_size:
+            break
+        # Let queued updates take the writer before the next batch
+        await asyncio.sleep(0)
+    _fsm_sweep_stats["last_run_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+    _fsm_sweep_stats["last_reclaimed"] = reclaimed
+    _fsm_sweep_stats["total_reclaimed"] += reclaimed
+    if reclaimed:
+        logging.info("Swept %s idle fsm_state rows", reclaimed)
+    if reclaimed and settings.fsm_sweep_vacuum:
+        try:
+            await run_db(compact_fsm_state)
+            _fsm_sweep_stats["last_vacuum_at"] = _fsm_sweep_stats["last_run_at"]
+        except Exception as exc:
+            logging.error("FSM state vacuum failed: %s", exc)
+    return reclaimed
+
+
+def get_fsm_sweep_stats():
+    return dict(_fsm_sweep_stats)
+
+
+async def archive_old_broadcast_jobs():
+    """
+    Folds sent and failed broadcast jobs older than BROADCAST_RETENTION_DAYS
+    into broadcast_daily_summary, BROADCAST_ARCHIVE_BATCH_SIZE jobs per short
+    transaction and at most BROADCAST_ARCHIVE_MAX_BATCHES per run, then drops
+    broadcast messages no job refers to any more.
+    """
+    cutoff = (
+        datetime.datetime.now(datetime.timezone.utc)
+        - datetime.timedelta(days=settings.broadcast_retention_days)
+    ).strftime("%Y-%m-%d %H:%M:%S")
+    batch_size = max(1, settings.broadcast_archive_batch_size)
+    archived = 0
+    for _ in range(max(1, settings.broadcast_archive_max_batches)):
+        try:
+            moved = await run_db(archive_broadcast_jobs, cutoff, batch_size)
+        except Exception as exc:
+            logging.error("Broadcast archive failed: %s", exc)
+            break
+        archived += moved
+        if moved < batch_size:
+            break
+        # Let queued updates and the broadcast worker take the writer
+        await asyncio.sleep(0)
+    messages = await run_db(delete_unused_broadcast_messages, cutoff)
+    _broadcast_archive_stats["last_run_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+    _broadcast_archive_stats["last_archived"] = archived
+    _broadcast_archive_stats["total_archived"] += archived
+    if archived or messages:
+        logging.info("Archived %s broadcast jobs, deleted %s broadcast messages", archived, messages)
+    if archived and settings.broadcast_archive_vacuum:
+        try:
+            await run_db(compact_table, "broadcast_jobs")
+            _broadcast_archive_stats["last_vacuum_at"] = _broadcast_archive_stats["last_run_at"]
+        except Exception as exc:
+            logging.error("Broadcast jobs vacuum failed: %s", exc)
+    return archived
+
+
+def get_broadcast_archive_stats():
+    return dict(_broadcast_archive_stats)
+
+
 def stop_scheduler():
     global _scheduler
     if _scheduler is not None:
@@ -117,7 +253,6 @@ def get_scheduler_health():
     info = {
         "started": False,
         "next_run_time": None,
-        "processor_next_run_time": None,
         "backup_next_run_time": None,
         "leader": (not is_postgres_backend()) or (_scheduler_leader_conn is not None),
     }
@@ -128,9 +263,6 @@ def get_scheduler_health():
         job = _scheduler.get_job(SCHEDULER_JOB_ID_DAILY_WORD)
         if job and job.next_run_time:
             info["next_run_time"] = job.next_run_time.isoformat()
-        processor_job = _scheduler.get_job(SCHEDULER_JOB_ID_BROADCAST_PROCESSOR)
-        if processor_job and processor_job.next_run_time:
-            info["processor_next_run_time"] = processor_job.next_run_time.isoformat()
         backup_job = _scheduler.get_job(SCHEDULER_JOB_ID_DAILY_BACKUP)
         if backup_job and backup_job.next_run_time:
             info["backup_next_run_time"] = backup_job.next_run_time.isoformat()
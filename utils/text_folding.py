@@ -0,0 +1,37 @@
+import unicodedata
+
+_GERMAN_FOLDS = str.maketrans({"ä": "a", "ö": "o", "ü": "u", "ß": "ss"})
+_ARTICLES = ("der ", "die ", "das ")
+
+
+def fold_text(text: str | None) -> str:
+    """Lowercases and folds umlauts, ß and other diacritics to plain ASCII letters."""
+    folded = (text or "").strip().lower().translate(_GERMAN_FOLDS)
+    decomposed = unicodedata.normalize("NFKD", folded)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def word_sort_key(de: str | None) -> str:
+    """
+    Dictionary sort key for a German headword: folded, with a leading
+    der/die/das dropped so "der Baum" files under B next to "backen".
+    """
+    key = fold_text(de)
+    for article in _ARTICLES:
+        if key.startswith(article) and len(key) > len(article):
+            return key[len(article):].lstrip()
+    return key
+
+
+# Uzbek Latin writes o‘/g‘ with assorted apostrophes; search ignores them all.
+_APOSTROPHES = str.maketrans("", "", "'‘’ʻʼ`")
+
+
+def search_text(text: str | None) -> str:
+    """Folded form used for the words search columns and search queries."""
+    return fold_text(text).translate(_APOSTROPHES)
+
+
+def word_search_key(de: str | None) -> str:
+    """Search form of a German headword: the sort key without apostrophes."""
+    return word_sort_key(de).translate(_APOSTROPHES)
@@ -1,7 +1,6 @@
 from aiogram.types import Message
 import re
-from core.config import settings
-from database.repositories.ui_repository import get_ui_state, set_ui_state
+from database.ui_messages import get_tracked_ui_messages, track_ui_messages
 from keyboards.builders import get_main_menu_keyboard
 
 _MD_ESC_RE = re.compile(r"([\\_*`\[\]()~>#+\-=|{}.!])")
@@ -13,8 +12,7 @@ def _md_escape(value):
 
 async def _send_fresh_main_menu(message: Message, text: str, user_id: int | None = None):
     resolved_user_id = user_id or message.chat.id
-    existing_main_id = get_ui_state(resolved_user_id, settings.main_menu_state_key)
-    prev_active_id = get_ui_state(resolved_user_id, settings.active_ui_state_key)
+    existing_main_id, prev_active_id = await get_tracked_ui_messages(resolved_user_id)
     
     markup = get_main_menu_keyboard()
     bot = message.bot
@@ -38,8 +36,7 @@ async def _send_fresh_main_menu(message: Message, text: str, user_id: int | None
         reply_markup=markup,
         parse_mode="Markdown"
     )
-    set_ui_state(resolved_user_id, settings.main_menu_state_key, str(sent.message_id))
-    set_ui_state(resolved_user_id, settings.active_ui_state_key, str(sent.message_id))
+    await track_ui_messages(resolved_user_id, main_menu_id=sent.message_id, active_id=sent.message_id)
 
 async def send_single_ui_message(
     message: Message,
@@ -49,8 +46,7 @@ async def send_single_ui_message(
     user_id: int | None = None
 ):
     resolved_user_id = user_id or message.chat.id
-    prev_active_id = get_ui_state(resolved_user_id, settings.active_ui_state_key)
-    main_menu_id = get_ui_state(resolved_user_id, settings.main_menu_state_key)
+    main_menu_id, prev_active_id = await get_tracked_ui_messages(resolved_user_id)
     bot = message.bot
     if not bot:
         return message
@@ -67,7 +63,7 @@ async def send_single_ui_message(
         reply_markup=reply_markup,
         parse_mode=parse_mode
     )
-    set_ui_state(resolved_user_id, settings.active_ui_state_key, str(sent.message_id))
+    await track_ui_messages(resolved_user_id, active_id=sent.message_id)
     return sent
 
 def _get_progress_bar(percentage, length=10):
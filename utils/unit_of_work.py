@@ -0,0 +1,42 @@
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+
+from database.aio import run_db
+from database.connection import begin_unit_of_work, current_unit_of_work, end_unit_of_work
+
+
+class UnitOfWorkMiddleware(BaseMiddleware):
+    """
+    Runs every update inside one UnitOfWork: repository calls share a single
+    connection and transaction, committed once when the handler returns and
+    rolled back if it raises.
+    """
+
+    async def __call__(self, handler, event, data):
+        unit, token = begin_unit_of_work()
+        try:
+            try:
+                result = await handler(event, data)
+            except Exception:
+                if unit.holds_connection:
+                    await run_db(unit.rollback)
+                raise
+            if unit.holds_connection:
+                await run_db(unit.commit)
+            return result
+        finally:
+            end_unit_of_work(token)
+
+
+class UnitOfWorkFlushMiddleware(BaseRequestMiddleware):
+    """
+    Commits the current update's pending writes before each Bot API request,
+    so the connection (the single SQLite writer in particular) is never held
+    across a network round trip. Later writes open a new transaction.
+    """
+
+    async def __call__(self, make_request, bot, method):
+        unit = current_unit_of_work()
+        if unit is not None and unit.holds_connection:
+            await run_db(unit.commit)
+        return await make_request(bot, method)
@@ -3,6 +3,7 @@ import logging
 import datetime
 
 from database import log_ops_error
+from database.aio import run_db
 from utils.error_notifier import schedule_ops_error_notification
 from utils.runtime_state import mark_update_handled
 
@@ -18,7 +19,8 @@ class UpdateTrackingMiddleware(BaseMiddleware):
             where_ctx = type(event).__name__
             error_type = type(exc).__name__
             message_short = str(exc)
-            log_ops_error(
+            await run_db(
+                log_ops_error,
                 severity="ERROR",
                 where_ctx=where_ctx,
                 user_id=user_id,